@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Measures the time needed to import unit_field.fields in a fresh
+interpreter, once as is (the unit families are built on first access) and
+once with all unit families and their choices materialized, e.g.:
+
+    python benchmarks/import_time.py --runs 20
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SETUP = '''
+from django.conf import settings
+settings.configure(INSTALLED_APPS=[], USE_I18N=True)
+import django
+django.setup()
+# import Django itself beforehand, only unit_field is measured
+import django.db.models
+import django.db.models.lookups
+import django.forms
+import django.utils.formats
+import time
+start = time.time()
+import unit_field.fields
+'''
+
+LAZY = SETUP + '''
+print(time.time() - start)
+'''
+
+EAGER = SETUP + '''
+from unit_field import units
+for name in units.get_family_names():
+    units.get_units(name)
+    getattr(units, name + '_CHOICES')
+print(time.time() - start)
+'''
+
+def measure(code, runs):
+    timings = []
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    for i in range(runs):
+        output = subprocess.check_output(
+            [sys.executable, '-c', code], env=env, cwd=ROOT)
+        timings.append(float(output.strip()))
+    timings.sort()
+    return timings[len(timings) // 2]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    lazy = measure(LAZY, args.runs)
+    eager = measure(EAGER, args.runs)
+    print('import unit_field.fields (lazy):  %.2f ms' % (lazy * 1000, ))
+    print('import unit_field.fields (eager): %.2f ms' % (eager * 1000, ))
+    print('speedup: %.1fx' % (eager / lazy, ))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""
+Runs the benchmark suite of django-unit-field in-process against an
+in-memory SQLite database and prints the results as JSON, e.g.:
+
+    python benchmarks/run.py --output baseline.json
+    python benchmarks/run.py --baseline baseline.json
+
+With --baseline, every benchmark is compared against the stored results
+and the exit status is 1 if one of them got slower than --threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from django.conf import settings
+
+settings.configure(
+    INSTALLED_APPS=[
+        'django.contrib.contenttypes',
+        'django.contrib.auth',
+        'unit_field',
+    ],
+    DATABASES={
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        },
+    },
+    USE_I18N=True,
+    USE_L10N=True,
+    USE_THOUSAND_SEPARATOR=True,
+    USE_TZ=False,
+)
+
+import django
+django.setup()
+
+from django import forms
+from django.db import connection, models
+from unit_field.expressions import ConvertTo
+from unit_field.fields import (LengthField, MassField, TemperatureField,
+    get_factor)
+from unit_field.managers import UnitManager
+from unit_field.parsing import parse_many, parse_quantity
+from unit_field.models import UnitModelMixin
+from unit_field.units import (UnitValue, convert_array, convert_unit,
+    UNITS_LENGTH, UNITS_TEMPERATURE)
+from unit_field.utils import sanitize_separators
+
+class Sample(UnitModelMixin, models.Model):
+    length = LengthField(verbose_name=u'length')
+    mass = MassField(verbose_name=u'mass')
+    temperature = TemperatureField(verbose_name=u'temperature')
+
+    objects = UnitManager()
+
+    class Meta:
+        app_label = 'unit_field'
+
+class SampleForm(forms.ModelForm):
+    class Meta:
+        model = Sample
+        fields = '__all__'
+
+UNIT_IDS = [u'mm', u'cm', u'm', u'km']
+
+def make_samples(count):
+    return [Sample(
+        length_input=float(i), length_unit=UNIT_IDS[i % len(UNIT_IDS)],
+        mass_input=float(i), mass_unit=u'kg',
+        temperature_input=float(i), temperature_unit=u'°F')
+        for i in range(count)]
+
+_benchmarks = []
+
+def benchmark(name, number):
+    """
+    registers a benchmark: the decorated function prepares the data and
+    returns the callable that is timed number times
+    """
+    def decorator(function):
+        _benchmarks.append((name, number, function))
+        return function
+    return decorator
+
+@benchmark('conversion.get_factor', 100000)
+def bench_get_factor():
+    return lambda: get_factor(UNITS_LENGTH, u'km')
+
+@benchmark('conversion.convert_unit', 100000)
+def bench_convert_unit():
+    return lambda: convert_unit(1.5, UNITS_LENGTH, u'km', u'cm')
+
+@benchmark('conversion.convert_unit_function', 100000)
+def bench_convert_unit_function():
+    return lambda: convert_unit(212.0, UNITS_TEMPERATURE, u'°F', u'°C')
+
+@benchmark('conversion.convert_array_10k', 20)
+def bench_convert_array():
+    values = [float(i) for i in range(10000)]
+    unit_ids = [UNIT_IDS[i % len(UNIT_IDS)] for i in range(10000)]
+    return lambda: convert_array(values, unit_ids, u'm', UNITS_LENGTH)
+
+@benchmark('parsing.parse_quantity', 100000)
+def bench_parse_quantity():
+    return lambda: parse_quantity(u'12.5 km', UNITS_LENGTH)
+
+@benchmark('parsing.parse_many_100k', 5)
+def bench_parse_many():
+    texts = [u'%s %s' % (i / 7.0, UNIT_IDS[i % len(UNIT_IDS)])
+        for i in range(100000)]
+    return lambda: parse_many(texts, UNITS_LENGTH)
+
+@benchmark('parsing.parse_many_1m', 1)
+def bench_parse_many_1m():
+    texts = [u'%s.5 mm' % (i, ) for i in range(1000000)]
+    return lambda: parse_many(texts, UNITS_LENGTH)
+
+@benchmark('utils.sanitize_separators', 100000)
+def bench_sanitize_separators():
+    return lambda: sanitize_separators(u'1,234.5')
+
+@benchmark('model.save', 200)
+def bench_save():
+    sample = make_samples(1)[0]
+    def run():
+        sample.pk = None
+        sample.save()
+    return run
+
+@benchmark('model.pre_save', 10000)
+def bench_pre_save():
+    sample = make_samples(1)[0]
+    field = Sample._meta.get_field('length_value')
+    return lambda: field.pre_save(sample, True)
+
+@benchmark('model.bulk_create_1k', 5)
+def bench_bulk_create():
+    samples = make_samples(1000)
+    def run():
+        for sample in samples:
+            sample.pk = None
+        Sample.objects.bulk_create(samples)
+    return run
+
+@benchmark('model.descriptor_get', 100000)
+def bench_descriptor():
+    sample = make_samples(1)[0]
+    return lambda: sample.length
+
+@benchmark('model.html', 10000)
+def bench_html():
+    sample = make_samples(1)[0]
+    return lambda: sample.length_html
+
+@benchmark('model.label_value', 10000)
+def bench_label_value():
+    sample = make_samples(1)[0]
+    return lambda: sample.length_label_value
+
+@benchmark('form.clean', 1000)
+def bench_form_clean():
+    data = {
+        'length_input': u'1,234.5', 'length_unit': u'cm',
+        'mass_input': u'2', 'mass_unit': u'kg',
+        'temperature_input': u'20', 'temperature_unit': u'°C',
+    }
+    return lambda: SampleForm(data).is_valid()
+
+@benchmark('form.render', 200)
+def bench_form_render():
+    sample = make_samples(1)[0]
+    return lambda: SampleForm(instance=sample).as_p()
+
+@benchmark('query.lookup', 500)
+def bench_lookup():
+    Sample.objects.bulk_create(make_samples(1000))
+    bound = UnitValue(50, u'cm')
+    return lambda: Sample.objects.filter(length__gte=bound).count()
+
+@benchmark('query.convert_to', 200)
+def bench_convert_to():
+    return lambda: list(Sample.objects.annotate(
+        length_km=ConvertTo('length', u'km')).values_list(
+        'length_km', flat=True)[:100])
+
+def run(pattern=None, repeat=5):
+    with connection.schema_editor() as schema_editor:
+        schema_editor.create_model(Sample)
+
+    results = {}
+    for name, number, function in _benchmarks:
+        if pattern and pattern not in name:
+            continue
+        timer = timeit.Timer(function())
+        best = min(timer.repeat(repeat=repeat, number=number))
+        results[name] = {
+            'number': number,
+            'seconds_per_op': best / number,
+        }
+    return {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'results': results,
+    }
+
+def compare(results, baseline, threshold):
+    """
+    returns the names of the benchmarks which got slower than threshold
+    (a ratio to the baseline) and prints a comparison table
+    """
+    regressions = []
+    for name, result in sorted(results['results'].items()):
+        base = baseline['results'].get(name)
+        if base is None:
+            sys.stderr.write('%-36s %12.3f us (new)\n' % (
+                name, result['seconds_per_op'] * 1e6))
+            continue
+        ratio = result['seconds_per_op'] / base['seconds_per_op']
+        sys.stderr.write('%-36s %12.3f us %8.2fx\n' % (
+            name, result['seconds_per_op'] * 1e6, ratio))
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', help=u'write the results to this file')
+    parser.add_argument('--baseline', help=u'compare against these results')
+    parser.add_argument('--threshold', type=float, default=1.25)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--filter', dest='pattern', default=None,
+        help=u'only run benchmarks whose name contains this string')
+    args = parser.parse_args()
+
+    results = run(args.pattern, args.repeat)
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            sys.stderr.write('slower than the baseline: %s\n' % (
+                ', '.join(regressions), ))
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
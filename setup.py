@@ -1,6 +1,5 @@
 # -*- coding: utf-8 -*-
-from distutils.core import setup
-from setuptools import find_packages
+from setuptools import setup, find_packages
 
 setup(
     name='django-unit-field',
@@ -14,5 +13,10 @@ setup(
                 ' that allows unit conversion',
     long_description=open('README.rst').read(),
     include_package_data=True,
+    extras_require={
+        'numpy': ['numpy'],
+        'parquet': ['pyarrow'],
+        'rest': ['djangorestframework'],
+    },
     zip_safe=False,
 )
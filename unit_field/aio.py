@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+asyncio counterparts of the bulk operations for ASGI deployments. The
+normalization and the database access run in threads, so the event loop
+is never blocked, e.g.:
+
+await abulk_normalize_and_create(Engine, engines)
+
+importer = AsyncUnitImporter(Sample, {'mass': ('value', 'unit')})
+async for chunk in importer.run(read_csv(upload)):
+    ...
+"""
+from concurrent.futures import ThreadPoolExecutor
+from django.db import connections, models
+from unit_field.importers import UnitImporter, iter_chunks
+from unit_field.managers import normalize_instances
+import asyncio
+
+__all__ = ('abulk_normalize_and_create', 'AsyncUnitImporter', )
+
+def _normalize_and_create(model, objs, batch_size):
+    try:
+        normalize_instances(model, objs)
+        return models.QuerySet(model).bulk_create(objs, batch_size=batch_size)
+    finally:
+        # the connection of a worker thread is never reused by a request
+        connections.close_all()
+
+async def abulk_normalize_and_create(model, objs, batch_size=None,
+        executor=None):
+    """
+    computes the "_value" columns of objs and creates them in a worker
+    thread of executor (the default executor of the loop if None)
+    """
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(executor, _normalize_and_create,
+        model, list(objs), batch_size)
+
+async def _iter_chunks(rows, chunk_size, loop, executor):
+    """
+    splits sync or async iterables of rows into lists, sync iterables
+    (e.g. files) are read in executor
+    """
+    if hasattr(rows, '__aiter__'):
+        chunk = []
+        async for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+        return
+
+    chunks = iter_chunks(rows, chunk_size)
+    while True:
+        chunk = await loop.run_in_executor(executor, next, chunks, None)
+        if chunk is None:
+            return
+        yield chunk
+
+class AsyncUnitImporter(UnitImporter):
+    """
+    a UnitImporter for the event loop: chunks are normalized in executor
+    while the previous chunk is written to the database. All chunks are
+    written by a single thread and thus share one database connection.
+    """
+    def __init__(self, *args, **kwargs):
+        self.executor = kwargs.pop('executor', None)
+        super(AsyncUnitImporter, self).__init__(*args, **kwargs)
+
+    async def run(self, rows):
+        """
+        imports sync or async iterables of rows chunk by chunk and yields
+        an ImportChunk for every chunk written to the database
+        """
+        loop = asyncio.get_event_loop()
+        writer = ThreadPoolExecutor(max_workers=1)
+        pending = None
+        line = 0
+        try:
+            async for chunk in _iter_chunks(rows, self.chunk_size, loop,
+                    self.executor):
+                prepared = await loop.run_in_executor(
+                    self.executor, self.prepare, chunk, line)
+                line += len(chunk)
+                if pending is not None:
+                    yield await pending
+                pending = loop.run_in_executor(writer, self.write, *prepared)
+            if pending is not None:
+                chunk, pending = await pending, None
+                yield chunk
+        finally:
+            if pending is not None:
+                await asyncio.wait([pending])
+            await loop.run_in_executor(writer, connections.close_all)
+            writer.shutdown(wait=False)
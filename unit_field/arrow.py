@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+exports the UnitFields of a queryset into Arrow record batches or Parquet
+files and imports such files again (requires pyarrow), e.g.:
+
+ArrowExporter(Sample, columns=['sensor_id']).write_parquet(
+    Sample.objects.all(), 'samples.parquet')
+for chunk in ArrowImporter(Sample, columns=['sensor_id']).run(
+        'samples.parquet'):
+    print(chunk.created, chunk.rejected)
+
+The "_value" and "_input" columns are written as float64, the "_unit"
+column is dictionary encoded over the unit ids of the family (stored
+units outside of the family are appended per batch). The unit table of every family (ids, scale, offset and the base unit) is stored as
+json in the schema metadata under the key "unit_field".
+"""
+from itertools import islice
+from unit_field.fields import UnitField
+from unit_field.importers import RejectedRow, UnitImporter
+from unit_field.units import convert_array, get_numpy
+import json
+
+__all__ = ('ArrowExporter', 'ArrowImporter', 'read_unit_metadata', )
+
+METADATA_KEY = b'unit_field'
+
+def get_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError(u'the arrow export requires pyarrow')
+    return pyarrow
+
+def get_arrow_type(field, pa):
+    """
+    returns the arrow type of a (non unit) model field
+    """
+    if field.is_relation:
+        field = field.target_field
+    internal_type = field.get_internal_type()
+    if internal_type in ('AutoField', 'BigAutoField', 'IntegerField',
+            'BigIntegerField', 'SmallIntegerField', 'PositiveIntegerField',
+            'PositiveSmallIntegerField'):
+        return pa.int64()
+    if internal_type == 'FloatField':
+        return pa.float64()
+    if internal_type == 'DecimalField':
+        return pa.decimal128(field.max_digits, field.decimal_places)
+    if internal_type in ('BooleanField', 'NullBooleanField'):
+        return pa.bool_()
+    if internal_type == 'DateField':
+        return pa.date32()
+    if internal_type == 'DateTimeField':
+        return pa.timestamp('us')
+    return pa.string()
+
+def get_unit_fields(model, names=None):
+    fields = [field for field in model._meta.private_fields
+        if isinstance(field, UnitField)]
+    if names is not None:
+        fields = [model._meta.get_field(name) for name in names]
+    return fields
+
+def get_unit_metadata(unit_field):
+    """
+    returns the unit table of a UnitField, stored in the schema metadata
+    """
+    registry = unit_field.registry
+    units = []
+    for unit_id in registry.ids:
+        scale, offset = registry.affine.get(unit_id, (None, None))
+        units.append({'id': unit_id, 'scale': scale, 'offset': offset})
+    return {
+        'base_unit': unit_field.get_base_unit_id(),
+        'store_input': unit_field.input_field is not None,
+        'units': units,
+    }
+
+def read_unit_metadata(schema):
+    """
+    returns the unit tables stored in the metadata of an arrow schema,
+    keyed by the name of the UnitField
+    """
+    metadata = schema.metadata or {}
+    if METADATA_KEY not in metadata:
+        return {}
+    return json.loads(metadata[METADATA_KEY].decode('utf-8'))
+
+class ArrowExporter(object):
+    def __init__(self, model, fields=None, columns=(), chunk_size=10000):
+        self.pa = get_pyarrow()
+        self.model = model
+        self.unit_fields = get_unit_fields(model, fields)
+        self.extra = [model._meta.get_field(column) for column in columns]
+        self.chunk_size = chunk_size
+
+        pa = self.pa
+        self.columns = [field.attname for field in self.extra]
+        schema_fields = [pa.field(field.attname, get_arrow_type(field, pa))
+            for field in self.extra]
+        metadata = {}
+        for unit_field in self.unit_fields:
+            if unit_field.input_field is not None:
+                self.columns.append(unit_field.input_field.attname)
+                schema_fields.append(pa.field(
+                    unit_field.input_field.attname, pa.float64()))
+            self.columns.append(unit_field.unit_field.attname)
+            schema_fields.append(pa.field(unit_field.unit_field.attname,
+                pa.dictionary(pa.int16(), pa.string())))
+            self.columns.append(unit_field.value_field.attname)
+            schema_fields.append(pa.field(unit_field.value_field.attname,
+                pa.float64()))
+            metadata[unit_field.name] = get_unit_metadata(unit_field)
+        self.schema = pa.schema(schema_fields, metadata={
+            METADATA_KEY: json.dumps(metadata).encode('utf-8')})
+
+        # the dictionary of every unit column: the unit ids of the family
+        self.dictionaries = {}
+        for unit_field in self.unit_fields:
+            registry = unit_field.registry
+            self.dictionaries[unit_field.unit_field.attname] = (
+                registry.index, registry.ids)
+
+    def encode_units(self, unit_ids, index, ids):
+        """
+        returns the dictionary array of a unit column, units outside of
+        the family are appended to the dictionary of the batch
+        """
+        pa = self.pa
+        indices = []
+        copied = False
+        for unit_id in unit_ids:
+            if unit_id is not None and unit_id not in index:
+                if not copied:
+                    # the dictionary of the family is shared by all batches
+                    index, ids, copied = dict(index), list(ids), True
+                index[unit_id] = len(ids)
+                ids.append(unit_id)
+            indices.append(None if unit_id is None else index[unit_id])
+        return pa.DictionaryArray.from_arrays(pa.array(indices, pa.int16()),
+            pa.array(ids, pa.string()))
+
+    def to_arrays(self, rows):
+        pa = self.pa
+        columns = list(zip(*rows))
+        arrays = []
+        for name, field, values in zip(self.columns, self.schema, columns):
+            if name in self.dictionaries:
+                index, ids = self.dictionaries[name]
+                arrays.append(self.encode_units(values, index, ids))
+            else:
+                arrays.append(pa.array(values, field.type))
+        return arrays
+
+    def iter_batches(self, queryset):
+        """
+        yields a record batch for every chunk of rows, the rows are
+        fetched chunk by chunk (with a server-side cursor, if the
+        database supports it)
+        """
+        rows = queryset.values_list(*self.columns).iterator(
+            chunk_size=self.chunk_size)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                return
+            yield self.pa.RecordBatch.from_arrays(self.to_arrays(chunk),
+                schema=self.schema)
+
+    def write_parquet(self, queryset, path, **kwargs):
+        """
+        writes the queryset into a parquet file, batch by batch,
+        returns the number of written rows
+        """
+        import pyarrow.parquet
+        count = 0
+        with pyarrow.parquet.ParquetWriter(path, self.schema,
+                **kwargs) as writer:
+            for batch in self.iter_batches(queryset):
+                writer.write_batch(batch)
+                count += batch.num_rows
+        return count
+
+class ArrowImporter(UnitImporter):
+    """
+    imports record batches written by the ArrowExporter. The input and
+    unit columns are normalized as a whole (with NumPy, if installed)
+    before the instances are created in bulk.
+    """
+    def __init__(self, model, fields=None, columns=(), defaults=None,
+            chunk_size=10000):
+        self.pa = get_pyarrow()
+        unit_fields = get_unit_fields(model, fields)
+        super(ArrowImporter, self).__init__(model, dict(
+                (field.name, ('%s_input' % (field.name, ),
+                    '%s_unit' % (field.name, ))) for field in unit_fields),
+            columns=columns, defaults=defaults, chunk_size=chunk_size)
+
+    def get_units(self, batch, column):
+        """
+        returns the unit ids of a unit column, dictionary encoded or not
+        """
+        array = batch.column(batch.schema.get_field_index(column))
+        if self.pa.types.is_dictionary(array.type):
+            dictionary = array.dictionary.to_pylist()
+            return [None if index is None else dictionary[index]
+                for index in array.indices.to_pylist()]
+        return array.to_pylist()
+
+    def get_floats(self, batch, column):
+        array = batch.column(batch.schema.get_field_index(column))
+        if get_numpy() is not None and not array.null_count:
+            # zero-copy for float64 columns without nulls
+            return array.to_numpy(zero_copy_only=False)
+        return array.to_pylist()
+
+    def prepare(self, batch, line=0):
+        """
+        builds the model instances of a record batch, rows with unknown
+        units or without input are rejected
+        """
+        names = batch.schema.names
+        count = batch.num_rows
+        kwargs = [dict(self.defaults) for i in range(count)]
+        invalid = {}
+
+        for unit_field, input_column, unit_column in self.fields:
+            unit_ids = [unit_id or u'' for unit_id in
+                self.get_units(batch, unit_column)]
+            if input_column in names:
+                inputs = self.get_floats(batch, input_column)
+            else:
+                # the input was not stored, it is reconstructed
+                registry = unit_field.registry
+                values = self.get_floats(
+                    batch, '%s_value' % (unit_field.name, ))
+                inputs = [None if value is None else
+                    registry.from_base(value, unit_id)
+                    for value, unit_id in zip(values, unit_ids)]
+            values = convert_array(inputs, unit_ids, None, unit_field.units)
+
+            input_attname = unit_field.input_attname
+            unit_attname = unit_field.unit_field.attname
+            value_attname = unit_field.value_field.attname
+            for i, input, unit_id, value in zip(range(count), inputs,
+                    unit_ids, values):
+                if value is None or value != value:
+                    if not unit_id:
+                        reason = u'missing unit'
+                    elif unit_id not in unit_field.registry:
+                        reason = u'unknown unit: %s' % (unit_id, )
+                    else:
+                        reason = u'invalid input: %s' % (input, )
+                    invalid.setdefault(i, reason)
+                    continue
+                item = kwargs[i]
+                item[input_attname] = float(input)
+                item[unit_attname] = unit_id
+                item[value_attname] = float(value)
+
+        for field, column in self.columns:
+            values = batch.column(
+                batch.schema.get_field_index(column)).to_pylist()
+            for item, value in zip(kwargs, values):
+                item[field.attname] = value
+
+        objs = []
+        rejected = []
+        for i, item in enumerate(kwargs):
+            if i in invalid:
+                rejected.append(RejectedRow(line + i + 1, item, invalid[i]))
+            else:
+                objs.append(self.model(**item))
+        return objs, rejected
+
+    def run_batches(self, batches):
+        """
+        imports record batches and yields an ImportChunk for every batch
+        """
+        line = 0
+        for batch in batches:
+            objs, rejected = self.prepare(batch, line)
+            line += batch.num_rows
+            yield self.write(objs, rejected)
+
+    def run(self, path):
+        """
+        imports a parquet file written by the ArrowExporter
+        """
+        import pyarrow.parquet
+        parquet_file = pyarrow.parquet.ParquetFile(path)
+        return self.run_batches(
+            parquet_file.iter_batches(batch_size=self.chunk_size))
@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""
+a dimension vector (the exponents over the SI base units) for every unit,
+so that composite unit families are derived from base units instead of
+hand-written tables, e.g.:
+
+NEWTON = (KILOGRAM * METRE / SECOND ** 2).named(u'N', u'newton')
+UNITS_FORCE = derive_family(NEWTON, prefixes=(u'', u'k'))
+
+Units of the same dimension convert by a single precomputed factor:
+convert(1.5, u'kN', u'N') ---> 1500.0
+"""
+from collections import OrderedDict
+from unit_field.units import Unit
+import math
+import operator
+
+# the angle is kept as a dimension of its own, so that e.g. rad/s and
+# 1/s do not end up in the same family
+BASE_DIMENSIONS = (u'm', u'kg', u's', u'A', u'K', u'mol', u'cd', u'rad')
+
+PREFIXES = OrderedDict([
+    (u'p',  (1e-12, u'pico')),
+    (u'n',  (1e-9,  u'nano')),
+    (u'µ',  (1e-6,  u'micro')),
+    (u'm',  (1e-3,  u'milli')),
+    (u'c',  (1e-2,  u'centi')),
+    (u'd',  (1e-1,  u'deci')),
+    (u'',   (1.0,   u'')),
+    (u'da', (1e1,   u'deca')),
+    (u'h',  (1e2,   u'hecto')),
+    (u'k',  (1e3,   u'kilo')),
+    (u'M',  (1e6,   u'mega')),
+    (u'G',  (1e9,   u'giga')),
+])
+
+class Dimension(tuple):
+    """
+    the exponents of a unit over BASE_DIMENSIONS, e.g. the dimension of
+    the newton is Dimension(kg=1, m=1, s=-2)
+    """
+    def __new__(cls, exponents=None, **kwargs):
+        if exponents is None:
+            exponents = [kwargs.pop(name, 0) for name in BASE_DIMENSIONS]
+            if kwargs:
+                raise TypeError(u'unknown base dimension: %s' % (
+                    u', '.join(sorted(kwargs)), ))
+        return super(Dimension, cls).__new__(cls, exponents)
+
+    def __mul__(self, other):
+        return Dimension(map(operator.add, self, other))
+
+    def __truediv__(self, other):
+        return Dimension(map(operator.sub, self, other))
+
+    __div__ = __truediv__
+
+    def __pow__(self, power):
+        return Dimension(exponent * power for exponent in self)
+
+    def __repr__(self):
+        return u'Dimension(%s)' % (u', '.join(u'%s=%s' % (name, exponent)
+            for name, exponent in zip(BASE_DIMENSIONS, self) if exponent), )
+
+class DerivedUnit(object):
+    """
+    a unit with its dimension and the factor converting it into the
+    coherent SI unit of that dimension. Units are combined by *, / and **,
+    the result is named by named(), e.g.:
+
+    (KILOGRAM * METRE / SECOND ** 2).named(u'N', u'newton')
+
+    prefix_power is the power a prefix is raised to, e.g. 2 for u'm²'
+    (1 km² == 1000² m²), 0 if the unit takes no prefixes.
+    """
+    __slots__ = ('symbol', 'name', 'dimension', 'factor', 'offset',
+        'prefix_power')
+
+    def __init__(self, symbol, name, dimension, factor=1.0, offset=0.0,
+            prefix_power=1):
+        self.symbol = symbol
+        self.name = name
+        self.dimension = dimension
+        self.factor = factor
+        self.offset = offset
+        self.prefix_power = prefix_power
+
+    def __repr__(self):
+        return u'<DerivedUnit %s %r>' % (self.symbol, self.dimension)
+
+    def __mul__(self, other):
+        return DerivedUnit(u'%s·%s' % (self.symbol, other.symbol),
+            u'%s %s' % (self.name, other.name),
+            self.dimension * other.dimension, self.factor * other.factor)
+
+    def __truediv__(self, other):
+        return DerivedUnit(u'%s/%s' % (self.symbol, other.symbol),
+            u'%s per %s' % (self.name, other.name),
+            self.dimension / other.dimension, self.factor / other.factor)
+
+    __div__ = __truediv__
+
+    def __pow__(self, power):
+        return DerivedUnit(u'%s^%s' % (self.symbol, power),
+            u'%s^%s' % (self.name, power),
+            self.dimension ** power, self.factor ** power)
+
+    def named(self, symbol, name, factor=1.0, offset=0.0, prefix_power=1):
+        """
+        returns this unit under a symbol of its own, optionally scaled by
+        factor, e.g. (MINUTE ** -1).named(u'1/min', ...)
+        """
+        return register(DerivedUnit(symbol, name, self.dimension,
+            self.factor * factor, offset, prefix_power))
+
+    def prefixed(self, prefix):
+        """
+        returns the unit with an SI prefix, e.g. NEWTON.prefixed(u'k')
+        """
+        if not prefix:
+            return self
+        if not self.prefix_power:
+            raise ValueError(u'%s takes no prefixes' % (self.symbol, ))
+        scale, name = PREFIXES[prefix]
+        return DerivedUnit(prefix + self.symbol, name + self.name,
+            self.dimension, self.factor * scale ** self.prefix_power,
+            self.offset, 0)
+
+    def to_unit(self, base=None, abbrev=None, label=None):
+        """
+        returns the Unit of a family whose base unit is base (the coherent
+        SI unit if None). The translated abbreviation and label are given
+        by the family, the symbol and the name are not translated.
+        """
+        factor = self.factor
+        if base is not None:
+            factor = factor / base.factor
+        return Unit(self.symbol, abbrev or self.symbol, label or self.name,
+            factor, offset=self.offset)
+
+_units = {}
+
+def register(unit):
+    """
+    registers a unit under its symbol, returns the unit
+    """
+    _units[unit.symbol] = unit
+    return unit
+
+def base_unit(symbol, name, dimension_name, factor=1.0, prefix_power=1):
+    return register(DerivedUnit(symbol, name,
+        Dimension(**{dimension_name: 1}), factor,
+        prefix_power=prefix_power))
+
+METRE = base_unit(u'm', u'metre', u'm')
+GRAM = base_unit(u'g', u'gram', u'kg', 0.001)
+KILOGRAM = GRAM.prefixed(u'k')
+SECOND = base_unit(u's', u'second', u's')
+AMPERE = base_unit(u'A', u'ampere', u'A')
+KELVIN = base_unit(u'K', u'kelvin', u'K')
+MOLE = base_unit(u'mol', u'mole', u'mol')
+CANDELA = base_unit(u'cd', u'candela', u'cd')
+RADIAN = base_unit(u'rad', u'radian', u'rad', prefix_power=0)
+
+MINUTE = SECOND.named(u'min', u'minute', 60.0, prefix_power=0)
+HOUR = SECOND.named(u'h', u'hour', 3600.0, prefix_power=0)
+DEGREE = RADIAN.named(u'deg', u'degree', math.pi / 180.0, prefix_power=0)
+SQUARE_METRE = (METRE ** 2).named(u'm²', u'square metre', prefix_power=2)
+CUBIC_METRE = (METRE ** 3).named(u'm³', u'cubic metre', prefix_power=3)
+LITRE = CUBIC_METRE.named(u'l', u'litre', 0.001)
+CELSIUS = KELVIN.named(u'°C', u'degree', offset=273.15, prefix_power=0)
+
+NEWTON = (KILOGRAM * METRE / SECOND ** 2).named(u'N', u'newton')
+JOULE = (NEWTON * METRE).named(u'J', u'joule')
+WATT = (JOULE / SECOND).named(u'W', u'watt')
+WATT_HOUR = (WATT * HOUR).named(u'Wh', u'watt hour')
+PASCAL = (NEWTON / SQUARE_METRE).named(u'Pa', u'pascal')
+BAR = PASCAL.named(u'bar', u'bar', 100000.0, prefix_power=0)
+VOLT = (WATT / AMPERE).named(u'V', u'volt')
+OHM = (VOLT / AMPERE).named(u'Ω', u'ohm')
+HERTZ = (SECOND ** -1).named(u'Hz', u'hertz')
+NEWTON_METRE = (NEWTON * METRE).named(u'Nm', u'newton metre', prefix_power=0)
+HEAT_CONDUCTANCE = (WATT / (METRE * KELVIN)).named(u'W/(mK)', u'W/(mK)',
+    prefix_power=0)
+
+_lookups = {}
+
+def get_unit(symbol):
+    """
+    returns the DerivedUnit of a symbol, prefixed symbols are resolved
+    on first use and cached, e.g. get_unit(u'kN')
+    """
+    try:
+        return _lookups[symbol]
+    except KeyError:
+        pass
+    unit = _units.get(symbol)
+    if unit is None:
+        for prefix in PREFIXES:
+            if prefix and symbol.startswith(prefix):
+                base = _units.get(symbol[len(prefix):])
+                if base is not None and base.prefix_power:
+                    unit = base.prefixed(prefix)
+                    break
+    if unit is None:
+        raise ValueError(u'unknown unit: %s' % (symbol, ))
+    return _lookups.setdefault(symbol, unit)
+
+_conversions = {}
+
+def get_conversion(symbol_in, symbol_out):
+    """
+    returns (scale, offset) converting from one unit into another unit of
+    the same dimension, precomputed on first use
+    """
+    key = (symbol_in, symbol_out)
+    try:
+        return _conversions[key]
+    except KeyError:
+        pass
+    unit_in = get_unit(symbol_in)
+    unit_out = get_unit(symbol_out)
+    if unit_in.dimension != unit_out.dimension:
+        raise ValueError(u'cannot convert %s into %s' % (
+            symbol_in, symbol_out))
+    scale = unit_in.factor / unit_out.factor
+    offset = (unit_in.offset - unit_out.offset) / unit_out.factor
+    return _conversions.setdefault(key, (scale, offset))
+
+def convert(value, symbol_in, symbol_out):
+    """
+    converts a value between two units of the same dimension, e.g.:
+    convert(1.5, u'kN', u'N') ---> 1500.0
+    """
+    scale, offset = get_conversion(symbol_in, symbol_out)
+    return value * scale + offset
+
+def derive_family(unit, prefixes=(u'', ), extra=(), labels=None):
+    """
+    returns the list of Units of a family: unit with every prefix (the
+    unprefixed unit is the base unit of the family), followed by extra
+    units of the same dimension. labels maps the symbols to the translated
+    (abbreviation, label) of the units, e.g.:
+
+    derive_family(NEWTON, prefixes=(u'', u'k'), labels={
+        u'N': (_(u'N'), _(u'Newton')),
+        u'kN': (_(u'kN'), _(u'Kilonewton')),
+    })
+    """
+    labels = labels or {}
+    units = []
+    for derived in [unit.prefixed(prefix) for prefix in prefixes] + \
+            list(extra):
+        if derived.dimension != unit.dimension:
+            raise ValueError(u'%s is no unit of %r' % (
+                derived.symbol, unit.dimension))
+        units.append(derived.to_unit(unit,
+            *labels.get(derived.symbol, (None, None))))
+    return units
+
+_superscripts = {u'²': 2, u'³': 3, u'⁴': 4, u'⁵': 5}
+
+def _parse_factor(token):
+    try:
+        return get_unit(token)
+    except ValueError:
+        pass
+    power = None
+    if token[-1:] in _superscripts:
+        token, power = token[:-1], _superscripts[token[-1]]
+    elif u'^' in token:
+        token, power = token.split(u'^', 1)
+        try:
+            power = int(power)
+        except ValueError:
+            raise ValueError(u'unknown unit: %s^%s' % (token, power))
+    if power is None or not token:
+        raise ValueError(u'unknown unit: %s' % (token, ))
+    return get_unit(token) ** power
+
+def parse_unit(expression):
+    """
+    returns the DerivedUnit of a composite unit expression, factors are
+    separated by ·, ⋅ or *, everything after / is divided, e.g.:
+    parse_unit(u'kN·m'), parse_unit(u'W/m²·K')
+    """
+    expression = expression.replace(u'μ', u'µ').replace(u' ', u'')
+    numerator, _slash, denominator = expression.partition(u'/')
+    unit = None
+    for part, divide in ((numerator, False), (denominator, True)):
+        for token in part.replace(u'⋅', u'·').replace(u'*', u'·').split(u'·'):
+            if not token or (token == u'1' and not divide):
+                continue
+            factor = _parse_factor(token.strip(u'()'))
+            if unit is None:
+                unit = factor ** -1 if divide else factor
+            else:
+                unit = unit / factor if divide else unit * factor
+    if unit is None:
+        raise ValueError(u'unknown unit: %s' % (expression, ))
+    return unit
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+encodes UnitFields straight from values_list() tuples, without model
+instances, e.g. for large list endpoints:
+
+encoder = UnitEncoder(Engine, ['cubic_capacity'], units={
+    'cubic_capacity': u'l'}, extra=['id', 'name'])
+rows = encoder.encode_queryset(Engine.objects.all())
+    ---> [{'id': 1, 'name': u'...', 'cubic_capacity': {
+            'input': 1400.0, 'unit': u'cm³', 'value': 1.4}}, ...]
+
+The value is normalized to the base unit, or converted into the unit
+requested for the field.
+"""
+from unit_field.units import get_numpy
+
+__all__ = ('UnitEncoder', )
+
+class UnitEncoder(object):
+    def __init__(self, model, fields, units=None, extra=()):
+        self.model = model
+        self.extra = list(extra)
+        units = units or {}
+
+        # the columns selected by values_list(), the extra columns first
+        self.columns = list(self.extra)
+        self.fields = []
+        for name in fields:
+            unit_field = model._meta.get_field(name)
+            registry = unit_field.registry
+            input_index = None
+            if unit_field.input_field is not None:
+                input_index = len(self.columns)
+                self.columns.append(unit_field.input_field.attname)
+            unit_index = len(self.columns)
+            self.columns.append(unit_field.unit_field.attname)
+            value_index = len(self.columns)
+            self.columns.append(unit_field.value_field.attname)
+
+            # base unit -> requested unit, resolved once per encoder
+            unit_id = units.get(name)
+            affine = None
+            if unit_id is not None:
+                unit = registry.get(unit_id)
+                if unit is None:
+                    raise ValueError(u'unknown unit: %s' % (unit_id, ))
+                if unit.inverse is None:
+                    raise ValueError(u'cannot convert into %s' % (unit_id, ))
+                affine = unit.inverse
+            self.fields.append((name, registry, input_index, unit_index,
+                value_index, affine))
+
+    def encode_queryset(self, queryset, columnar=False):
+        rows = queryset.values_list(*self.columns)
+        if columnar:
+            return self.encode_columns(rows)
+        return self.encode_rows(rows)
+
+    def encode_rows(self, rows):
+        """
+        returns a dict for every row
+        """
+        extra = list(enumerate(self.extra))
+        fields = self.fields
+        result = []
+        append = result.append
+        for row in rows:
+            item = dict((name, row[index]) for index, name in extra)
+            for name, registry, input_index, unit_index, value_index, \
+                    affine in fields:
+                unit_id = row[unit_index]
+                value = row[value_index]
+                if input_index is None:
+                    input = None if value is None else \
+                        registry.from_base(value, unit_id)
+                else:
+                    input = row[input_index]
+                if affine is not None and value is not None:
+                    value = value * affine[0] + affine[1]
+                item[name] = {'input': input, 'unit': unit_id, 'value': value}
+            append(item)
+        return result
+
+    def encode_columns(self, rows):
+        """
+        returns a list for every column instead of a dict for every row,
+        e.g. {'id': [1, 2], 'cubic_capacity': {'input': [...], ...}}
+        """
+        columns = list(zip(*rows)) or [()] * len(self.columns)
+        result = dict((name, list(columns[index]))
+            for index, name in enumerate(self.extra))
+        numpy = get_numpy()
+        for name, registry, input_index, unit_index, value_index, \
+                affine in self.fields:
+            unit_ids = list(columns[unit_index])
+            values = columns[value_index]
+            if input_index is None:
+                inputs = [None if value is None else
+                    registry.from_base(value, unit_id)
+                    for value, unit_id in zip(values, unit_ids)]
+            else:
+                inputs = list(columns[input_index])
+            if affine is None:
+                values = list(values)
+            elif numpy is not None and None not in values:
+                values = (numpy.asarray(values, dtype=float) * affine[0] +
+                    affine[1]).tolist()
+            else:
+                scale, offset = affine
+                values = [None if value is None else value * scale + offset
+                    for value in values]
+            result[name] = {'input': inputs, 'unit': unit_ids,
+                'value': values}
+        return result
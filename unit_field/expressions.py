@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+from django.db.models import (Avg, Case, Count, Expression, F, FloatField,
+    Max, Min, Sum, Value, When)
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.functions import Coalesce
+
+def get_unit_field(model, field_name):
+    """
+    returns the UnitField of a model, field_name may span relations,
+    e.g. "engine__cubic_capacity"
+    """
+    parts = field_name.split(LOOKUP_SEP)
+    for part in parts[:-1]:
+        model = model._meta.get_field(part).related_model
+    return model._meta.get_field(parts[-1])
+
+def from_base(expression, registry, unit_id):
+    """
+    returns an expression converting a base unit expression into unit_id
+    """
+    try:
+        scale, offset = registry.affine[unit_id]
+    except KeyError:
+        raise ValueError(u'cannot convert into %s' % (unit_id, ))
+    if offset:
+        expression = expression - Value(offset, output_field=FloatField())
+    if scale != 1.0:
+        expression = expression / Value(scale, output_field=FloatField())
+    return expression
+
+def normalize_expression(field_name, registry, unit_codes=None):
+    """
+    returns an expression computing the "_value" column of a UnitField
+    from its input and unit in the database, e.g.:
+
+    x_input * CASE x_unit WHEN 'mm' THEN 0.001 WHEN 'cm' THEN 0.01 ... END
+
+    The offsets of affine units (e.g. °F) are added by a second CASE. Units
+    which are not affine are not covered, their rows result in NULL.
+    unit_codes maps the unit ids to the stored codes of the compact mode,
+    if the unit column is a plain integer column (e.g. in migrations).
+    """
+    unit_name = '%s_unit' % (field_name, )
+
+    def when(unit_id, value):
+        stored = unit_id if unit_codes is None else unit_codes[unit_id]
+        return When(then=Value(value, output_field=FloatField()),
+            **{unit_name: stored})
+
+    affine = [(unit_id, registry.affine[unit_id]) for unit_id in registry.ids
+        if unit_id in registry.affine]
+    expression = F('%s_input' % (field_name, )) * Case(
+        *[when(unit_id, scale) for unit_id, (scale, offset) in affine],
+        output_field=FloatField())
+    offsets = [when(unit_id, offset)
+        for unit_id, (scale, offset) in affine if offset]
+    if offsets:
+        expression = expression + Case(*offsets,
+            default=Value(0.0, output_field=FloatField()),
+            output_field=FloatField())
+    # a missing input is normalized to 0.0, just like in pre_save
+    return Coalesce(expression, Value(0.0, output_field=FloatField()))
+
+class ConvertTo(Expression):
+    """
+    converts the stored (normalized) value of a UnitField into the given
+    unit in the database, e.g.:
+
+    Engine.objects.annotate(
+        capacity_l=ConvertTo('cubic_capacity', u'l')).order_by('capacity_l')
+
+    Rows already stored in the requested unit return their input unchanged.
+    """
+    def __init__(self, field_name, unit_id):
+        super(ConvertTo, self).__init__(output_field=FloatField())
+        self.field_name = field_name
+        self.unit_id = unit_id
+
+    def __repr__(self):
+        return '%s(%r, %r)' % (
+            self.__class__.__name__, self.field_name, self.unit_id)
+
+    def get_expression(self, model):
+        unit_field = get_unit_field(model, self.field_name)
+        registry = unit_field.registry
+        if registry is None or self.unit_id not in registry:
+            raise ValueError(u'unknown unit: %s' % (self.unit_id, ))
+
+        converted = from_base(
+            F('%s_value' % (self.field_name, )), registry, self.unit_id)
+        if unit_field.input_field is None:
+            return converted
+        return Case(
+            When(then=F('%s_input' % (self.field_name, )),
+                **{'%s_unit' % (self.field_name, ): self.unit_id}),
+            default=converted,
+            output_field=FloatField())
+
+    def resolve_expression(self, query=None, allow_joins=True, reuse=None,
+            summarize=False, for_save=False):
+        return self.get_expression(query.model).resolve_expression(
+            query, allow_joins, reuse, summarize, for_save)
+
+class UnitAggregate(Expression):
+    """
+    aggregates the stored (normalized) values of a UnitField in the database
+    and converts the result into the given unit, e.g.:
+
+    Engine.objects.aggregate(UnitSum('cubic_capacity', unit=u'l'))
+    Engine.objects.values('manufacturer').annotate(
+        capacity=UnitAvg('cubic_capacity', unit=u'l'))
+
+    Without a unit the result is returned in the base unit. Further keyword
+    arguments (filter, distinct) are passed on to the aggregate.
+    """
+    aggregate = None
+    contains_aggregate = True
+
+    def __init__(self, field_name, unit=None, **extra):
+        super(UnitAggregate, self).__init__(output_field=FloatField())
+        self.field_name = field_name
+        self.unit_id = unit
+        self.extra = extra
+
+    def __repr__(self):
+        return '%s(%r, unit=%r)' % (
+            self.__class__.__name__, self.field_name, self.unit_id)
+
+    @property
+    def default_alias(self):
+        return '%s__%s' % (self.field_name, self.aggregate.name.lower())
+
+    def convert(self, aggregated, registry):
+        return from_base(aggregated, registry, self.unit_id)
+
+    def get_expression(self, model):
+        unit_field = get_unit_field(model, self.field_name)
+        aggregated = self.aggregate(
+            '%s_value' % (self.field_name, ), **self.extra)
+        if self.unit_id is None:
+            return aggregated
+        registry = unit_field.registry
+        if registry is None or self.unit_id not in registry:
+            raise ValueError(u'unknown unit: %s' % (self.unit_id, ))
+        return self.convert(aggregated, registry)
+
+    def resolve_expression(self, query=None, allow_joins=True, reuse=None,
+            summarize=False, for_save=False):
+        return self.get_expression(query.model).resolve_expression(
+            query, allow_joins, reuse, summarize, for_save)
+
+class UnitSum(UnitAggregate):
+    aggregate = Sum
+
+    def convert(self, aggregated, registry):
+        # the offset of an affine unit applies once per row:
+        # sum((v - offset) / scale) == (sum(v) - offset * count) / scale
+        try:
+            scale, offset = registry.affine[self.unit_id]
+        except KeyError:
+            raise ValueError(u'cannot convert into %s' % (self.unit_id, ))
+        if offset:
+            aggregated = aggregated - Value(offset, output_field=FloatField()) \
+                * Count('%s_value' % (self.field_name, ),
+                    output_field=FloatField(), **self.extra)
+        if scale != 1.0:
+            aggregated = aggregated / Value(scale, output_field=FloatField())
+        return aggregated
+
+class UnitAvg(UnitAggregate):
+    aggregate = Avg
+
+class UnitMin(UnitAggregate):
+    aggregate = Min
+
+class UnitMax(UnitAggregate):
+    aggregate = Max
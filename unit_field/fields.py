@@ -1,60 +1,16 @@
 # -*- coding: utf-8 -*-
 from unit_field.utils import sanitize_separators
-from django.db.models import FloatField, CharField as ModelCharField
+from django.db.models import (BLANK_CHOICE_DASH, FloatField, Index,
+    IntegerField, Q, SmallIntegerField, CharField as ModelCharField)
 from django.forms import CharField
-from unit_field.units import (Unit, UnitValueCreator,
-    UNITS_PERCENTAGE,
-    UNITS_LENGTH,
-    UNITS_SQUARE_MEASURE,
-    UNITS_SOLID_MEASURE,
-    UNITS_MASS,
-    UNITS_TIME,
-    UNITS_TIME2,
-    UNITS_ELECTRIC_CURRENT,
-    UNITS_TEMPERATURE,
-    UNITS_AMOUNT_OF_SUBSTANCE,
-    UNITS_LUMINOUS_INTENSITY,
-
-    UNITS_ACCELERATION,
-    UNITS_ANGLE,
-    UNITS_CRACKLE,
-    UNITS_CURRENT,
-    UNITS_DENSITY,
-    UNITS_FORCE,
-    UNITS_INERTIA_TORQUE,
-    UNITS_JERK,
-    UNITS_POTENTIAL,
-    UNITS_SNAP,
-    UNITS_SPEED,
-    UNITS_TORSION,
-    UNITS_TORQUE,
-    UNITS_VELOCITY,
-
-    UNITS_POWER,
-    UNITS_THERMAL_RESISTANCE,
-    UNITS_HEAT_TRANSFER_RESISTANCE,
-    UNITS_HEAT_CONDUCTANCE,
-    UNITS_HEAT_CAPACITY,
-    UNITS_SPECIFIC_HEAT_CAPACITY,
-    UNITS_MOTOR_CONSTANT,
-    UNITS_FORCE_CONSTANT,
-    UNITS_ELECTRICAL_TIME_CONSTANT,
-    UNITS_POTENTIAL_CONSTANT,
-    UNITS_ELECTRICAL_RESISTANCE,
-    UNITS_INDUCTANCE,
-
-    UNITS_ANGLE_VELOCITY,
-    UNITS_ANGLE_ACCELERATION,
-    UNITS_ANGLE_JERK,
-    UNITS_ANGLE_SNAP,
-    UNITS_ANGLE_CRACKLE,
-
-    UNITS_VISCOSITY,
-    UNITS_FLOW_RATE,
-)
-
-
-from unit_field import forms
+from django.utils import six
+from django.utils.encoding import force_bytes
+from django.utils.functional import cached_property
+from unit_field.units import (Unit, UnitValue, UnitValueCreator, LazyUnits,
+    get_registry)
+
+
+from unit_field import forms, lookups
 
 try:
     from hashlib import md5
@@ -62,7 +18,7 @@ except ImportError:
     from md5 import new as md5
 
 def md5_hexdigest(value):
-    return md5(value).hexdigest()
+    return md5(force_bytes(value)).hexdigest()
 
 def get_factor(units, unit_id):
     """
@@ -71,11 +27,7 @@ def get_factor(units, unit_id):
     if not units:
         return None
 
-    for unit in units:
-        if unit.id == unit_id:
-            if unit.to_base_function:
-                return unit.to_base_function
-            return unit.factor
+    return get_registry(units).get_factor(unit_id)
 
 class UnitInputField(FloatField):
 
@@ -122,7 +74,9 @@ class CalculatedFloatField(FloatField):
         returns the unit factor of the desired unit, e.g.:
         get_unit_by_id(u'dm²') ---> 0.01
         """
-        return get_factor(self.units, unit_id)
+        if self.registry is None:
+            return None
+        return self.registry.get_factor(unit_id)
 
     def __init__(self, *args, **kwargs):
         kwargs['editable'] = False
@@ -130,32 +84,202 @@ class CalculatedFloatField(FloatField):
         super(CalculatedFloatField, self).__init__(*args, **kwargs)
         self.default = 0.0
 
+    @property
+    def registry(self):
+        if not self.units:
+            return None
+        return get_registry(self.units)
+
+    def contribute_to_class(self, cls, name, **kwargs):
+        super(CalculatedFloatField, self).contribute_to_class(
+            cls, name, **kwargs)
+        # resolve the sibling columns once instead of on every save
+        self.input_attname = self.attname.replace('_value', '_input')
+        self.unit_attname = self.attname.replace('_value', '_unit')
+        self.normalized_name = '_%s_normalized' % (self.attname, )
+
     def pre_save(self, model_instance, add):
-        input_field_name = self.attname.replace('_value', '_input')
-        unit_field_name = self.attname.replace('_value', '_unit')
+        a = getattr(model_instance, self.input_attname)
+        unit_id = getattr(model_instance, self.unit_attname)
+
+        # already normalized by normalize_many, e.g. before bulk_create,
+        # unless the input or the unit changed since
+        normalized = model_instance.__dict__.pop(self.normalized_name, None)
+        if normalized is not None and normalized[0] is a and \
+                normalized[1] is unit_id:
+            return getattr(model_instance, self.attname)
 
-        a = getattr(model_instance, input_field_name)
         # IMPORTANT!!! NEVER USER sanitize_separators here!!!
         # b = sanitize_separators(a)
         b = a
         try:
             input_value = float(b)
-        except ValueError:
+        except (TypeError, ValueError):
             input_value = None
-        unit_id = getattr(model_instance, unit_field_name)
 
-        unit_value = self.get_unit_by_id(unit_id)
+        value = None
+        registry = self.registry
+        if (not input_value is None) and (not registry is None):
+            value = registry.to_base(input_value, unit_id)
 
-        if (not input_value is None) and (not unit_value is None):
-            if hasattr(unit_value, '__call__'):
-                # conversion by function
-                setattr(model_instance, self.attname, unit_value(input_value))
-            else:
-                # conversion by factor
-                setattr(model_instance, self.attname, input_value * unit_value)
+        if value is None:
+            value = 0.0
+        setattr(model_instance, self.attname, value)
+        return value
+
+    def normalize_many(self, objs):
+        """
+        the bulk counterpart of pre_save: computes and sets the normalized
+        value of many model instances in one pass, grouped by unit
+        """
+        inputs = [getattr(obj, self.input_attname) for obj in objs]
+        input_values = []
+        for input in inputs:
+            try:
+                input_values.append(float(input))
+            except (TypeError, ValueError):
+                input_values.append(None)
+        unit_ids = [getattr(obj, self.unit_attname) for obj in objs]
+
+        registry = self.registry
+        if registry is None:
+            values = [None] * len(objs)
         else:
-            setattr(model_instance, self.attname, 0.0)
-        return getattr(model_instance, self.attname)
+            values = registry.to_base_many(input_values, unit_ids)
+
+        attname = self.attname
+        normalized_name = self.normalized_name
+        for obj, input, unit_id, value in zip(objs, inputs, unit_ids, values):
+            setattr(obj, attname, 0.0 if value is None else value)
+            obj.__dict__[normalized_name] = (input, unit_id)
+
+class UnitChoiceMixin(object):
+    """
+    the unit column of a UnitField, rendered as a select whose options know
+    the factors of their units
+    """
+    def get_factors(self):
+        """
+        returns the factors of all units relative to the base unit
+        """
+        if not self.units:
+            return {}
+        registry = get_registry(self.units)
+        unit_id = registry.base_unit_id or registry.ids[0]
+        return registry.factors_to(unit_id)
+
+    def get_choices(self, include_blank=True, blank_choice=BLANK_CHOICE_DASH,
+            *args, **kwargs):
+        # the choices generated from the unit family are translated once
+        # per language
+        if not self.units or len(self.choices or ()) != len(self.units):
+            return super(UnitChoiceMixin, self).get_choices(
+                include_blank, blank_choice, *args, **kwargs)
+        choices = list(forms.get_unit_choices(self.units))
+        if include_blank:
+            choices = list(blank_choice) + choices
+        return choices
+
+    def formfield(self, **kwargs):
+        defaults = {'widget': forms.UnitSelect(factors=self.get_factors(),
+            units=self.units or None)}
+        defaults.update(kwargs)
+        return super(UnitChoiceMixin, self).formfield(**defaults)
+
+class UnitChoiceField(UnitChoiceMixin, ModelCharField):
+    def __init__(self, *args, **kwargs):
+        self.units = kwargs.pop('units', None)
+        super(UnitChoiceField, self).__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        # a plain CharField for migrations
+        name, path, args, kwargs = super(UnitChoiceField, self).deconstruct()
+        return name, 'django.db.models.CharField', args, kwargs
+
+class UnitCodeField(UnitChoiceMixin, SmallIntegerField):
+    """
+    the unit column of a UnitField in the compact storage mode: the unit
+    is stored as a small integer code, but read and written as unit id,
+    e.g. Engine.objects.filter(cubic_capacity_unit=u'l')
+    """
+    def __init__(self, *args, **kwargs):
+        self.units = kwargs.pop('units', None)
+        unit_codes = kwargs.pop('unit_codes', None)
+        super(UnitCodeField, self).__init__(*args, **kwargs)
+        if unit_codes is None and self.units:
+            unit_codes = get_registry(self.units).codes
+        self.unit_codes = unit_codes or {}
+        self.unit_ids = dict((code, unit_id)
+            for unit_id, code in self.unit_codes.items())
+
+    def deconstruct(self):
+        # a plain SmallIntegerField holding the codes for migrations
+        name, path, args, kwargs = super(UnitCodeField, self).deconstruct()
+        kwargs.pop('choices', None)
+        # a clone is created from this already translated default
+        if isinstance(kwargs.get('default'), six.string_types):
+            kwargs['default'] = self.unit_codes[kwargs['default']]
+        return name, 'django.db.models.SmallIntegerField', args, kwargs
+
+    @cached_property
+    def validators(self):
+        # the range validators of integer fields do not apply to unit ids
+        return super(IntegerField, self).validators
+
+    def from_db_value(self, value, *args):
+        if value is None:
+            return value
+        return self.unit_ids.get(value, value)
+
+    def to_python(self, value):
+        if isinstance(value, six.integer_types):
+            return self.unit_ids.get(value, value)
+        return value
+
+    def get_prep_value(self, value):
+        if isinstance(value, six.string_types):
+            try:
+                return self.unit_codes[value]
+            except KeyError:
+                raise ValueError(u'unknown unit: %s' % (value, ))
+        return super(UnitCodeField, self).get_prep_value(value)
+
+class ReconstructedInput(property):
+    """
+    the <name>_input attribute of a UnitField without an input column:
+    unless it was assigned, the input is reconstructed from the normalized
+    value and the unit
+    """
+    def __init__(self, field):
+        self.field = field
+        self.input_name = '_%s_input' % (field.name, )
+        self.cache_name = '_%s_input_cache' % (field.name, )
+        self.value_attname = '%s_value' % (field.name, )
+        self.unit_attname = '%s_unit' % (field.name, )
+        super(ReconstructedInput, self).__init__(self.get, self.set)
+
+    def get(self, instance):
+        __dict__ = instance.__dict__
+        try:
+            return __dict__[self.input_name]
+        except KeyError:
+            pass
+
+        value = getattr(instance, self.value_attname)
+        unit_id = getattr(instance, self.unit_attname)
+        cached = __dict__.get(self.cache_name)
+        if cached is not None and cached[0] is value and \
+                cached[1] is unit_id:
+            return cached[2]
+
+        input = None
+        if value is not None and self.field.registry is not None:
+            input = self.field.registry.from_base(value, unit_id)
+        __dict__[self.cache_name] = (value, unit_id, input)
+        return input
+
+    def set(self, instance, value):
+        instance.__dict__[self.input_name] = value
 
 class UnitField(FloatField):
     """
@@ -196,9 +320,7 @@ class UnitField(FloatField):
         returns the unit with factor == 1.0
         """
         if self.units:
-            for unit in self.units:
-                if unit.factor == 1.0:
-                    return unit
+            return get_registry(self.units).base_unit
         return None
 
     def get_base_unit_id(self):
@@ -232,185 +354,325 @@ class UnitField(FloatField):
 
         self.default_unit = kwargs.pop('default_unit',
             self.get_base_unit_id())
-        self.update_choices()
-        super(UnitField, self).__init__(*args, **kwargs)
 
-    def contribute_to_class(self, cls, name):
-        self.name = name
+        # compact storage mode: the unit is stored as small integer code,
+        # the input can be reconstructed from the normalized value
+        self.compact = kwargs.pop('compact', False)
+        self.unit_codes = kwargs.pop('unit_codes', None)
+        self.store_input = kwargs.pop('store_input', True)
+
+        # additional indexes spanning the generated columns
+        self.unit_index = kwargs.pop('unit_index', False)
+        self.index_with = kwargs.pop('index_with', ())
+        self.covering = kwargs.pop('covering', False)
+        self.partial_indexes = kwargs.pop('partial_indexes', ())
+        super(UnitField, self).__init__(*args, **kwargs)
+        # after Field.__init__, which resets the choices
+        self.choices = None
+        self.update_choices()
 
-        self.input_field = UnitInputField(
-            default=self.default,
-            blank=self.blank,
-            null=self.null,
-            auto_convert=self.auto_convert,
-            validators=self.validators,
-            help_text=self.help_text,
-            verbose_name=self.verbose_name)
-        cls.add_to_class("%s_input" % (self.name,), self.input_field)
+    @property
+    def registry(self):
+        if not self.units:
+            return None
+        return get_registry(self.units)
+
+    def contribute_to_class(self, cls, name, **kwargs):
+        verbose_name = self.verbose_name
+
+        # the UnitField itself is a virtual field without a column of its
+        # own, so that it can be used in lookups, e.g.
+        # Engine.objects.filter(cubic_capacity__gte=UnitValue(1.2, u'l'))
+        self.set_attributes_from_name(name)
+        self.model = cls
+        cls._meta.add_field(self, private=True)
+
+        # the columns were already inherited from an abstract model or,
+        # with multi-table inheritance, belong to the table of the parent
+        mti_inherited = getattr(self, 'mti_inherited', False)
+        fields = cls._meta.fields if mti_inherited else \
+            cls._meta.local_fields
+        inherited = dict((field.name, field) for field in fields)
+
+        self.input_attname = "%s_input" % (self.name,)
+        self.input_field = inherited.get("%s_input" % (self.name,))
+        if not self.store_input:
+            setattr(cls, self.input_attname, ReconstructedInput(self))
+        elif self.input_field is None:
+            self.input_field = UnitInputField(
+                default=self.default,
+                blank=self.blank,
+                null=self.null,
+                auto_convert=self.auto_convert,
+                validators=self.validators,
+                help_text=self.help_text,
+                verbose_name=verbose_name)
+            cls.add_to_class("%s_input" % (self.name,), self.input_field)
 
         # self.unit_field = CharField(default=self.default_unit, choices=self.choices)
-        self.unit_field = ModelCharField(max_length=10,
-            default=self.default_unit,
-            choices=self.choices)
-        cls.add_to_class("%s_unit" % (self.name,), self.unit_field)
-
-        self.value_field = CalculatedFloatField(default=0.0,
-	    db_index=self.db_index,
-            units=self.units,
-            blank=self.blank,
-            null=self.null)
-        cls.add_to_class("%s_value" % (self.name,), self.value_field)
+        self.unit_field = inherited.get("%s_unit" % (self.name,))
+        if self.unit_field is None:
+            if self.compact:
+                self.unit_field = UnitCodeField(
+                    default=self.default_unit,
+                    choices=self.choices,
+                    units=self.units,
+                    unit_codes=self.unit_codes)
+            else:
+                self.unit_field = UnitChoiceField(max_length=10,
+                    default=self.default_unit,
+                    choices=self.choices,
+                    units=self.units)
+            cls.add_to_class("%s_unit" % (self.name,), self.unit_field)
+
+        self.value_field = inherited.get("%s_value" % (self.name,))
+        if self.value_field is None:
+            self.value_field = CalculatedFloatField(default=0.0,
+                db_index=self.db_index,
+                units=self.units,
+                blank=self.blank,
+                null=self.null)
+            cls.add_to_class("%s_value" % (self.name,), self.value_field)
+
+        if mti_inherited:
+            # lookups join the table of the parent holding the columns
+            self.model = self.value_field.model
 
         self.key = md5_hexdigest(self.name)
 
+        indexes = [] if mti_inherited else self.get_indexes(cls)
+        if indexes:
+            # never append to the list of Meta, it may be shared
+            cls._meta.indexes = list(cls._meta.indexes) + indexes
+            # migrations only pick up indexes declared in Meta
+            cls._meta.original_attrs['indexes'] = cls._meta.indexes
+
         field = UnitValueCreator(self)
 
         setattr(cls, name, field)
 
+    def get_indexes(self, cls):
+        """
+        returns the indexes declared by the options of the field:
+
+        unit_index=True: an index on (<name>_unit, <name>_value)
+        index_with=[('tenant', ), ...]: an index on the given fields
+            followed by <name>_value, for each tuple of fields
+        covering=True: adds <name>_unit and <name>_input to these indexes,
+            so range queries can be served by the index only
+        partial_indexes=[u'mm', ...] (or True for all units): one index on
+            <name>_value per unit, restricted to the rows of that unit
+        """
+        value_name = self.value_field.name
+        unit_name = self.unit_field.name
+        covered = [unit_name]
+        if self.input_field is not None:
+            covered.append(self.input_field.name)
+
+        indexes = []
+        fields_list = [tuple(fields) for fields in self.index_with]
+        if self.unit_index:
+            fields_list.insert(0, (unit_name, ))
+        for fields in fields_list:
+            fields = list(fields) + [value_name]
+            if self.covering:
+                fields += [name for name in covered if name not in fields]
+            indexes.append(Index(fields=fields))
+
+        partial_indexes = self.partial_indexes
+        if partial_indexes is True:
+            partial_indexes = self.registry.ids if self.registry else ()
+        for unit_id in partial_indexes:
+            name = '%s_%s' % (self.name[:15], md5_hexdigest(u'%s.%s.%s' % (
+                cls._meta.db_table, self.name, unit_id))[:14])
+            # the historical models of migrations store the code as is
+            unit_value = unit_id
+            if isinstance(self.unit_field, UnitCodeField):
+                unit_value = self.unit_field.unit_codes[unit_id]
+            indexes.append(Index(fields=[value_name], name=name,
+                condition=Q(**{unit_name: unit_value})))
+        return indexes
+
+    def get_attname_column(self):
+        return self.get_attname(), None
+
+    def get_col(self, alias, output_field=None):
+        """
+        lookups on the UnitField are executed on the indexed "_value" column
+        """
+        return self.value_field.get_col(alias, output_field or self)
+
+    def get_normalized_value(self, value):
+        """
+        returns a value with a unit (UnitValue) in the base unit,
+        plain numbers are expected to be given in the base unit already
+        """
+        if not isinstance(value, UnitValue):
+            return value
+        if not isinstance(value.unit, six.string_types):
+            return value.value
+
+        normalized_value = None
+        if self.registry is not None:
+            normalized_value = self.registry.to_base(value.input, value.unit)
+        if normalized_value is None:
+            raise ValueError(u'unknown unit: %s' % (value.unit, ))
+        return normalized_value
+
+    def clean(self, value, model_instance):
+        # the input and unit columns are validated instead
+        return value
+
     def get_db_prep_save(self, value):
         pass
 
-    def get_db_prep_lookup(self, lookup_type, value):
-        raise NotImplementedError(self.get_db_prep_lookup)
-
     def formfield(self, **kwargs):
         defaults = {'form_class': forms.UnitField}
         defaults.update(kwargs)
         return super(UnitField, self).formfield(**defaults)
 
+for lookup in lookups.UNIT_LOOKUPS:
+    UnitField.register_lookup(lookup)
+
 # Fields for Base Units
 
 class LengthField(UnitField):
-    units = UNITS_LENGTH
+    units = LazyUnits('UNITS_LENGTH')
 
 class SquareMeasureField(UnitField):
-    units = UNITS_SQUARE_MEASURE
+    units = LazyUnits('UNITS_SQUARE_MEASURE')
 
 class SolidMeasureField(UnitField):
-    units = UNITS_SOLID_MEASURE
+    units = LazyUnits('UNITS_SOLID_MEASURE')
 
 class MassField(UnitField):
-    units = UNITS_MASS
+    units = LazyUnits('UNITS_MASS')
 
 class TimeField(UnitField):
-    units = UNITS_TIME
+    units = LazyUnits('UNITS_TIME')
 
 class Time2Field(UnitField):
-    units = UNITS_TIME2
+    units = LazyUnits('UNITS_TIME2')
 
 class TemperatureField(UnitField):
-    units = UNITS_TEMPERATURE
+    units = LazyUnits('UNITS_TEMPERATURE')
 
 class AmountOfSubstanceField(UnitField):
-    units = UNITS_AMOUNT_OF_SUBSTANCE
+    units = LazyUnits('UNITS_AMOUNT_OF_SUBSTANCE')
 
 class LuminousIntensityField(UnitField):
-    units = UNITS_LUMINOUS_INTENSITY
+    units = LazyUnits('UNITS_LUMINOUS_INTENSITY')
 
 # Fields for Derived Units
 
 class AccelerationField(UnitField):
-    units = UNITS_ACCELERATION
+    units = LazyUnits('UNITS_ACCELERATION')
 
 class AngleField(UnitField):
-    units = UNITS_ANGLE
+    units = LazyUnits('UNITS_ANGLE')
 
 class CrackleField(UnitField):
-    units = UNITS_CRACKLE
+    units = LazyUnits('UNITS_CRACKLE')
 
 class CurrentField(UnitField):
-    units = UNITS_CURRENT
+    units = LazyUnits('UNITS_CURRENT')
 
 class DensityField(UnitField):
-    units = UNITS_DENSITY
+    units = LazyUnits('UNITS_DENSITY')
 
 class ForceField(UnitField):
-    units = UNITS_FORCE
+    units = LazyUnits('UNITS_FORCE')
 
 class InertiaTorqueField(UnitField):
-    units = UNITS_INERTIA_TORQUE
+    units = LazyUnits('UNITS_INERTIA_TORQUE')
 
 class JerkField(UnitField):
-    units = UNITS_JERK
+    units = LazyUnits('UNITS_JERK')
 
 class PotentialField(UnitField):
-    units = UNITS_POTENTIAL
+    units = LazyUnits('UNITS_POTENTIAL')
 
 class SnapField(UnitField):
-    units = UNITS_SNAP
+    units = LazyUnits('UNITS_SNAP')
 
 class SpeedField(UnitField):
-    units = UNITS_SPEED
+    units = LazyUnits('UNITS_SPEED')
 
 class TorqueField(UnitField):
-    units = UNITS_TORQUE
+    units = LazyUnits('UNITS_TORQUE')
 
 class VelocityField(UnitField):
-    units = UNITS_VELOCITY
+    units = LazyUnits('UNITS_VELOCITY')
 
 class TorsionField(UnitField):
-    units = UNITS_TORSION
+    units = LazyUnits('UNITS_TORSION')
 
 class PowerField(UnitField):
-    units = UNITS_POWER
+    units = LazyUnits('UNITS_POWER')
+
+class EnergyField(UnitField):
+    units = LazyUnits('UNITS_ENERGY')
+
+class PressureField(UnitField):
+    units = LazyUnits('UNITS_PRESSURE')
 
 class ThermalResistanceField(UnitField):
-    units = UNITS_THERMAL_RESISTANCE
+    units = LazyUnits('UNITS_THERMAL_RESISTANCE')
 
 class ElectricalTimeConstantField(UnitField):
-    units = UNITS_ELECTRICAL_TIME_CONSTANT
+    units = LazyUnits('UNITS_ELECTRICAL_TIME_CONSTANT')
 
 class MotorConstantField(UnitField):
-    units = UNITS_MOTOR_CONSTANT
+    units = LazyUnits('UNITS_MOTOR_CONSTANT')
 
 class ForceConstantField(UnitField):
-    units = UNITS_FORCE_CONSTANT
+    units = LazyUnits('UNITS_FORCE_CONSTANT')
 
 class PotentialConstantField(UnitField):
-    units = UNITS_POTENTIAL_CONSTANT
+    units = LazyUnits('UNITS_POTENTIAL_CONSTANT')
 
 class ResistanceField(UnitField):
-    units = UNITS_ELECTRICAL_RESISTANCE
+    units = LazyUnits('UNITS_ELECTRICAL_RESISTANCE')
 
 class InductanceField(UnitField):
-    units = UNITS_INDUCTANCE
+    units = LazyUnits('UNITS_INDUCTANCE')
 
 class AngleVelocityField(UnitField):
-    units = UNITS_ANGLE_VELOCITY
+    units = LazyUnits('UNITS_ANGLE_VELOCITY')
 
 class AngleAccelerationField(UnitField):
-    units = UNITS_ANGLE_ACCELERATION
+    units = LazyUnits('UNITS_ANGLE_ACCELERATION')
 
 class AngleJerkField(UnitField):
-    units = UNITS_ANGLE_JERK
+    units = LazyUnits('UNITS_ANGLE_JERK')
 
 class AngleSnapField(UnitField):
-    units = UNITS_ANGLE_SNAP
+    units = LazyUnits('UNITS_ANGLE_SNAP')
 
 class AngleCrackleField(UnitField):
-    units = UNITS_ANGLE_CRACKLE
+    units = LazyUnits('UNITS_ANGLE_CRACKLE')
 
 
 class HeatTransferResistanceField(UnitField):
-    units = UNITS_HEAT_TRANSFER_RESISTANCE
+    units = LazyUnits('UNITS_HEAT_TRANSFER_RESISTANCE')
 
 class HeatConductanceField(UnitField):
-    units = UNITS_HEAT_CONDUCTANCE
+    units = LazyUnits('UNITS_HEAT_CONDUCTANCE')
 
 class HeatCapacityField(UnitField):
-    units = UNITS_HEAT_CAPACITY
+    units = LazyUnits('UNITS_HEAT_CAPACITY')
 
 class SpecificHeatCapacityField(UnitField):
-    units = UNITS_SPECIFIC_HEAT_CAPACITY
+    units = LazyUnits('UNITS_SPECIFIC_HEAT_CAPACITY')
 
 class ViscosityField(UnitField):
-    units = UNITS_VISCOSITY
+    units = LazyUnits('UNITS_VISCOSITY')
 
 class FlowRateField(UnitField):
-    units = UNITS_FLOW_RATE
+    units = LazyUnits('UNITS_FLOW_RATE')
 
 class PercentageField(UnitField):
-    units = UNITS_PERCENTAGE
+    units = LazyUnits('UNITS_PERCENTAGE')
 
 try:
     from south.modelsinspector import add_introspection_rules
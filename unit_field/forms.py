@@ -1,7 +1,68 @@
 # -*- coding: utf-8 -*-
+from collections import OrderedDict
 from django import forms
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.utils.encoding import force_text
+from django.utils.translation import get_language
+import threading
 
-__all__ = ('UnitInputField', )
+__all__ = ('UnitInputField', 'UnitSelect', 'get_unit_choices', )
+
+OPTIONS_CACHE_SIZE = getattr(settings, 'UNIT_FIELD_OPTIONS_CACHE_SIZE', 512)
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def _get_cached(key, build):
+    """
+    returns the cached value of key, built on a miss; the least recently
+    used entries are dropped once the cache is full
+    """
+    with _cache_lock:
+        try:
+            value = _cache.pop(key)
+        except KeyError:
+            pass
+        else:
+            _cache[key] = value
+            return value
+
+    value = build()
+    with _cache_lock:
+        _cache[key] = value
+        while len(_cache) > OPTIONS_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return value
+
+def clear_choices_cache(**kwargs):
+    if kwargs.get('setting') not in (None, 'LANGUAGES', 'LANGUAGE_CODE',
+            'LOCALE_PATHS'):
+        return
+    with _cache_lock:
+        _cache.clear()
+
+setting_changed.connect(clear_choices_cache)
+
+def _translation_file_changed(sender, file_path, **kwargs):
+    if file_path.suffix == '.mo':
+        clear_choices_cache()
+
+try:
+    from django.utils.autoreload import file_changed
+except ImportError:
+    # the autoreloader of Django < 2.2 restarts the process instead
+    pass
+else:
+    file_changed.connect(_translation_file_changed)
+
+def get_unit_choices(units):
+    """
+    returns the choices of a unit family with the abbreviations translated
+    into the active language, cached per family and language
+    """
+    return _get_cached(('choices', id(units), get_language()),
+        lambda: tuple((unit.id, force_text(unit.abbrev)) for unit in units))
 
 class UnitInputField(forms.CharField):
 
@@ -9,3 +70,38 @@ class UnitInputField(forms.CharField):
         attrs = super(UnitInputField, self).widget_attrs(widget)
         attrs.update({ 'class': 'unit-field-input' })
         return attrs
+
+class UnitSelect(forms.Select):
+    """
+    the select of the unit column, every option carries the factor of its
+    unit (data-factor) for the client-side unit conversion
+
+    If the unit family is known, the options are cached per family, language
+    and selected unit, the select itself is rendered by its template.
+    """
+    def __init__(self, attrs=None, choices=(), factors=None, units=None):
+        super(UnitSelect, self).__init__(attrs, choices)
+        self.factors = factors or {}
+        self.units = units
+
+    def create_option(self, name, value, *args, **kwargs):
+        option = super(UnitSelect, self).create_option(
+            name, value, *args, **kwargs)
+        factor = self.factors.get(value)
+        if factor is not None:
+            attrs = {'data-factor': repr(factor)}
+            attrs.update(option['attrs'])
+            option['attrs'] = attrs
+        return option
+
+    def optgroups(self, name, value, attrs=None):
+        if self.units is None:
+            return super(UnitSelect, self).optgroups(name, value, attrs)
+
+        # the values of the choices are part of the key, they differ e.g.
+        # by the blank choice or if choices were limited
+        key = ('options', id(self.units), get_language(), name,
+            tuple(value), tuple(force_text(choice_value)
+                for choice_value, label in self.choices))
+        return _get_cached(key, lambda: super(UnitSelect, self).optgroups(
+            name, value, attrs))
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+from collections import namedtuple
+from itertools import islice
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.utils import six
+from unit_field.managers import normalize_instances
+from unit_field.utils import sanitize_separators
+import csv
+import io
+
+ImportChunk = namedtuple('ImportChunk', ['created', 'rejected'])
+
+RejectedRow = namedtuple('RejectedRow', ['line', 'row', 'reason'])
+
+def iter_chunks(iterable, chunk_size):
+    """
+    splits an iterable into lists of at most chunk_size items
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def read_csv(file, delimiter=',', encoding='utf-8'):
+    """
+    streams the rows of a csv file with a header line as dicts,
+    file is either a path or a file object opened in text mode
+    """
+    if isinstance(file, six.string_types):
+        with io.open(file, encoding=encoding, newline='') as f:
+            for row in csv.DictReader(f, delimiter=delimiter):
+                yield row
+    else:
+        for row in csv.DictReader(file, delimiter=delimiter):
+            yield row
+
+def read_parquet(path, batch_size=10000):
+    """
+    streams the rows of a parquet file as dicts, one record batch at a
+    time (requires pyarrow)
+    """
+    try:
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError(u'reading parquet files requires pyarrow')
+
+    parquet_file = pyarrow.parquet.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=batch_size):
+        columns = batch.to_pydict()
+        names = list(columns)
+        for values in zip(*[columns[name] for name in names]):
+            yield dict(zip(names, values))
+
+def parse_number(value):
+    """
+    parses a (localized) number, like a UnitInputField does
+    """
+    if value is None:
+        # a missing csv column or a null parquet cell
+        raise ValueError(u'missing number')
+    if isinstance(value, six.integer_types + (float, )):
+        return float(value)
+    return float(sanitize_separators(value.strip()))
+
+class UnitImporter(object):
+    """
+    imports rows of (value, unit) pairs into a model with UnitFields.
+    fields maps the name of every imported UnitField to the names of its
+    value and unit columns, columns lists additional columns, which are
+    copied into the model fields of the same name, e.g.:
+
+    importer = UnitImporter(Sample, {'mass': ('value', 'unit')},
+        columns=['sensor_id'])
+    for chunk in importer.run(read_csv('export.csv')):
+        print(chunk.created, chunk.rejected)
+    """
+    def __init__(self, model, fields, columns=(), defaults=None,
+            chunk_size=1000):
+        self.model = model
+        self.fields = []
+        for name, (value_column, unit_column) in fields.items():
+            unit_field = model._meta.get_field(name)
+            self.fields.append((unit_field, value_column, unit_column))
+        self.columns = [(model._meta.get_field(column), column)
+            for column in columns]
+        self.defaults = defaults or {}
+        self.chunk_size = chunk_size
+
+    def build(self, row):
+        """
+        returns an unsaved model instance for a row,
+        raises a ValueError or ValidationError for an invalid row
+        """
+        kwargs = dict(self.defaults)
+        for unit_field, value_column, unit_column in self.fields:
+            unit_id = row[unit_column]
+            if unit_id not in unit_field.registry:
+                raise ValueError(u'unknown unit: %s' % (unit_id, ))
+            kwargs[unit_field.input_attname] = \
+                parse_number(row[value_column])
+            kwargs[unit_field.unit_field.attname] = unit_id
+        for field, column in self.columns:
+            kwargs[field.attname] = field.to_python(row[column])
+        return self.model(**kwargs)
+
+    def prepare(self, chunk, line=0):
+        """
+        builds and normalizes the model instances of a chunk of rows,
+        returns the instances and the rejected rows; line is the number
+        of rows before the chunk
+        """
+        objs = []
+        rejected = []
+        for row in chunk:
+            line += 1
+            try:
+                objs.append(self.build(row))
+            except (KeyError, TypeError, ValueError, ValidationError) as e:
+                rejected.append(RejectedRow(line, row, e))
+
+        # all "_value" columns of the chunk, grouped by unit
+        normalize_instances(self.model, objs)
+        return objs, rejected
+
+    def write(self, objs, rejected):
+        """
+        writes the prepared instances of a chunk to the database
+        """
+        models.QuerySet(self.model).bulk_create(
+            objs, batch_size=self.chunk_size)
+        return ImportChunk(len(objs), rejected)
+
+    def run(self, rows):
+        """
+        imports the rows chunk by chunk and yields an ImportChunk
+        for every chunk written to the database
+        """
+        line = 0
+        for chunk in iter_chunks(rows, self.chunk_size):
+            objs, rejected = self.prepare(chunk, line)
+            line += len(chunk)
+            yield self.write(objs, rejected)
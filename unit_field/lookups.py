@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+from django.db.models import lookups
+
+class UnitLookupMixin(object):
+    """
+    converts the right hand side of a lookup on a UnitField into the base
+    unit once, so that the lookup can use the "_value" column
+    """
+    def get_prep_lookup(self):
+        if not hasattr(self.rhs, 'resolve_expression'):
+            field = self.lhs.output_field
+            if getattr(self, 'get_db_prep_lookup_value_is_iterable', False):
+                self.rhs = [field.get_normalized_value(value)
+                    for value in self.rhs]
+            else:
+                self.rhs = field.get_normalized_value(self.rhs)
+        return super(UnitLookupMixin, self).get_prep_lookup()
+
+class UnitExact(UnitLookupMixin, lookups.Exact):
+    pass
+
+class UnitLessThan(UnitLookupMixin, lookups.LessThan):
+    pass
+
+class UnitLessThanOrEqual(UnitLookupMixin, lookups.LessThanOrEqual):
+    pass
+
+class UnitGreaterThan(UnitLookupMixin, lookups.GreaterThan):
+    pass
+
+class UnitGreaterThanOrEqual(UnitLookupMixin, lookups.GreaterThanOrEqual):
+    pass
+
+class UnitRange(UnitLookupMixin, lookups.Range):
+    pass
+
+class UnitIn(UnitLookupMixin, lookups.In):
+    pass
+
+UNIT_LOOKUPS = (
+    UnitExact,
+    UnitLessThan,
+    UnitLessThanOrEqual,
+    UnitGreaterThan,
+    UnitGreaterThanOrEqual,
+    UnitRange,
+    UnitIn,
+)
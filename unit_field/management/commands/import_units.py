@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+from django.apps import apps
+from django.core.exceptions import FieldDoesNotExist
+from django.core.management.base import BaseCommand, CommandError
+from unit_field.fields import UnitField
+from unit_field.importers import UnitImporter, read_csv, read_parquet
+import time
+
+class Command(BaseCommand):
+    help = u'Imports (value, unit) pairs from a csv or parquet file into ' \
+        u'the UnitFields of a model, e.g.: import_units sensors.Sample ' \
+        u'export.csv --field mass:value:unit --column sensor_id'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', help=u'app_label.ModelName')
+        parser.add_argument('file')
+        parser.add_argument('--field', action='append', default=[],
+            dest='fields', metavar='NAME:VALUE_COLUMN:UNIT_COLUMN',
+            help=u'a UnitField and the columns holding its value and unit')
+        parser.add_argument('--column', action='append', default=[],
+            dest='columns', help=u'an additional column to import')
+        parser.add_argument('--format', choices=('csv', 'parquet'),
+            default=None, help=u'defaults to the file extension')
+        parser.add_argument('--delimiter', default=',')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            model = apps.get_model(options['model'])
+        except (LookupError, ValueError) as e:
+            raise CommandError(e)
+
+        fields = {}
+        for field in options['fields']:
+            try:
+                name, value_column, unit_column = field.split(':')
+            except ValueError:
+                raise CommandError(u'invalid --field %s' % (field, ))
+            try:
+                unit_field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                unit_field = None
+            if not isinstance(unit_field, UnitField):
+                raise CommandError(u'unknown unit field: %s' % (name, ))
+            fields[name] = (value_column, unit_column)
+        if not fields:
+            raise CommandError(u'at least one --field is required')
+        for column in options['columns']:
+            try:
+                model._meta.get_field(column)
+            except FieldDoesNotExist:
+                raise CommandError(u'unknown column: %s' % (column, ))
+
+        file_format = options['format']
+        if file_format is None:
+            file_format = 'parquet' if options['file'].endswith('.parquet') \
+                else 'csv'
+        if file_format == 'parquet':
+            rows = read_parquet(options['file'],
+                batch_size=options['chunk_size'])
+        else:
+            rows = read_csv(options['file'], delimiter=options['delimiter'])
+
+        importer = UnitImporter(model, fields, columns=options['columns'],
+            chunk_size=options['chunk_size'])
+
+        created = 0
+        rejected = 0
+        start = time.time()
+        for chunk in importer.run(rows):
+            created += chunk.created
+            rejected += len(chunk.rejected)
+            for row in chunk.rejected:
+                self.stderr.write(u'line %s rejected: %s' % (
+                    row.line, row.reason))
+        duration = max(time.time() - start, 1e-9)
+
+        self.stdout.write(u'%s rows imported, %s rows rejected ' \
+            u'in %.2fs (%.0f rows/sec)' % (created, rejected, duration,
+                (created + rejected) / duration))
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, models
+from django.utils import six
+from unit_field.fields import UnitField, md5_hexdigest
+from unit_field.operations import iter_pk_ranges
+import json
+import multiprocessing
+import os
+import time
+
+def get_unit_fields(model, names=None):
+    """
+    returns the UnitFields of a model, optionally restricted to names
+    """
+    fields = [field for field in model._meta.private_fields
+        if isinstance(field, UnitField)]
+    if names:
+        unknown = set(names) - set(field.name for field in fields)
+        if unknown:
+            raise CommandError(u'unknown UnitField: %s' % (
+                u', '.join(sorted(unknown)), ))
+        fields = [field for field in fields if field.name in names]
+    return fields
+
+def renormalize_range(label, field_name, first, last, unit_ids=None,
+        sleep=0.0):
+    """
+    recomputes the "_value" column of all rows within a range of primary
+    keys from their input and unit, only changed rows are written.
+    Returns (first, last, number of updated rows).
+    """
+    model = apps.get_model(label)
+    unit_field = model._meta.get_field(field_name)
+    value_field = unit_field.value_field
+
+    queryset = models.QuerySet(model).filter(pk__range=(first, last))
+    if unit_ids:
+        queryset = queryset.filter(
+            **{'%s__in' % (unit_field.unit_field.name, ): unit_ids})
+    objs = list(queryset.only(unit_field.input_field.name,
+        unit_field.unit_field.name, value_field.name))
+
+    stale = [getattr(obj, value_field.attname) for obj in objs]
+    value_field.normalize_many(objs)
+    changed = [obj for obj, value in zip(objs, stale)
+        if getattr(obj, value_field.attname) != value]
+    if changed:
+        models.QuerySet(model).bulk_update(changed, [value_field.name])
+
+    if sleep:
+        # throttles the load on a live table
+        time.sleep(sleep)
+    return first, last, len(changed)
+
+def _renormalize_range(args):
+    return renormalize_range(*args)
+
+def _init_worker():
+    # with the spawn start method the worker starts with a fresh interpreter
+    import django
+    django.setup()
+
+def get_units_digest(unit_field, unit_ids=None):
+    """
+    returns a digest of the factors of the units, a checkpoint is only
+    valid as long as the factors stay the same
+    """
+    registry = unit_field.registry
+    unit_ids = sorted(unit_ids or registry.ids)
+    return md5_hexdigest(json.dumps([(unit_id, registry.affine.get(unit_id))
+        for unit_id in unit_ids]))[:12]
+
+class Checkpoint(object):
+    """
+    the ranges of primary keys already done, so that an interrupted run
+    can be resumed. Every done range is appended as a line of json, the
+    ranges are recorded per run (model, batch size and units) and per
+    field and digest of its unit factors.
+    """
+    def __init__(self, path, label, batch_size, unit_ids=()):
+        self.path = path
+        self.run = u'%s:%s:%s' % (label, batch_size,
+            u','.join(sorted(unit_ids)))
+        self.unit_ids = unit_ids
+        self.done = set()
+        if path and os.path.exists(path):
+            for entry in self.read():
+                if entry.get('run') == self.run:
+                    self.done.add((entry['field'], tuple(entry['range'])))
+
+    @staticmethod
+    def get_range(first, last):
+        # primary keys like UUIDs are recorded as text
+        return tuple(six.text_type(pk) for pk in (first, last))
+
+    def read(self):
+        entries = []
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # the last line of an interrupted run
+                    continue
+        return entries
+
+    def get_key(self, unit_field):
+        return u'%s:%s' % (unit_field.name,
+            get_units_digest(unit_field, self.unit_ids))
+
+    def is_done(self, unit_field, first, last):
+        return (self.get_key(unit_field),
+            self.get_range(first, last)) in self.done
+
+    def add(self, unit_field, first, last):
+        key = self.get_key(unit_field)
+        pk_range = self.get_range(first, last)
+        self.done.add((key, pk_range))
+        if self.path:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps({'run': self.run, 'field': key,
+                    'range': pk_range}) + u'\n')
+
+    def clear(self):
+        self.done = set()
+        if self.path and os.path.exists(self.path):
+            entries = [entry for entry in self.read()
+                if entry.get('run') != self.run]
+            # never leave a half written checkpoint behind
+            tmp_path = u'%s.tmp' % (self.path, )
+            with open(tmp_path, 'w') as f:
+                for entry in entries:
+                    f.write(json.dumps(entry) + u'\n')
+            os.replace(tmp_path, self.path)
+
+class Command(BaseCommand):
+    help = u'Recomputes the normalized "_value" columns of the UnitFields ' \
+        u'of a model from their input and unit, e.g. after a unit factor ' \
+        u'was corrected: renormalize_units sensors.Sample --field mass ' \
+        u'--unit mo --workers 4'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', help=u'app_label.ModelName')
+        parser.add_argument('--field', action='append', default=[],
+            dest='fields', help=u'a UnitField, defaults to all UnitFields')
+        parser.add_argument('--unit', action='append', default=[],
+            dest='units', help=u'only rows stored in this unit')
+        parser.add_argument('--workers', type=int, default=1,
+            help=u'the number of worker processes')
+        parser.add_argument('--batch-size', type=int, default=10000,
+            help=u'the number of primary keys per range')
+        parser.add_argument('--checkpoint', default=None,
+            help=u'a file recording the ranges already done')
+        parser.add_argument('--reset', action='store_true',
+            help=u'ignore the ranges recorded in the checkpoint')
+        parser.add_argument('--sleep', type=float, default=0.0,
+            help=u'seconds to pause after every range')
+
+    def handle(self, *args, **options):
+        try:
+            model = apps.get_model(options['model'])
+        except (LookupError, ValueError) as e:
+            raise CommandError(e)
+        label = model._meta.label
+
+        checkpoint = Checkpoint(options['checkpoint'], label,
+            options['batch_size'], options['units'])
+        if options['reset']:
+            checkpoint.clear()
+
+        pool = None
+        if options['workers'] > 1:
+            # forked workers must not share the connections of this process
+            connections.close_all()
+            pool = multiprocessing.Pool(options['workers'],
+                initializer=_init_worker)
+        try:
+            for unit_field in get_unit_fields(model, options['fields']):
+                if unit_field.input_field is None:
+                    self.stderr.write(u'%s skipped: the input is not ' \
+                        u'stored' % (unit_field.name, ))
+                    continue
+                self.renormalize(model, unit_field, options, checkpoint, pool)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+    def renormalize(self, model, unit_field, options, checkpoint, pool):
+        label = model._meta.label
+        queryset = models.QuerySet(model)
+        if options['units']:
+            queryset = queryset.filter(**{'%s__in' % (
+                unit_field.unit_field.name, ): options['units']})
+
+        tasks = [(label, unit_field.name, first, last, options['units'],
+                options['sleep'])
+            for first, last in iter_pk_ranges(queryset, options['batch_size'])
+            if not checkpoint.is_done(unit_field, first, last)]
+
+        if pool is None:
+            results = (_renormalize_range(task) for task in tasks)
+        else:
+            results = pool.imap_unordered(_renormalize_range, tasks)
+
+        updated = 0
+        start = time.time()
+        for first, last, count in results:
+            updated += count
+            checkpoint.add(unit_field, first, last)
+        duration = max(time.time() - start, 1e-9)
+
+        self.stdout.write(u'%s: %s rows updated in %s ranges (%.2fs)' % (
+            unit_field.name, updated, len(tasks), duration))
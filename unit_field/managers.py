@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+from django.db import models
+from unit_field.expressions import normalize_expression
+from unit_field.fields import CalculatedFloatField
+
+def get_calculated_fields(model):
+    """
+    returns the CalculatedFloatFields (the "_value" columns) of a model
+    """
+    return [field for field in model._meta.concrete_fields
+        if isinstance(field, CalculatedFloatField)]
+
+def normalize_instances(model, objs):
+    """
+    computes the "_value" column of every UnitField for a batch of
+    model instances, without calling pre_save for each of them
+    """
+    for field in get_calculated_fields(model):
+        field.normalize_many(objs)
+    return objs
+
+def renormalize_queryset(queryset, field_name, registry, unit_codes=None):
+    """
+    recomputes the "_value" column of a UnitField for all rows of a
+    queryset from their input and unit: rows of affine units with a single
+    UPDATE, rows of all other units one by one. Rows with unknown units are
+    left alone. Returns the number of updated rows.
+    """
+    unit_name = '%s_unit' % (field_name, )
+    input_name = '%s_input' % (field_name, )
+    value_name = '%s_value' % (field_name, )
+
+    def stored(unit_id):
+        return unit_id if unit_codes is None else unit_codes[unit_id]
+
+    affine_ids = [unit_id for unit_id in registry.ids
+        if unit_id in registry.affine]
+    updated = queryset.filter(**{'%s__in' % (unit_name, ): [
+            stored(unit_id) for unit_id in affine_ids]}).update(
+        **{value_name: normalize_expression(field_name, registry, unit_codes)})
+
+    for unit_id in registry.ids:
+        if unit_id in registry.affine:
+            continue
+        try:
+            convert = registry.converter(unit_id)
+        except ValueError:
+            # the unit cannot be normalized at all
+            continue
+        rows = queryset.filter(**{unit_name: stored(unit_id)}).values_list(
+            'pk', input_name)
+        for pk, input_value in rows.iterator():
+            value = 0.0 if input_value is None else convert(input_value)
+            updated += queryset.filter(pk=pk).update(**{value_name: value})
+    return updated
+
+class UnitQuerySet(models.QuerySet):
+    """
+    a QuerySet whose bulk operations compute the normalized values of
+    all UnitFields before writing, e.g.:
+
+    class Engine(models.Model):
+        ...
+        objects = UnitManager()
+    """
+
+    def normalize(self, objs):
+        return normalize_instances(self.model, objs)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        self.normalize(objs)
+        return super(UnitQuerySet, self).bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        self.normalize(objs)
+
+        # whenever the input or the unit changes, the value changes as well
+        fields = list(fields)
+        for field in get_calculated_fields(self.model):
+            if field.name in fields:
+                continue
+            if field.input_attname in fields or \
+                    field.unit_attname in fields:
+                fields.append(field.name)
+        return super(UnitQuerySet, self).bulk_update(
+            objs, fields, *args, **kwargs)
+
+    def renormalize(self, field_name):
+        """
+        recomputes the normalized values of a UnitField in the database,
+        e.g. after the factor of a unit was corrected:
+
+        Engine.objects.filter(cubic_capacity_unit=u'l').renormalize(
+            'cubic_capacity')
+        """
+        unit_field = self.model._meta.get_field(field_name)
+        if unit_field.input_field is None:
+            raise ValueError(u'the input of %s is not stored' % (field_name, ))
+        return renormalize_queryset(self, field_name, unit_field.registry)
+
+    def bulk_create_from_values(self, field_name, values, batch_size=None,
+            **defaults):
+        """
+        creates one instance for every (input, unit) tuple of values,
+        all other fields are taken from defaults, e.g.:
+
+        Engine.objects.bulk_create_from_values('cubic_capacity',
+            [(1.2, u'l'), (1400, u'cm³')], owner=owner)
+        """
+        input_name = '%s_input' % (field_name, )
+        unit_name = '%s_unit' % (field_name, )
+
+        objs = []
+        for input_value, unit_id in values:
+            kwargs = dict(defaults)
+            kwargs[input_name] = input_value
+            kwargs[unit_name] = unit_id
+            objs.append(self.model(**kwargs))
+        return self.bulk_create(objs, batch_size=batch_size)
+
+UnitManager = models.Manager.from_queryset(UnitQuerySet, 'UnitManager')
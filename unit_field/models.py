@@ -1,41 +1,112 @@
 # -*- coding: utf-8 -*-
+from django.db.models.signals import class_prepared
+from django.utils.encoding import force_text
 from django.utils.safestring import mark_safe
-from django.utils.translation import ugettext_lazy as _
+from django.utils.translation import get_language, ugettext_lazy as _
 from django.template.defaultfilters import floatformat
+from unit_field.fields import UnitField
 
 class UnitModelMixin(object):
+    """
+    provides the attributes <name>_html, <name>_label_key and
+    <name>_label_value for every UnitField of a model. They are installed
+    as descriptors when the model class is prepared.
+    """
 
-    def __getattr__(self, name):
-        if name.endswith('_html'):
-            _field = name.replace('_html', '_input')
-            _label = _(self._meta.get_field(_field).verbose_name)
-
-            _unit_field = name.replace('_html', '_unit')
-            _val = floatformat(getattr(self, _field), 2)
-            _method_name = u'get_%s_display' % _unit_field
-            _unit_method = getattr(self, _method_name)
-            return mark_safe(u'<div class="row-fluid">' \
-                '<div class="span6"><span class="readonly-label">%s:</span></div>' \
-                '<div class="span6"><strong class="readonly-value">%s %s</strong></div>' \
-                '</div>' % (
-                _label, _val, _unit_method(), ))
-
-        if name.endswith('_label_key'):
-            _field = name.replace('_label_key', '_input')
-            return self._meta.get_field(_field).verbose_name
-
-        if name.endswith('_label_value'):
-            _field = name.replace('_label_value', '_input')
-            _unit_field = name.replace('_label_value', '_unit')
-            _val = getattr(self, _field)
-            _method_name = u'get_%s_display' % _unit_field
-            _unit_method = getattr(self, _method_name)
-            return u'%s %s' % (_val, _unit_method(), )
-
-        return super(UnitModelMixin, self).__getattr__(name)
-        # for debugging:
-        #try:
-        #    return super(UnitModelMixin, self).__getattr__(name)
-        #except AttributeError:
-        #    print "attribute not found:", name
-        #    raise AttributeError
+def get_input_verbose_name(field):
+    if field.input_field is None:
+        return field.verbose_name
+    return field.input_field.verbose_name
+
+class UnitAttribute(object):
+    """
+    the base class of the attributes generated for a UnitField, the
+    formatted result is cached per instance until the input or the unit
+    (or the active language) changes
+    """
+    suffix = None
+
+    def __init__(self, field):
+        self.field = field
+        self.input_attname = field.input_attname
+        self.unit_attname = field.unit_field.attname
+        self.cache_name = '_%s%s_cache' % (field.name, self.suffix)
+        self._choices = None
+
+    def get_unit_display(self, unit_id):
+        # the same as get_<name>_unit_display(), without building the
+        # dict of choices on every call
+        if self._choices is None:
+            self._choices = dict(self.field.unit_field.flatchoices)
+        return force_text(self._choices.get(unit_id, unit_id),
+            strings_only=True)
+
+    def format(self, instance, input, unit_id):
+        raise NotImplementedError(self.format)
+
+    def __get__(self, instance, type=None):
+        if instance is None:
+            return self
+
+        input = getattr(instance, self.input_attname)
+        unit_id = getattr(instance, self.unit_attname)
+        language = get_language()
+        __dict__ = instance.__dict__
+        cached = __dict__.get(self.cache_name)
+        if cached is not None and cached[0] is input and \
+                cached[1] is unit_id and cached[2] == language:
+            return cached[3]
+
+        result = self.format(instance, input, unit_id)
+        __dict__[self.cache_name] = (input, unit_id, language, result)
+        return result
+
+class UnitHtml(UnitAttribute):
+    suffix = '_html'
+
+    def format(self, instance, input, unit_id):
+        _label = _(get_input_verbose_name(self.field))
+        _val = floatformat(input, 2)
+        return mark_safe(u'<div class="row-fluid">' \
+            '<div class="span6"><span class="readonly-label">%s:</span></div>' \
+            '<div class="span6"><strong class="readonly-value">%s %s</strong></div>' \
+            '</div>' % (
+            _label, _val, self.get_unit_display(unit_id), ))
+
+class UnitLabelValue(UnitAttribute):
+    suffix = '_label_value'
+
+    def format(self, instance, input, unit_id):
+        return u'%s %s' % (input, self.get_unit_display(unit_id), )
+
+class UnitLabelKey(object):
+    def __init__(self, field):
+        self.field = field
+
+    def __get__(self, instance, type=None):
+        if instance is None:
+            return self
+        return get_input_verbose_name(self.field)
+
+UNIT_ATTRIBUTES = (
+    ('_html', UnitHtml),
+    ('_label_key', UnitLabelKey),
+    ('_label_value', UnitLabelValue),
+)
+
+def add_unit_attributes(sender, **kwargs):
+    """
+    installs the attributes of all UnitFields on models using the
+    UnitModelMixin
+    """
+    if not issubclass(sender, UnitModelMixin):
+        return
+    for field in sender._meta.private_fields:
+        if not isinstance(field, UnitField):
+            continue
+        for suffix, attribute in UNIT_ATTRIBUTES:
+            name = '%s%s' % (field.name, suffix)
+            if name not in sender.__dict__:
+                setattr(sender, name, attribute(field))
+
+class_prepared.connect(add_unit_attributes)
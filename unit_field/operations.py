@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+from django.db import migrations
+from django.db.models import (Case, CharField, IntegerField, Max, Min, Value,
+    When)
+from django.utils import six
+from unit_field.managers import renormalize_queryset
+from unit_field.units import get_registry, get_units
+
+INTEGER_TYPES = ('AutoField', 'BigAutoField', 'IntegerField',
+    'BigIntegerField', 'SmallIntegerField', 'PositiveIntegerField',
+    'PositiveSmallIntegerField')
+
+def iter_pk_ranges(queryset, batch_size):
+    """
+    yields (first, last) ranges of primary keys: of at most batch_size
+    integers, or of batch_size rows for other primary keys (e.g. UUIDs)
+    """
+    pk = queryset.model._meta.pk
+    if pk.is_relation:
+        pk = pk.target_field
+    if pk.get_internal_type() not in INTEGER_TYPES:
+        # ordered by value, one query per range
+        pks = queryset.order_by('pk').values_list('pk', flat=True)
+        page = list(pks[:batch_size])
+        while page:
+            yield page[0], page[-1]
+            page = list(pks.filter(pk__gt=page[-1])[:batch_size])
+        return
+
+    bounds = queryset.aggregate(first=Min('pk'), last=Max('pk'))
+    if bounds['first'] is None:
+        return
+    first = bounds['first']
+    while first <= bounds['last']:
+        yield first, first + batch_size - 1
+        first += batch_size
+
+def _get_registry(units):
+    if isinstance(units, six.string_types):
+        units = get_units(units)
+    return get_registry(units)
+
+def _get_run_python_kwargs(operation, kwargs):
+    """
+    adds the options of RunPython, its code is part of the operation
+    """
+    if operation.atomic is not None:
+        kwargs['atomic'] = operation.atomic
+    if operation.hints:
+        kwargs['hints'] = operation.hints
+    return kwargs
+
+class ConvertUnitCodes(migrations.RunPython):
+    """
+    a migration operation converting the unit ids of an existing unit
+    column into the small integer codes of the compact storage mode (and
+    back, when the migration is reversed). The codes are written batch by
+    batch with one UPDATE per range of primary keys, e.g.:
+
+    operations = [
+        migrations.AddField('engine', 'capacity_unit_code',
+            models.SmallIntegerField(null=True)),
+        ConvertUnitCodes('engine', 'UNITS_SOLID_MEASURE',
+            'capacity_unit', 'capacity_unit_code'),
+        migrations.RemoveField('engine', 'capacity_unit'),
+        migrations.RenameField('engine', 'capacity_unit_code',
+            'capacity_unit'),
+    ]
+    """
+    def __init__(self, model_name, units, from_field, to_field,
+            unit_codes=None, batch_size=10000, atomic=None, hints=None,
+            elidable=False):
+        self.model_name = model_name
+        self.units = units
+        self.from_field = from_field
+        self.to_field = to_field
+        self.unit_codes = unit_codes
+        self.batch_size = batch_size
+        super(ConvertUnitCodes, self).__init__(self.forwards,
+            self.backwards, atomic=atomic, hints=hints, elidable=elidable)
+
+    def deconstruct(self):
+        kwargs = {
+            'model_name': self.model_name,
+            'units': self.units,
+            'from_field': self.from_field,
+            'to_field': self.to_field,
+        }
+        if self.unit_codes is not None:
+            kwargs['unit_codes'] = self.unit_codes
+        if self.batch_size != 10000:
+            kwargs['batch_size'] = self.batch_size
+        return (self.__class__.__qualname__, [],
+            _get_run_python_kwargs(self, kwargs))
+
+    def get_unit_codes(self):
+        if self.unit_codes is not None:
+            return self.unit_codes
+        return _get_registry(self.units).codes
+
+    def convert(self, apps, source, target, mapping, output_field):
+        model = apps.get_model(self.app_label, self.model_name)
+        queryset = model._default_manager.all()
+        expression = Case(
+            *[When(then=Value(new), **{source: old})
+                for old, new in mapping.items()],
+            output_field=output_field)
+        for first, last in iter_pk_ranges(queryset, self.batch_size):
+            queryset.filter(pk__range=(first, last)).update(
+                **{target: expression})
+
+    def forwards(self, apps, schema_editor):
+        self.convert(apps, self.from_field, self.to_field,
+            self.get_unit_codes(), IntegerField())
+
+    def backwards(self, apps, schema_editor):
+        mapping = dict((code, unit_id) for unit_id, code in
+            self.get_unit_codes().items())
+        self.convert(apps, self.to_field, self.from_field, mapping,
+            CharField())
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+            to_state):
+        self.app_label = app_label
+        super(ConvertUnitCodes, self).database_forwards(
+            app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+            to_state):
+        self.app_label = app_label
+        super(ConvertUnitCodes, self).database_backwards(
+            app_label, schema_editor, from_state, to_state)
+
+class RenormalizeUnitField(migrations.RunPython):
+    """
+    a migration operation recomputing the "_value" column of a UnitField
+    from its input and unit with a single UPDATE, e.g. after the factor of
+    a unit was corrected:
+
+    operations = [
+        RenormalizeUnitField('engine', 'cubic_capacity',
+            'UNITS_SOLID_MEASURE'),
+    ]
+
+    Use compact=True (or unit_codes) for UnitFields in the compact storage
+    mode. Reversing the migration does not change any rows.
+    """
+    def __init__(self, model_name, field_name, units, compact=False,
+            unit_codes=None, atomic=None, hints=None, elidable=False):
+        self.model_name = model_name
+        self.field_name = field_name
+        self.units = units
+        self.compact = compact
+        self.unit_codes = unit_codes
+        super(RenormalizeUnitField, self).__init__(self.forwards,
+            migrations.RunPython.noop, atomic=atomic, hints=hints,
+            elidable=elidable)
+
+    def deconstruct(self):
+        kwargs = {
+            'model_name': self.model_name,
+            'field_name': self.field_name,
+            'units': self.units,
+        }
+        if self.compact:
+            kwargs['compact'] = self.compact
+        if self.unit_codes is not None:
+            kwargs['unit_codes'] = self.unit_codes
+        return (self.__class__.__qualname__, [],
+            _get_run_python_kwargs(self, kwargs))
+
+    def forwards(self, apps, schema_editor):
+        model = apps.get_model(self.app_label, self.model_name)
+        registry = _get_registry(self.units)
+        unit_codes = self.unit_codes
+        if unit_codes is None and self.compact:
+            unit_codes = registry.codes
+        renormalize_queryset(model._default_manager.all(), self.field_name,
+            registry, unit_codes)
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+            to_state):
+        self.app_label = app_label
+        super(RenormalizeUnitField, self).database_forwards(
+            app_label, schema_editor, from_state, to_state)
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+parses quantities given as strings, like "12,5 mm²" or "3.2 kN·m", into
+their number and the id of a unit of a family, e.g.:
+
+parse_quantity(u'12,5 mm²', UNITS_SQUARE_MEASURE)
+    ---> UnitValue(12.5, u'mm²', 1.25e-05)
+parse_many([u'1.5 km', u'20cm'], UNITS_LENGTH)
+    ---> ([1.5, 20.0], [u'km', u'cm'])
+"""
+from functools import lru_cache
+from itertools import repeat
+from operator import contains, itemgetter
+from django.core.signals import setting_changed
+from django.utils.formats import get_format
+from django.utils.translation import get_language
+from unit_field.units import UnitValue, get_registry
+from unit_field.utils import sanitize_separators
+import re
+
+__all__ = ('parse_quantity', 'parse_many', 'resolve_unit', )
+
+TOKEN_CACHE_SIZE = 4096
+
+_quantity = re.compile(
+    r'^\s*([-+]?(?:\d[\d.,\'\u00a0\u202f]*)?\d(?:[eE][-+]?\d+)?)?'
+    r'\s*(.*?)\s*$', re.DOTALL)
+
+# spellings of the same unit, e.g. the greek small letter mu (μ) and the
+# micro sign (µ), both are used in the unit families
+ALIASES = (
+    (u'μ', u'µ'),
+    (u'⋅', u''),
+    (u'·', u''),
+    (u'*', u''),
+    (u' ', u''),
+    (u'^2', u'²'),
+    (u'^3', u'³'),
+    (u'^4', u'⁴'),
+    (u'^5', u'⁵'),
+)
+
+def normalize_token(token):
+    for alias, replacement in ALIASES:
+        token = token.replace(alias, replacement)
+    return token
+
+@lru_cache(maxsize=64)
+def _get_aliases(registry, language):
+    aliases = {}
+    for unit in registry.units:
+        aliases.setdefault(normalize_token(unit.id), unit.id)
+    for abbrev, unit in registry.by_abbrev.items():
+        aliases.setdefault(normalize_token(abbrev), unit.id)
+    return aliases
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def _resolve(registry, language, token):
+    if token in registry:
+        return token, 1.0
+    unit = registry.get_by_abbrev(token)
+    if unit is not None:
+        return unit.id, 1.0
+    unit_id = _get_aliases(registry, language).get(normalize_token(token))
+    if unit_id is not None:
+        return unit_id, 1.0
+
+    # a compatible unit outside of the family, e.g. kN·m for Nm: the
+    # input is scaled into the base unit of the family (if it has one)
+    if registry.base_unit_id is None:
+        raise ValueError(u'unknown unit: %s' % (token, ))
+    from unit_field.dimensions import get_unit, parse_unit
+    try:
+        unit = parse_unit(token)
+        base = get_unit(registry.base_unit_id)
+    except (TypeError, ValueError):
+        unit = base = None
+    if unit is not None and unit.dimension == base.dimension and \
+            not unit.offset and not base.offset:
+        return registry.base_unit_id, unit.factor / base.factor
+    raise ValueError(u'unknown unit: %s' % (token, ))
+
+def clear_token_cache(**kwargs):
+    _resolve.cache_clear()
+    _get_aliases.cache_clear()
+
+setting_changed.connect(clear_token_cache)
+
+def resolve_unit(token, units):
+    """
+    returns (unit id, scale) for a unit token: the id of the unit of the
+    family and the scale to apply to the input (1.0 unless the token is a
+    compatible unit outside of the family). Raises a ValueError for
+    unknown units, the results are cached.
+    """
+    return _resolve(get_registry(units), get_language(), token.strip())
+
+def parse_number(number):
+    """
+    parses the number of a quantity, localized or with the decimal comma
+    of the active language (even if localization is disabled)
+    """
+    try:
+        return float(number)
+    except ValueError:
+        pass
+    try:
+        return float(sanitize_separators(number))
+    except ValueError:
+        if u'.' in number or number.count(u',') != 1 or \
+                get_format('DECIMAL_SEPARATOR', use_l10n=True) != u',':
+            raise
+    return float(number.replace(u',', u'.'))
+
+_plain = dict.fromkeys(map(ord, u'0123456789.+-eE\n'))
+
+def _is_plain(numbers):
+    """
+    whether float() accepts exactly the numbers _quantity accepts: plain
+    digits with an optional sign, decimal point and exponent, but neither
+    nan, inf and 1_000 nor a point without digits on both sides
+    """
+    joined = u'\n%s\n' % (u'\n'.join(numbers), )
+    if joined.translate(_plain):
+        return False
+    return not any(part in joined for part in
+        (u'\n.', u'.\n', u'-.', u'+.', u'.e', u'.E'))
+
+def _split(text):
+    match = _quantity.match(text)
+    if match is None or match.group(1) is None:
+        raise ValueError(u'invalid quantity: %s' % (text, ))
+    return match.groups()
+
+def _parse(text, registry, language):
+    number, token = _split(text)
+    unit_id, scale = _resolve(registry, language, token)
+    input = parse_number(number)
+    if scale != 1.0:
+        input = input * scale
+    return input, unit_id
+
+def parse_quantity(text, units=None):
+    """
+    splits a quantity into its number and unit. With a unit family, the
+    unit is resolved to a unit id of the family and the normalized value
+    is calculated. Raises a ValueError for invalid quantities.
+    """
+    if units is None:
+        number, token = _split(text)
+        return UnitValue(parse_number(number), token)
+
+    registry = get_registry(units)
+    input, unit_id = _parse(text, registry, get_language())
+    return UnitValue(input, unit_id, registry.to_base(input, unit_id))
+
+def parse_many(texts, units):
+    """
+    parses a batch of quantities and returns the list of inputs and the
+    list of unit ids, both None for invalid quantities. Every distinct
+    unit token is resolved once, the numbers are converted in one pass.
+    """
+    texts = list(texts)
+    registry = get_registry(units)
+    language = get_language()
+
+    # the common case "<number> <unit>" is split without a regex, if every
+    # text contains exactly one space, the whole batch is split at once
+    parts = u' '.join(texts).split(u' ')
+    if len(parts) == 2 * len(texts) and \
+            all(map(contains, texts, repeat(u' '))):
+        numbers = parts[0::2]
+        tokens = parts[1::2]
+    else:
+        parts = [text.partition(u' ') for text in texts]
+        numbers = list(map(itemgetter(0), parts))
+        tokens = list(map(itemgetter(2), parts))
+    resolved = {}
+    for token in set(tokens):
+        try:
+            resolved[token] = _resolve(registry, language, token)
+        except ValueError:
+            resolved[token] = (None, None)
+
+    if all(scale == 1.0 for unit_id, scale in resolved.values()) and \
+            _is_plain(numbers):
+        try:
+            inputs = list(map(float, numbers))
+        except ValueError:
+            pass
+        else:
+            unit_ids = dict((token, unit_id)
+                for token, (unit_id, scale) in resolved.items())
+            return inputs, list(map(unit_ids.__getitem__, tokens))
+
+    # any other spelling is parsed one by one, like by parse_quantity
+    inputs = []
+    unit_ids = []
+    for text in texts:
+        try:
+            input, unit_id = _parse(text, registry, language)
+        except ValueError:
+            input = unit_id = None
+        inputs.append(input)
+        unit_ids.append(unit_id)
+    return inputs, unit_ids
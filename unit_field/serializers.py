@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+fields for the Django REST framework (requires djangorestframework), e.g.:
+
+class EngineSerializer(serializers.ModelSerializer):
+    cubic_capacity = UnitValueField()
+
+    class Meta:
+        model = Engine
+        fields = ('id', 'cubic_capacity')
+
+A UnitField is represented by its three columns, {"input": 1400.0,
+"unit": "cm³", "value": 0.0014}. The value is normalized to the base unit
+or converted into the unit given as unit=u'l' or requested through the
+serializer context, e.g. context={'units': {'cubic_capacity': u'l'}}.
+Both {"input": ..., "unit": ...} and quantities like "1.4 l" are accepted.
+"""
+from django.utils import six
+from rest_framework import serializers
+from unit_field.parsing import parse_quantity
+from unit_field.units import UnitValue
+
+__all__ = ('UnitValueField', )
+
+class UnitValueField(serializers.Field):
+    default_error_messages = {
+        'invalid': u'Enter a quantity or an object with input and unit.',
+        'unit': u'"{unit}" is not a valid unit.',
+    }
+
+    def __init__(self, unit=None, **kwargs):
+        self.unit = unit
+        super(UnitValueField, self).__init__(**kwargs)
+
+    @property
+    def unit_field(self):
+        model = self.parent.Meta.model
+        return model._meta.get_field(self.source)
+
+    def get_unit(self):
+        units = self.context.get('units') or {}
+        return units.get(self.field_name, self.unit)
+
+    def to_representation(self, value):
+        unit_id = self.get_unit()
+        normalized = value.value
+        if unit_id is not None and normalized is not None:
+            normalized = self.unit_field.registry.from_base(
+                normalized, unit_id)
+        return {'input': value.input, 'unit': value.unit,
+            'value': normalized}
+
+    def to_internal_value(self, data):
+        registry = self.unit_field.registry
+        if isinstance(data, six.string_types):
+            try:
+                value = parse_quantity(data, self.unit_field.units)
+            except ValueError:
+                self.fail('invalid')
+            return value
+        try:
+            input = float(data['input'])
+            unit_id = data['unit']
+        except (KeyError, TypeError, ValueError):
+            self.fail('invalid')
+        if not isinstance(unit_id, six.string_types) or \
+                unit_id not in registry:
+            self.fail('unit', unit=unit_id)
+        return UnitValue(input, unit_id, registry.to_base(input, unit_id))
@@ -15,15 +15,25 @@
                 return (Math.round(value * _d) / _d);
             };
 
+            // the factor of the selected unit, rendered as data-factor
+            // by the UnitSelect widget (formerly the value itself)
+            var currentFactor = function() {
+                var factor = $unit.find('option:selected').data('factor');
+                if (factor === undefined) {
+                    factor = $unit.val();
+                }
+                return parseFloat(factor);
+            };
+
             var saveCurrentUnit = function() {
-                $input.data('current-unit', $unit.val());
+                $input.data('current-unit', currentFactor());
                 $input.data('current-input', $input.val());
             };
 
             var updateUnit = function() {
                 var old_input = parseFloat($input.data('current-input'));
                 var old_unit  = parseFloat($input.data('current-unit'));
-                var new_unit  = parseFloat($unit.val());
+                var new_unit  = currentFactor();
 
                 $input.val(preventFloatOszillation(
                     old_input * old_unit / new_unit, 15));
@@ -1,6 +1,83 @@
 # -*- encoding: utf-8 -*-
-from django.test import TestCase
-from unit_field.units import Unit, UnitValue, get_choices
+import asyncio
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import uuid
+from django.core.exceptions import ValidationError
+from django.db import connection, models
+from unittest import mock, skipIf
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import translation
+from unit_field.utils import (get_separators, sanitize_many,
+    sanitize_separators)
+from django.apps import apps
+from django.core.management import CommandError, call_command
+from django.db.migrations.state import ModelState, ProjectState
+from django.db.migrations.writer import MigrationWriter
+from django.db.models import Avg, Q
+from django.utils.six import StringIO
+from unit_field.importers import UnitImporter, read_csv
+from unit_field.expressions import (ConvertTo, UnitAvg, UnitMax, UnitMin,
+    UnitSum, normalize_expression)
+from unit_field.fields import LengthField, TemperatureField
+from unit_field.managers import UnitManager
+from unit_field.models import UnitModelMixin
+from unit_field.encoders import UnitEncoder
+try:
+    from rest_framework import serializers as rest_serializers
+    from unit_field import serializers as unit_serializers
+except ImportError:
+    unit_serializers = None
+try:
+    import pyarrow
+    from unit_field.arrow import ArrowExporter, ArrowImporter, \
+        read_unit_metadata
+except ImportError:
+    pyarrow = None
+from unit_field.parsing import parse_many, parse_quantity, resolve_unit
+from unit_field.operations import (ConvertUnitCodes, RenormalizeUnitField,
+    iter_pk_ranges)
+from unit_field.management.commands import renormalize_units
+from unit_field import aio, dimensions, forms as unit_forms, parsing, units
+from unit_field.units import (Unit, UnitValue, get_choices, get_registry,
+    get_converter, convert_unit, convert_array, UNITS_LENGTH,
+    UNITS_TEMPERATURE)
+from unit_field.validators import (validate_gte, validate_lt,
+    validate_gte_many, validate_lte_many, validate_lt_queryset)
+
+class Measurement(UnitModelMixin, models.Model):
+    length = LengthField(verbose_name=u'length')
+    temperature = TemperatureField(verbose_name=u'temperature')
+
+    objects = UnitManager()
+
+class CompactMeasurement(models.Model):
+    length = LengthField(verbose_name=u'length', compact=True,
+        store_input=False)
+    temperature = TemperatureField(verbose_name=u'temperature', compact=True)
+
+    objects = UnitManager()
+
+class IndexedMeasurement(models.Model):
+    site = models.IntegerField()
+    length = LengthField(verbose_name=u'length', unit_index=True,
+        index_with=[('site', )], covering=True, partial_indexes=[u'mm'])
+
+class SiteMeasurement(Measurement):
+    site = models.IntegerField(default=0)
+
+class UUIDMeasurement(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4)
+    length = LengthField(verbose_name=u'length')
+
+    objects = UnitManager()
+
+class CompactIndexedMeasurement(models.Model):
+    length = LengthField(verbose_name=u'length', compact=True,
+        partial_indexes=[u'mm'])
 
 class UnitTest(TestCase):
     def test_attribute_factor(self):
@@ -33,21 +110,29 @@ class UnitTest(TestCase):
 class UnitValueTest(TestCase):
     def test_attribute_input(self):
         """
-        the attribtue "input" can be set
+        the attribtue "input" is read-only
         """
         e = UnitValue(7.1, 0.01)
         self.assertEqual(e.input, 7.1)
-        e.input = 4
-        self.assertEqual(e.input, 4)
+        with self.assertRaises(AttributeError):
+            e.input = 4
 
     def test_attribute_unit(self):
         """
-        the attribtue "input" can be set
+        the attribtue "unit" is read-only
         """
-        e = UnitValue(7.1, 0.01)
-        self.assertEqual(e.unit, 0.01)
-        e.unit = 0.1
-        self.assertEqual(e.unit, 0.1)
+        e = UnitValue(7.1, u'cm')
+        self.assertEqual(e.unit, u'cm')
+        with self.assertRaises(AttributeError):
+            e.unit = u'dm'
+
+    def test_slots(self):
+        """
+        a UnitValue has no instance dict
+        """
+        self.assertFalse(hasattr(UnitValue(7.1, u'cm'), '__dict__'))
+        self.assertEqual(UnitValue(7.1, u'cm', 0.071),
+            UnitValue(7.1, u'cm', 0.071))
 
     def test_property_value(self):
         """
@@ -79,3 +164,1358 @@ class UnitValueTest(TestCase):
 
         b = [(0.001, 'mm'), (0.01, 'cm'), (0.1, 'dm')]
         self.assertEqual(get_choices(a), b)
+
+class UnitRegistryTest(TestCase):
+    def test_get_registry_is_cached(self):
+        """
+        the registry of a unit family is only built once
+        """
+        self.assertIs(get_registry(UNITS_LENGTH), get_registry(UNITS_LENGTH))
+
+    def test_lookups(self):
+        """
+        units can be looked up by id and abbreviation
+        """
+        registry = get_registry(UNITS_LENGTH)
+        self.assertEqual(registry.get(u'cm').label, u'centimetre')
+        self.assertEqual(registry.get_by_abbrev(u'km').id, u'km')
+        self.assertIsNone(registry.get(u'foo'))
+        self.assertEqual(registry.base_unit_id, u'm')
+
+    def test_to_base(self):
+        """
+        values are normalized by factor or by conversion function
+        """
+        self.assertAlmostEqual(
+            get_registry(UNITS_LENGTH).to_base(2.5, u'km'), 2500.0)
+        self.assertAlmostEqual(
+            get_registry(UNITS_TEMPERATURE).to_base(212.0, u'°F'), 100.0)
+        self.assertIsNone(get_registry(UNITS_LENGTH).to_base(1.0, u'foo'))
+
+    def test_convert_unit(self):
+        """
+        conversions between two units of a family use the precomputed factors
+        """
+        self.assertAlmostEqual(
+            convert_unit(1.5, UNITS_LENGTH, u'km', u'cm'), 150000.0)
+        self.assertEqual(convert_unit(3, UNITS_LENGTH, u'mm', u'mm'), 3)
+        self.assertAlmostEqual(
+            convert_unit(212.0, UNITS_TEMPERATURE, u'°F', u'°C'), 100.0)
+        self.assertRaises(ValueError,
+            convert_unit, 1.0, UNITS_LENGTH, u'foo', u'm')
+
+class LazyUnitsTest(TestCase):
+    def test_get_units(self):
+        """
+        unit families are built once and exposed as module attributes
+        """
+        self.assertIs(units.get_units('UNITS_MASS'), units.UNITS_MASS)
+        self.assertIn('UNITS_MASS', units.get_family_names())
+        self.assertRaises(AttributeError, units.get_units, 'UNITS_FOO')
+
+    def test_choices(self):
+        """
+        the choices of a family are built on first access
+        """
+        self.assertEqual(units.UNITS_MASS_CHOICES[0][0], u'µg')
+        self.assertIs(units.UNITS_MASS_CHOICES, units.UNITS_MASS_CHOICES)
+
+    def test_field_units(self):
+        """
+        unit fields resolve their family lazily
+        """
+        self.assertIs(LengthField.units, UNITS_LENGTH)
+
+class ConverterTest(TestCase):
+    def test_matrix(self):
+        """
+        every family has a precomputed conversion matrix
+        """
+        registry = get_registry(UNITS_LENGTH)
+        self.assertEqual(len(registry.matrix), len(UNITS_LENGTH))
+        row = registry.matrix[registry.index[u'km']]
+        self.assertAlmostEqual(row[registry.index[u'cm']], 100000.0)
+        self.assertIsNone(get_registry(UNITS_TEMPERATURE).matrix[1][0])
+
+    def test_converter(self):
+        """
+        converters are memoized and convert by a single multiplication
+        """
+        convert = get_converter(UNITS_LENGTH, u'km', u'm')
+        self.assertIs(convert, get_converter(UNITS_LENGTH, u'km', u'm'))
+        self.assertAlmostEqual(convert(1.5), 1500.0)
+        self.assertAlmostEqual(get_converter(UNITS_LENGTH, u'cm')(5), 0.05)
+        self.assertAlmostEqual(
+            get_converter(UNITS_TEMPERATURE, u'°F', u'°C')(212.0), 100.0)
+        self.assertRaises(ValueError, get_converter, UNITS_LENGTH, u'foo')
+
+    def test_validators(self):
+        """
+        the validators compare the normalized values
+        """
+        validate_lt(10, u'mm', 2, u'cm', UNITS_LENGTH)
+        self.assertRaises(ValidationError,
+            validate_lt, 10, u'mm', 1, u'cm', UNITS_LENGTH)
+        self.assertRaises(ValidationError,
+            validate_gte, 1, u'foo', 1, u'cm', UNITS_LENGTH)
+
+    def test_widget(self):
+        """
+        the unit select renders the factor of every unit
+        """
+        field = Measurement._meta.get_field('length_unit')
+        html = field.formfield().widget.render('length_unit', u'cm')
+        self.assertIn(u'value="km" data-factor="1000.0"', html)
+
+class ChoicesCacheTest(TestCase):
+    def setUp(self):
+        unit_forms.clear_choices_cache()
+
+    def test_choices(self):
+        """
+        the choices of a family are translated once per language
+        """
+        field = Measurement._meta.get_field('length_unit')
+        choices = field.get_choices(include_blank=False)
+        self.assertIn((u'mm', u'mm'), choices)
+        self.assertEqual(len(choices), len(UNITS_LENGTH))
+        self.assertIs(unit_forms.get_unit_choices(UNITS_LENGTH),
+            unit_forms.get_unit_choices(UNITS_LENGTH))
+
+    def test_options(self):
+        """
+        the rendered options are cached per family, language and selection
+        """
+        widget = Measurement._meta.get_field('length_unit').formfield().widget
+        html = widget.render('length_unit', u'cm')
+        self.assertIn(u'<option value="cm" data-factor="0.01" selected>', html)
+        size = len(unit_forms._cache)
+        self.assertEqual(widget.render('length_unit', u'cm'), html)
+        self.assertEqual(len(unit_forms._cache), size)
+        self.assertIn(u'<option value="m" data-factor="1.0" selected>',
+            widget.render('length_unit', u'm'))
+        self.assertEqual(len(unit_forms._cache), size + 1)
+
+    def test_renderer(self):
+        """
+        the select is rendered by the template of the form renderer
+        """
+        widget = Measurement._meta.get_field('length_unit').formfield().widget
+        renderer = mock.Mock()
+        renderer.render.return_value = u'<select></select>'
+        self.assertEqual(widget.render('length_unit', u'cm',
+            renderer=renderer), u'<select></select>')
+        template_name, context = renderer.render.call_args[0][:2]
+        self.assertEqual(template_name, widget.template_name)
+        options = context['widget']['optgroups'][0][1]
+        self.assertEqual(options[0]['attrs']['data-factor'],
+            repr(widget.factors[options[0]['value']]))
+
+    def test_bounded(self):
+        """
+        the least recently used entries are dropped
+        """
+        size, unit_forms.OPTIONS_CACHE_SIZE = unit_forms.OPTIONS_CACHE_SIZE, 2
+        try:
+            widget = Measurement._meta.get_field(
+                'length_unit').formfield().widget
+            for unit_id in (u'mm', u'cm', u'm'):
+                widget.render('length_unit', unit_id)
+        finally:
+            unit_forms.OPTIONS_CACHE_SIZE = size
+        self.assertEqual(len(unit_forms._cache), 2)
+
+    def test_setting_changed(self):
+        """
+        the cache is cleared when the translations change
+        """
+        unit_forms.get_unit_choices(UNITS_LENGTH)
+        with override_settings(LANGUAGES=[('en', 'English')]):
+            self.assertEqual(len(unit_forms._cache), 0)
+
+class AffineTest(TestCase):
+    def test_compiled(self):
+        """
+        every affine unit carries (scale, offset) and its inverse
+        """
+        fahrenheit = get_registry(UNITS_TEMPERATURE).get(u'°F')
+        scale, offset = fahrenheit.inverse
+        self.assertAlmostEqual(scale * 100.0 + offset, 212.0)
+        self.assertEqual(get_registry(UNITS_LENGTH).get(u'km').affine,
+            (1000.0, 0.0))
+
+    def test_opaque_function(self):
+        """
+        a conversion function is never replaced by an affine pair, even if
+        it looks affine at a few points
+        """
+        family = [
+            Unit(u'a', u'a', u'a', 1.0),
+            Unit(u'b', u'b', u'b', None,
+                to_base_function=lambda x: x + x * (x - 1) * (x - 1000),
+                from_base_function=lambda x: x),
+        ]
+        registry = get_registry(family)
+        self.assertIsNone(registry.get(u'b').affine)
+        self.assertIsNone(registry.get_affine(u'b'))
+        self.assertEqual(registry.to_base(2.0, u'b'), 2.0 - 1996.0)
+        self.assertEqual(list(convert_array([2.0], [u'b'], None, family)),
+            [2.0 - 1996.0])
+
+    def test_convert(self):
+        """
+        conversions between affine units are a single a * x + b
+        """
+        registry = get_registry(UNITS_TEMPERATURE)
+        self.assertAlmostEqual(registry.convert(100.0, u'°C', u'°F'), 212.0)
+        self.assertAlmostEqual(registry.from_base(0.0, u'°F'), 32.0)
+        result = convert_array([100.0, 212.0], [u'°C', u'°F'], u'°F',
+            UNITS_TEMPERATURE)
+        self.assertAlmostEqual(result[0], 212.0)
+        self.assertAlmostEqual(result[1], 212.0)
+
+    def test_function_pair(self):
+        """
+        units which are not affine convert by their pair of functions
+        """
+        family = [
+            Unit(u'W', u'W', u'watt', 1.0),
+            Unit(u'mW', u'mW', u'milliwatt', 0.001),
+            Unit(u'dBm', u'dBm', u'decibel-milliwatts', None,
+                to_base_function=lambda x: 10 ** (x / 10.0) / 1000.0,
+                from_base_function=lambda x: 10 * math.log10(x * 1000.0)),
+        ]
+        registry = get_registry(family)
+        self.assertIsNone(registry.get_affine(u'dBm'))
+        self.assertAlmostEqual(registry.convert(30.0, u'dBm', u'mW'), 1000.0)
+        self.assertAlmostEqual(registry.convert(1.0, u'W', u'dBm'), 30.0)
+        self.assertAlmostEqual(registry.from_base(0.001, u'dBm'), 0.0)
+        self.assertRaises(ValueError, registry.converter, u'W', u'foo')
+
+class DimensionTest(TestCase):
+    def test_dimension(self):
+        """
+        units are combined by their dimension vectors
+        """
+        self.assertEqual(dimensions.NEWTON.dimension,
+            dimensions.Dimension(kg=1, m=1, s=-2))
+        self.assertEqual(dimensions.WATT.dimension,
+            (dimensions.JOULE / dimensions.SECOND).dimension)
+        self.assertEqual(dimensions.get_unit(u'kN').factor, 1000.0)
+        self.assertIs(dimensions.get_unit(u'kN'), dimensions.get_unit(u'kN'))
+        self.assertRaises(ValueError, dimensions.get_unit, u'foo')
+
+    def test_convert(self):
+        """
+        units of the same dimension convert by a precomputed factor
+        """
+        self.assertAlmostEqual(dimensions.convert(1.5, u'kN', u'N'), 1500.0)
+        self.assertAlmostEqual(dimensions.convert(1, u'kWh', u'MJ'), 3.6)
+        self.assertAlmostEqual(dimensions.convert(2, u'km²', u'm²'), 2e6)
+        self.assertAlmostEqual(dimensions.convert(0, u'°C', u'K'), 273.15)
+        self.assertRaises(ValueError, dimensions.convert, 1, u'N', u'W')
+
+    def test_derived_families(self):
+        """
+        derived families keep the ids of the former hand-written lists
+        """
+        self.assertEqual([(unit.id, unit.abbrev, unit.label)
+                for unit in units.UNITS_FORCE][:2],
+            [(u'N', u'N', u'Newton'), (u'kN', u'kN', u'Kilonewton')])
+        self.assertEqual(units.UNITS_POWER[0].id, u'W')
+        self.assertEqual(units.UNITS_POWER[0].label, u'watt')
+        self.assertEqual([unit.id for unit in units.UNITS_HEAT_CONDUCTANCE],
+            [u'W/(mK)'])
+        registry = get_registry(units.UNITS_ENERGY)
+        self.assertEqual(registry.base_unit_id, u'J')
+        self.assertAlmostEqual(registry.convert(1, u'kWh', u'kJ'), 3600.0)
+        self.assertRaises(ValueError, dimensions.derive_family,
+            dimensions.NEWTON, extra=(dimensions.WATT, ))
+
+class ParseTest(TestCase):
+    def test_parse_quantity(self):
+        """
+        the number is split from the unit, which is resolved in the family
+        """
+        with translation.override('de'):
+            value = parse_quantity(u'12,5 mm²', units.UNITS_SQUARE_MEASURE)
+        self.assertEqual((value.input, value.unit), (12.5, u'mm²'))
+        self.assertAlmostEqual(value.value, 0.0000125)
+        value = parse_quantity(u' 20cm ', UNITS_LENGTH)
+        self.assertEqual((value.input, value.unit), (20.0, u'cm'))
+        self.assertEqual(parse_quantity(u'-1.5e3 foo').unit, u'foo')
+        self.assertRaises(ValueError, parse_quantity, u'mm', UNITS_LENGTH)
+        self.assertRaises(ValueError, parse_quantity, u'1 foo', UNITS_LENGTH)
+
+    def test_aliases(self):
+        """
+        both spellings of micro and composite units are accepted
+        """
+        self.assertEqual(parse_quantity(u'3 µm', UNITS_LENGTH).unit, u'μm')
+        self.assertEqual(parse_quantity(u'3 μA',
+            units.UNITS_ELECTRIC_CURRENT).unit, u'µA')
+        self.assertEqual(parse_quantity(u'3 m^2',
+            units.UNITS_SQUARE_MEASURE).unit, u'm²')
+        value = parse_quantity(u'3.2 kN·m', units.UNITS_TORQUE)
+        self.assertEqual((value.input, value.unit), (3200.0, u'Nm'))
+
+    def test_parse_many(self):
+        """
+        batches return the inputs and unit ids, None for invalid quantities
+        """
+        self.assertEqual(parse_many([u'1.5 km', u'20 cm'], UNITS_LENGTH),
+            ([1.5, 20.0], [u'km', u'cm']))
+        with translation.override('de'):
+            self.assertEqual(parse_many([u'1.5 km', u'20cm', u'x m',
+                    u'3 foo', u'12,5 mm'], UNITS_LENGTH),
+                ([1.5, 20.0, None, None, 12.5],
+                [u'km', u'cm', None, None, u'mm']))
+        # texts with more than one space are split one by one
+        self.assertEqual(parse_many([u'1 km', u'2 k m'], UNITS_LENGTH),
+            ([1.0, 2.0], [u'km', u'km']))
+
+    def test_parse_many_like_parse_quantity(self):
+        """
+        batches accept exactly the numbers single quantities accept
+        """
+        texts = [u'nan mm', u'inf mm', u'1_000 mm', u'.5 mm', u'5. mm',
+            u'-1.5e3 mm', u'+2 mm']
+        expected = []
+        for text in texts:
+            try:
+                value = parse_quantity(text, UNITS_LENGTH)
+                expected.append((value.input, value.unit))
+            except ValueError:
+                expected.append((None, None))
+        inputs, unit_ids = parse_many(texts, UNITS_LENGTH)
+        self.assertEqual(list(zip(inputs, unit_ids)), expected)
+        for text, result in zip(texts, expected):
+            self.assertEqual(parse_many([text, u'1 mm'], UNITS_LENGTH)[1][0],
+                result[1])
+        self.assertEqual(expected[-2:], [(-1500.0, u'mm'), (2.0, u'mm')])
+
+    @override_settings(USE_L10N=False)
+    def test_decimal_comma(self):
+        """
+        a single comma is only a decimal separator in languages using it
+        """
+        with translation.override('en'):
+            self.assertRaises(ValueError, parse_quantity, u'1,234 mm',
+                UNITS_LENGTH)
+        with translation.override('de'):
+            self.assertEqual(parse_quantity(u'1,234 mm', UNITS_LENGTH).input,
+                1.234)
+
+    def test_without_base_unit(self):
+        """
+        families without a base unit only accept their own units
+        """
+        self.assertRaises(ValueError, parse_quantity, u'5 km',
+            units.UNITS_LENGTH_SMALL)
+        self.assertEqual(parse_many([u'5 km'], units.UNITS_LENGTH_SMALL),
+            ([None], [None]))
+
+    def test_cache(self):
+        """
+        resolved unit tokens are cached
+        """
+        resolve_unit(u'km', UNITS_LENGTH)
+        hits = parsing._resolve.cache_info().hits
+        self.assertEqual(resolve_unit(u'km', UNITS_LENGTH), (u'km', 1.0))
+        self.assertEqual(parsing._resolve.cache_info().hits, hits + 1)
+
+class SanitizeTest(TestCase):
+    @override_settings(USE_L10N=True, USE_THOUSAND_SEPARATOR=True)
+    def test_sanitize_separators(self):
+        """
+        separators are sanitized according to the active language
+        """
+        with translation.override('de'):
+            self.assertEqual(sanitize_separators(u'1.234,5'), u'1234.5')
+            self.assertEqual(sanitize_separators(u'1.5'), u'1.5')
+        with translation.override('en'):
+            self.assertEqual(sanitize_separators(u'1,234.5'), u'1234.5')
+        self.assertEqual(sanitize_separators(1.5), 1.5)
+
+    @override_settings(USE_L10N=False, DECIMAL_SEPARATOR=u'.')
+    def test_setting_changed(self):
+        """
+        the cached separators are invalidated when a setting changes
+        """
+        with translation.override('en'):
+            self.assertEqual(get_separators()[0], u'.')
+            with override_settings(DECIMAL_SEPARATOR=u','):
+                self.assertEqual(get_separators()[0], u',')
+
+    @override_settings(USE_L10N=True, USE_THOUSAND_SEPARATOR=True)
+    def test_sanitize_many(self):
+        """
+        many values can be sanitized at once
+        """
+        with translation.override('de'):
+            self.assertEqual(sanitize_many([u'1.234,5', 2.0, u'3']),
+                [u'1234.5', 2.0, u'3'])
+
+class ConvertArrayTest(TestCase):
+    def assertConverted(self, result, expected):
+        self.assertEqual(len(result), len(expected))
+        for value, expected_value in zip(result, expected):
+            if expected_value is None:
+                self.assertTrue(value is None or value != value)
+            else:
+                self.assertAlmostEqual(value, expected_value)
+
+    def test_mixed_units(self):
+        """
+        a column of values in mixed units is converted into one unit
+        """
+        result = convert_array([1, 20, 3, 4], [u'km', u'cm', u'km', u'foo'],
+            u'm', UNITS_LENGTH)
+        self.assertConverted(result, [1000.0, 0.2, 3000.0, None])
+
+    def test_single_unit(self):
+        """
+        a single unit id applies to all values
+        """
+        result = convert_array([1, 2], u'mm', u'cm', UNITS_LENGTH)
+        self.assertConverted(result, [0.1, 0.2])
+
+    def test_function_units(self):
+        """
+        function based units are converted by their function
+        """
+        result = convert_array([212.0, 5.0, 32.0], [u'°F', u'°C', u'°F'],
+            u'°C', UNITS_TEMPERATURE)
+        self.assertConverted(result, [100.0, 5.0, 0.0])
+
+    def test_without_numpy(self):
+        """
+        without NumPy a list is returned
+        """
+        _numpy, units._numpy = units._numpy, False
+        try:
+            result = convert_array([1, 20, 212.0], [u'km', u'foo', u'km'],
+                u'm', UNITS_LENGTH)
+        finally:
+            units._numpy = _numpy
+        self.assertIsInstance(result, list)
+        self.assertConverted(result, [1000.0, None, 212000.0])
+
+    def test_to_base(self):
+        """
+        without a target unit the values are normalized to the base unit
+        """
+        result = convert_array([1, 20, 212.0], [u'km', u'cm', u'foo'],
+            None, UNITS_LENGTH)
+        self.assertConverted(result, [1000.0, 0.2, None])
+
+    def test_missing_units(self):
+        """
+        missing units are treated like unknown units
+        """
+        self.assertConverted(convert_array([1, 2], [u'km', None], u'm',
+            UNITS_LENGTH), [1000.0, None])
+        self.assertEqual(validate_lte_many([1, 2], [u'km', None], 5, u'km',
+            UNITS_LENGTH), [1])
+
+class ValidateManyTest(TestCase):
+    def test_arrays(self):
+        """
+        the offending positions or keys of a whole column are returned,
+        unknown units are always reported
+        """
+        values, unit_ids = [5, 20, 1, 3], [u'mm', u'cm', u'km', u'foo']
+        self.assertEqual(validate_lte_many(values, unit_ids, 10, u'cm',
+            UNITS_LENGTH), [1, 2, 3])
+        self.assertEqual(validate_gte_many(values, unit_ids, 10, u'cm',
+            UNITS_LENGTH, keys=[u'a', u'b', u'c', u'd']), [u'a', u'd'])
+
+    def test_without_numpy(self):
+        """
+        without NumPy the values are compared one by one
+        """
+        _numpy, units._numpy = units._numpy, False
+        try:
+            result = validate_lte_many([5, 20, 3], [u'mm', u'cm', u'foo'],
+                10, u'cm', UNITS_LENGTH)
+        finally:
+            units._numpy = _numpy
+        self.assertEqual(result, [1, 2])
+
+    def test_queryset(self):
+        """
+        querysets are validated in the database and return the pks
+        """
+        Measurement.objects.bulk_create_from_values('length',
+            [(1, u'mm'), (5, u'cm'), (2, u'm')])
+        pks = validate_lt_queryset(Measurement.objects.order_by('pk'),
+            'length', 5, u'cm')
+        self.assertEqual(pks, list(Measurement.objects.filter(
+            length_unit__in=[u'cm', u'm']).order_by('pk').values_list(
+                'pk', flat=True)))
+
+class BulkTest(TestCase):
+    def test_save(self):
+        """
+        a single save still computes the normalized values in pre_save
+        """
+        m = Measurement.objects.create(length_input=2.0, length_unit=u'km',
+            temperature_input=212.0, temperature_unit=u'°F')
+        m = Measurement.objects.get(pk=m.pk)
+        self.assertAlmostEqual(m.length_value, 2000.0)
+        self.assertAlmostEqual(m.temperature_value, 100.0)
+
+    def test_bulk_create(self):
+        """
+        bulk_create computes the normalized values of all instances
+        """
+        Measurement.objects.bulk_create([
+            Measurement(length_input=5, length_unit=u'cm'),
+            Measurement(length_input=u'7.5', length_unit=u'mm'),
+            Measurement(length_input=1, length_unit=u'foo'),
+        ])
+        values = Measurement.objects.order_by('pk').values_list(
+            'length_value', flat=True)
+        self.assertEqual([round(v, 6) for v in values], [0.05, 0.0075, 0.0])
+
+    def test_pre_save_skipped(self):
+        """
+        pre_save does not normalize the instances of bulk_create again,
+        but a later change of the input is normalized on save
+        """
+        objs = [Measurement(length_input=i, length_unit=u'cm')
+            for i in range(10)]
+        with mock.patch.object(units.UnitRegistry, 'to_base') as to_base:
+            Measurement.objects.bulk_create(objs)
+        self.assertEqual(to_base.call_count, 0)
+        self.assertEqual(Measurement.objects.filter(
+            length_value=0.09).count(), 1)
+
+        m = Measurement.objects.get(length_input=9)
+        Measurement.objects.normalize([m])
+        m.length_input = 20
+        m.save()
+        self.assertEqual(Measurement.objects.get(pk=m.pk).length_value, 0.2)
+
+    def test_bulk_create_from_values(self):
+        """
+        instances can be created from (input, unit) tuples
+        """
+        Measurement.objects.bulk_create_from_values('length',
+            [(1, u'km'), (20, u'dm')], temperature_input=10.0)
+        self.assertEqual(
+            sorted(Measurement.objects.values_list('length_value', flat=True)),
+            [2.0, 1000.0])
+        self.assertEqual(Measurement.objects.filter(
+            temperature_value=10.0).count(), 2)
+
+    def test_bulk_update(self):
+        """
+        bulk_update recomputes the normalized value of changed fields
+        """
+        m = Measurement.objects.create(length_input=1, length_unit=u'm')
+        m.length_unit = u'km'
+        Measurement.objects.bulk_update([m], ['length_unit'])
+        self.assertEqual(
+            Measurement.objects.get(pk=m.pk).length_value, 1000.0)
+
+class ConvertToTest(TestCase):
+    def setUp(self):
+        Measurement.objects.bulk_create([
+            Measurement(length_input=1500, length_unit=u'm',
+                temperature_input=100, temperature_unit=u'°C'),
+            Measurement(length_input=0.5, length_unit=u'km',
+                temperature_input=32, temperature_unit=u'°F'),
+        ])
+
+    def test_annotate(self):
+        """
+        the stored value is converted into the requested unit in SQL
+        """
+        values = Measurement.objects.annotate(
+            length_km=ConvertTo('length', u'km')).order_by(
+            'length_km').values_list('length_km', flat=True)
+        self.assertEqual([round(v, 6) for v in values], [0.5, 1.5])
+
+    def test_affine_unit(self):
+        """
+        affine units like °F are converted with scale and offset
+        """
+        values = Measurement.objects.annotate(
+            temperature_f=ConvertTo('temperature', u'°F')).order_by(
+            'pk').values_list('temperature_f', flat=True)
+        self.assertEqual([round(v, 6) for v in values], [212.0, 32.0])
+
+    def test_aggregate(self):
+        """
+        converted values can be aggregated in the database
+        """
+        result = Measurement.objects.aggregate(
+            avg=Avg(ConvertTo('length', u'cm')))
+        self.assertAlmostEqual(result['avg'], 100000.0)
+
+    def test_unknown_unit(self):
+        """
+        unknown units are rejected
+        """
+        self.assertRaises(ValueError, Measurement.objects.annotate,
+            length_foo=ConvertTo('length', u'foo'))
+
+class UnitAggregateTest(TestCase):
+    def setUp(self):
+        Measurement.objects.bulk_create([
+            Measurement(length_input=1500, length_unit=u'm',
+                temperature_input=100, temperature_unit=u'°C'),
+            Measurement(length_input=0.5, length_unit=u'km',
+                temperature_input=0, temperature_unit=u'°C'),
+            Measurement(length_input=20, length_unit=u'cm',
+                temperature_input=32, temperature_unit=u'°F'),
+        ])
+
+    def test_aggregate(self):
+        """
+        aggregates are computed in SQL and returned in the requested unit
+        """
+        result = Measurement.objects.aggregate(UnitSum('length', unit=u'km'),
+            UnitMin('length', unit=u'cm'), maximum=UnitMax('length'))
+        self.assertAlmostEqual(result['length__sum'], 2.0002)
+        self.assertAlmostEqual(result['length__min'], 20.0)
+        self.assertAlmostEqual(result['maximum'], 1500.0)
+
+    def test_affine_unit(self):
+        """
+        the offset of an affine unit is applied once per row
+        """
+        result = Measurement.objects.aggregate(
+            total=UnitSum('temperature', unit=u'°F'),
+            average=UnitAvg('temperature', unit=u'°F'))
+        self.assertAlmostEqual(result['total'], 212.0 + 32.0 + 32.0)
+        self.assertAlmostEqual(result['average'], (212.0 + 32.0 + 32.0) / 3)
+
+    def test_grouped(self):
+        """
+        grouped aggregation returns one converted result per group
+        """
+        rows = Measurement.objects.values('temperature_unit').annotate(
+            length=UnitSum('length', unit=u'm')).order_by('temperature_unit')
+        self.assertEqual([(row['temperature_unit'], round(row['length'], 6))
+            for row in rows], [(u'°C', 2000.0), (u'°F', 0.2)])
+
+    def test_unknown_unit(self):
+        """
+        unknown units are rejected
+        """
+        self.assertRaises(ValueError, Measurement.objects.aggregate,
+            UnitSum('length', unit=u'foo'))
+
+class LookupTest(TestCase):
+    def setUp(self):
+        Measurement.objects.bulk_create_from_values('length',
+            [(1, u'mm'), (5, u'cm'), (2, u'm'), (3, u'km')])
+
+    def test_comparison(self):
+        """
+        bounds with a unit are compared with the normalized values
+        """
+        qs = Measurement.objects.all()
+        self.assertEqual(qs.filter(length__gte=UnitValue(5, u'cm')).count(), 3)
+        self.assertEqual(qs.filter(length__gt=UnitValue(5, u'cm')).count(), 2)
+        self.assertEqual(qs.filter(length__lt=UnitValue(2, u'm')).count(), 2)
+        self.assertEqual(qs.filter(length__lte=UnitValue(2, u'm')).count(), 3)
+        self.assertEqual(qs.filter(length=UnitValue(200, u'cm')).count(), 1)
+        self.assertEqual(qs.filter(length__gte=1.0).count(), 2)
+
+    def test_range_and_in(self):
+        """
+        range and in lookups convert every value
+        """
+        qs = Measurement.objects.all()
+        self.assertEqual(qs.filter(length__range=(
+            UnitValue(1, u'mm'), UnitValue(2000, u'mm'))).count(), 3)
+        self.assertEqual(qs.filter(length__in=[
+            UnitValue(1, u'mm'), UnitValue(3000, u'm')]).count(), 2)
+
+    def test_uses_value_column(self):
+        """
+        the lookup is executed on the "_value" column
+        """
+        sql = str(Measurement.objects.filter(
+            length__gte=UnitValue(1, u'km')).query)
+        self.assertIn('"length_value" >= 1000.0', sql)
+
+    def test_unknown_unit(self):
+        """
+        unknown units are rejected
+        """
+        self.assertRaises(ValueError, Measurement.objects.filter,
+            length__gte=UnitValue(1, u'foo'))
+
+class DescriptorTest(TestCase):
+    def test_get(self):
+        """
+        reading the field returns the cached UnitValue
+        """
+        m = Measurement(length_input=2.5, length_unit=u'km')
+        self.assertEqual(m.length, UnitValue(2.5, u'km', 2500.0))
+        self.assertIs(m.length, m.length)
+
+    def test_invalidation(self):
+        """
+        the cached UnitValue is invalidated when input or unit change
+        """
+        m = Measurement(length_input=2.5, length_unit=u'km')
+        first = m.length
+        m.length_unit = u'm'
+        self.assertEqual(m.length.value, 2.5)
+        m.length_input = 4.0
+        self.assertEqual(m.length.value, 4.0)
+        self.assertIsNot(first, m.length)
+
+    def test_set(self):
+        """
+        assigning a UnitValue sets all three columns
+        """
+        m = Measurement(length=UnitValue(3, u'cm'))
+        self.assertEqual(m.length_input, 3)
+        self.assertEqual(m.length_unit, u'cm')
+        self.assertAlmostEqual(m.length_value, 0.03)
+        m.save()
+        self.assertAlmostEqual(
+            Measurement.objects.get(pk=m.pk).length.value, 0.03)
+
+    def test_multi_table_inheritance(self):
+        """
+        a child model uses the columns in the table of its parent
+        """
+        self.assertEqual([field.name for field in
+            SiteMeasurement._meta.local_fields],
+            ['measurement_ptr', 'site'])
+        field = SiteMeasurement._meta.get_field('length')
+        self.assertIs(field.value_field,
+            Measurement._meta.get_field('length_value'))
+        SiteMeasurement.objects.create(length=UnitValue(2, u'km'),
+            temperature=UnitValue(20, u'°C'))
+        m = SiteMeasurement.objects.get(length__gte=UnitValue(1, u'km'))
+        self.assertEqual(m.length.value, 2000.0)
+        self.assertEqual(Measurement.objects.get().length_value, 2000.0)
+        self.assertEqual(list(SiteMeasurement.objects.annotate(
+            length_km=ConvertTo('length', u'km')).values_list(
+            'length_km', flat=True)), [2.0])
+        self.assertEqual([name for name, field in
+            ModelState.from_model(SiteMeasurement).fields],
+            ['measurement_ptr', 'site'])
+
+    def test_full_clean(self):
+        """
+        an unknown unit is reported by the unit column on validation
+        """
+        m = Measurement(length_input=1, length_unit=u'foo',
+            temperature_input=20, temperature_unit=u'°C')
+        with self.assertRaises(ValidationError) as context:
+            m.full_clean()
+        self.assertIn('length_unit', context.exception.message_dict)
+
+class ImportTest(TestCase):
+    CSV = (u'length,unit,temperature\n'
+        u'1.5,km,20\n'
+        u'3,foo,20\n'
+        u'x,m,20\n'
+        u'25,cm,30\n')
+
+    def test_importer(self):
+        """
+        rows are imported in chunks, invalid rows are rejected
+        """
+        importer = UnitImporter(Measurement, {
+                'length': ('length', 'unit'),
+            }, chunk_size=2)
+        chunks = list(importer.run(read_csv(StringIO(self.CSV))))
+        self.assertEqual([chunk.created for chunk in chunks], [1, 1])
+        self.assertEqual([row.line for chunk in chunks
+            for row in chunk.rejected], [2, 3])
+        self.assertEqual(
+            sorted(Measurement.objects.values_list('length_value', flat=True)),
+            [0.25, 1500.0])
+
+    def test_missing_cells(self):
+        """
+        short rows and null cells are rejected, not the whole chunk
+        """
+        importer = UnitImporter(Measurement, {'length': ('value', 'unit')})
+        chunks = list(importer.run(read_csv(StringIO(
+            u'unit,value\nmm,1\nmm\ncm,3\n'))))
+        self.assertEqual(chunks[0].created, 2)
+        self.assertEqual([row.line for row in chunks[0].rejected], [2])
+        chunks = list(importer.run([{'unit': u'mm', 'value': None}]))
+        self.assertEqual(chunks[0].created, 0)
+        self.assertEqual(str(chunks[0].rejected[0].reason), u'missing number')
+
+    def test_command(self):
+        """
+        the management command reports the imported rows
+        """
+        path = os.path.join(tempfile.mkdtemp(), 'export.csv')
+        with open(path, 'w') as f:
+            f.write(self.CSV)
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_units', 'unit_field.Measurement', path,
+            field=['length:length:unit'], stdout=stdout, stderr=stderr)
+        self.assertIn(u'2 rows imported, 2 rows rejected', stdout.getvalue())
+        self.assertIn(u'line 2 rejected: unknown unit: foo', stderr.getvalue())
+        self.assertEqual(Measurement.objects.count(), 2)
+
+    def test_command_unknown_field(self):
+        """
+        only UnitFields of the model can be imported
+        """
+        for field in ['foo:length:unit', 'id:length:unit']:
+            with self.assertRaisesMessage(CommandError,
+                    u'unknown unit field: %s' % (field.split(':')[0], )):
+                call_command('import_units', 'unit_field.Measurement',
+                    'export.csv', field=[field], stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, u'unknown column: foo'):
+            call_command('import_units', 'unit_field.Measurement',
+                'export.csv', field=['length:length:unit'], column=['foo'],
+                stdout=StringIO())
+
+class RenormalizeTest(TestCase):
+    def test_queryset(self):
+        """
+        the values are recomputed with a single UPDATE, affine units inline
+        """
+        Measurement.objects.bulk_create([
+            Measurement(length_input=5, length_unit=u'cm',
+                temperature_input=212, temperature_unit=u'°F'),
+            Measurement(length_input=2, length_unit=u'km',
+                temperature_input=20, temperature_unit=u'°C'),
+        ])
+        Measurement.objects.update(length_value=0.0, temperature_value=0.0)
+        with self.assertNumQueries(1):
+            self.assertEqual(Measurement.objects.renormalize('length'), 2)
+        Measurement.objects.filter(length_unit=u'km').renormalize(
+            'temperature')
+        self.assertEqual(list(Measurement.objects.order_by('pk').values_list(
+            'length_value', 'temperature_value')), [(0.05, 0.0), (2000.0, 20.0)])
+        Measurement.objects.renormalize('temperature')
+        self.assertAlmostEqual(Measurement.objects.order_by('pk').values_list(
+            'temperature_value', flat=True)[0], 100.0)
+
+    def test_sql(self):
+        """
+        the normalized value is computed by CASE over the unit column
+        """
+        sql = str(Measurement.objects.annotate(value=normalize_expression(
+            'length', get_registry(UNITS_LENGTH))).query)
+        self.assertIn(u'"length_input" * CASE WHEN', sql)
+        self.assertIn(u'"length_unit" = cm THEN 0.01', sql)
+
+    def test_operation(self):
+        """
+        the migration operation recomputes the values of compact fields
+        """
+        CompactMeasurement.objects.bulk_create([
+            CompactMeasurement(temperature_input=212, temperature_unit=u'°F'),
+        ])
+        CompactMeasurement.objects.update(temperature_value=0.0)
+        operation = RenormalizeUnitField('compactmeasurement', 'temperature',
+            'UNITS_TEMPERATURE', compact=True)
+        operation.app_label = 'unit_field'
+        operation.forwards(apps, None)
+        self.assertAlmostEqual(CompactMeasurement.objects.get()
+            .temperature_value, 100.0)
+
+    def test_serialize_operations(self):
+        """
+        the operations are written into migrations with their own arguments
+        """
+        for operation in [
+                RenormalizeUnitField('compactmeasurement', 'temperature',
+                    'UNITS_TEMPERATURE', compact=True),
+                ConvertUnitCodes('measurement', 'UNITS_LENGTH',
+                    'length_unit', 'temperature_input', batch_size=2,
+                    atomic=False)]:
+            string, imports = MigrationWriter.serialize(operation)
+            namespace = {}
+            exec(u'\n'.join(sorted(imports)), namespace)
+            rebuilt = eval(string, namespace)
+            self.assertIs(type(rebuilt), type(operation))
+            self.assertEqual(rebuilt.deconstruct(), operation.deconstruct())
+
+WORKERS_SCRIPT = u"""
+import sys
+import django
+from django.conf import settings
+settings.configure(INSTALLED_APPS=['django.contrib.contenttypes',
+    'django.contrib.auth', 'unit_field'], DATABASES={'default': {
+    'ENGINE': 'django.db.backends.sqlite3', 'NAME': sys.argv[1]}})
+django.setup()
+from django.core.management import call_command
+from django.db import connection
+from unit_field.tests import Measurement
+with connection.schema_editor() as schema_editor:
+    schema_editor.create_model(Measurement)
+Measurement.objects.bulk_create_from_values('length',
+    [(i, u'cm') for i in range(21)])
+Measurement.objects.update(length_value=0.0)
+call_command('renormalize_units', 'unit_field.Measurement', workers=2,
+    batch_size=5)
+print(sorted(Measurement.objects.values_list('length_value', flat=True)))
+"""
+
+class RenormalizeCommandTest(TestCase):
+    def setUp(self):
+        Measurement.objects.bulk_create_from_values('length',
+            [(1, u'mm'), (5, u'cm'), (2, u'm'), (3, u'km')])
+        # stale values, e.g. after a factor was corrected
+        Measurement.objects.update(length_value=0.0)
+
+    def get_values(self):
+        return list(Measurement.objects.order_by('pk').values_list(
+            'length_value', flat=True))
+
+    def test_renormalize(self):
+        """
+        the values are recomputed range by range, optionally per unit
+        """
+        stdout = StringIO()
+        call_command('renormalize_units', 'unit_field.Measurement',
+            field=['length'], unit=[u'cm', u'km'], batch_size=1,
+            stdout=stdout)
+        self.assertEqual(self.get_values(), [0.0, 0.05, 0.0, 3000.0])
+        self.assertIn(u'length: 2 rows updated in 3 ranges',
+            stdout.getvalue())
+
+    def test_checkpoint(self):
+        """
+        ranges recorded in the checkpoint are skipped when resuming
+        """
+        path = os.path.join(tempfile.mkdtemp(), 'checkpoint.json')
+        options = dict(field=['length'], batch_size=2, checkpoint=path,
+            stdout=StringIO())
+        call_command('renormalize_units', 'unit_field.Measurement', **options)
+        self.assertEqual(self.get_values(), [0.001, 0.05, 2.0, 3000.0])
+
+        Measurement.objects.update(length_value=0.0)
+        call_command('renormalize_units', 'unit_field.Measurement', **options)
+        self.assertEqual(self.get_values(), [0.0] * 4)
+        call_command('renormalize_units', 'unit_field.Measurement',
+            reset=True, **options)
+        self.assertEqual(self.get_values(), [0.001, 0.05, 2.0, 3000.0])
+
+    def test_checkpoint_units(self):
+        """
+        a checkpoint only applies to runs over the same units and factors
+        """
+        path = os.path.join(tempfile.mkdtemp(), 'checkpoint.jsonl')
+        options = dict(field=['length'], batch_size=4, checkpoint=path,
+            stdout=StringIO())
+        call_command('renormalize_units', 'unit_field.Measurement',
+            **options)
+        Measurement.objects.update(length_value=0.0)
+        # the same range of primary keys, but other units
+        call_command('renormalize_units', 'unit_field.Measurement',
+            unit=[u'mm', u'km'], **options)
+        self.assertEqual(self.get_values(), [0.001, 0.0, 0.0, 3000.0])
+        with open(path) as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+        unit_field = Measurement._meta.get_field('length')
+        digest = renormalize_units.get_units_digest(unit_field, [u'km'])
+        km = get_registry(UNITS_LENGTH).affine[u'km']
+        get_registry(UNITS_LENGTH).affine[u'km'] = (1001.0, 0.0)
+        try:
+            self.assertNotEqual(renormalize_units.get_units_digest(
+                unit_field, [u'km']), digest)
+        finally:
+            get_registry(UNITS_LENGTH).affine[u'km'] = km
+
+    def test_uuid_pks(self):
+        """
+        primary keys which are no integers are split by their order
+        """
+        UUIDMeasurement.objects.bulk_create_from_values('length',
+            [(i, u'cm') for i in range(5)])
+        UUIDMeasurement.objects.update(length_value=0.0)
+        pks = sorted(UUIDMeasurement.objects.values_list('pk', flat=True))
+        self.assertEqual(list(iter_pk_ranges(UUIDMeasurement.objects.all(),
+            2)), [(pks[0], pks[1]), (pks[2], pks[3]), (pks[4], pks[4])])
+
+        path = os.path.join(tempfile.mkdtemp(), 'checkpoint.jsonl')
+        call_command('renormalize_units', 'unit_field.UUIDMeasurement',
+            batch_size=2, checkpoint=path, stdout=StringIO())
+        self.assertEqual(sorted(UUIDMeasurement.objects.values_list(
+            'length_value', flat=True)), [0.0, 0.01, 0.02, 0.03, 0.04])
+        stdout = StringIO()
+        call_command('renormalize_units', 'unit_field.UUIDMeasurement',
+            batch_size=2, checkpoint=path, stdout=stdout)
+        self.assertIn(u'in 0 ranges', stdout.getvalue())
+
+    def test_workers(self):
+        """
+        the ranges are processed by a pool of worker processes, this needs
+        a database shared by the processes (a file in a new interpreter)
+        """
+        path = os.path.join(tempfile.mkdtemp(), 'db.sqlite3')
+        output = subprocess.check_output([sys.executable, '-c',
+                WORKERS_SCRIPT, path],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            stderr=subprocess.STDOUT)
+        self.assertIn(b'length: 20 rows updated in 5 ranges', output)
+        self.assertIn(b'[0.0, 0.01, 0.02, 0.03', output)
+
+    def test_unknown_field(self):
+        """
+        only UnitFields can be renormalized
+        """
+        self.assertRaises(CommandError, call_command, 'renormalize_units',
+            'unit_field.Measurement', field=['foo'], stdout=StringIO())
+
+class AsyncTest(TransactionTestCase):
+    def run_async(self, coroutine):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            loop.close()
+
+    def test_bulk_create(self):
+        """
+        instances are normalized and created in a worker thread
+        """
+        self.run_async(aio.abulk_normalize_and_create(Measurement, [
+            Measurement(length_input=1.5, length_unit=u'km'),
+            Measurement(length_input=20, length_unit=u'cm'),
+        ]))
+        self.assertEqual(
+            sorted(Measurement.objects.values_list('length_value', flat=True)),
+            [0.2, 1500.0])
+
+    def test_importer(self):
+        """
+        sync and async iterables of rows are imported chunk by chunk
+        """
+        async def rows():
+            for row in read_csv(StringIO(ImportTest.CSV)):
+                yield row
+
+        async def run(rows):
+            importer = aio.AsyncUnitImporter(Measurement, {
+                    'length': ('length', 'unit'),
+                }, chunk_size=2)
+            return [chunk async for chunk in importer.run(rows)]
+
+        for source in (rows(), read_csv(StringIO(ImportTest.CSV))):
+            chunks = self.run_async(run(source))
+            self.assertEqual([chunk.created for chunk in chunks], [1, 1])
+            self.assertEqual([row.line for chunk in chunks
+                for row in chunk.rejected], [2, 3])
+        self.assertEqual(Measurement.objects.filter(
+            length_value=1500.0).count(), 2)
+
+class EncoderTest(TestCase):
+    def setUp(self):
+        Measurement.objects.bulk_create([
+            Measurement(length_input=1.5, length_unit=u'km',
+                temperature_input=212, temperature_unit=u'°F'),
+            Measurement(length_input=20, length_unit=u'cm',
+                temperature_input=20, temperature_unit=u'°C'),
+        ])
+
+    def test_rows(self):
+        """
+        the three columns are encoded per row, optionally converted
+        """
+        encoder = UnitEncoder(Measurement, ['length', 'temperature'],
+            units={'temperature': u'°F'}, extra=['id'])
+        with self.assertNumQueries(1):
+            rows = encoder.encode_queryset(Measurement.objects.order_by('id'))
+        self.assertEqual(rows[0]['length'],
+            {'input': 1.5, 'unit': u'km', 'value': 1500.0})
+        self.assertEqual(rows[1]['temperature']['unit'], u'°C')
+        self.assertAlmostEqual(rows[1]['temperature']['value'], 68.0)
+        self.assertIn('id', rows[0])
+
+    def test_columns(self):
+        """
+        the columnar encoding returns one list per column
+        """
+        encoder = UnitEncoder(Measurement, ['length'], units={'length': u'm'})
+        columns = encoder.encode_queryset(Measurement.objects.order_by('id'),
+            columnar=True)
+        self.assertEqual(columns['length']['unit'], [u'km', u'cm'])
+        self.assertEqual([round(value, 6) for value in
+            columns['length']['value']], [1500.0, 0.2])
+        self.assertEqual(UnitEncoder(Measurement, ['length']).encode_columns(
+            []), {'length': {'input': [], 'unit': [], 'value': []}})
+
+    def test_reconstructed_input(self):
+        """
+        without an input column the input is reconstructed
+        """
+        CompactMeasurement.objects.bulk_create([CompactMeasurement(
+            length=UnitValue(2.5, u'km'), temperature_input=1)])
+        rows = UnitEncoder(CompactMeasurement, ['length']).encode_queryset(
+            CompactMeasurement.objects.all())
+        self.assertAlmostEqual(rows[0]['length']['input'], 2.5)
+        self.assertEqual(rows[0]['length']['unit'], u'km')
+
+@skipIf(pyarrow is None, u'requires pyarrow')
+class ArrowTest(TestCase):
+    def setUp(self):
+        Measurement.objects.bulk_create([
+            Measurement(length_input=1.5, length_unit=u'km',
+                temperature_input=212, temperature_unit=u'°F'),
+            Measurement(length_input=20, length_unit=u'cm',
+                temperature_input=20, temperature_unit=u'°C'),
+            Measurement(length_input=3, length_unit=u'm',
+                temperature_input=0, temperature_unit=u'K'),
+        ])
+        self.path = os.path.join(tempfile.mkdtemp(), 'export.parquet')
+
+    def test_batches(self):
+        """
+        the unit column is dictionary encoded, the unit table is stored
+        in the schema metadata
+        """
+        exporter = ArrowExporter(Measurement, ['length'], chunk_size=2)
+        batches = list(exporter.iter_batches(
+            Measurement.objects.order_by('id')))
+        self.assertEqual([batch.num_rows for batch in batches], [2, 1])
+        unit = batches[0].column(1)
+        self.assertTrue(pyarrow.types.is_dictionary(unit.type))
+        self.assertEqual(unit.to_pylist(), [u'km', u'cm'])
+        # units outside of the family are kept
+        batch, = ArrowExporter(Measurement, ['temperature']).iter_batches(
+            Measurement.objects.order_by('id'))
+        self.assertEqual(batch.column(1).to_pylist(), [u'°F', u'°C', u'K'])
+        self.assertEqual(batches[0].column(2).to_pylist(), [1500.0, 0.2])
+        metadata = read_unit_metadata(exporter.schema)['length']
+        self.assertEqual(metadata['base_unit'], u'm')
+        self.assertIn({'id': u'km', 'scale': 1000.0, 'offset': 0.0},
+            metadata['units'])
+
+    def test_round_trip(self):
+        """
+        an exported parquet file is imported and normalized again,
+        rows with units outside of the family are rejected
+        """
+        exporter = ArrowExporter(Measurement)
+        self.assertEqual(exporter.write_parquet(
+            Measurement.objects.order_by('id'), self.path), 3)
+        Measurement.objects.all().delete()
+        chunks = list(ArrowImporter(Measurement, chunk_size=2).run(self.path))
+        self.assertEqual([chunk.created for chunk in chunks], [2, 0])
+        self.assertEqual([(row.line, row.reason) for row in chunks[1].rejected],
+            [(3, u'unknown unit: K')])
+        self.assertEqual(list(Measurement.objects.order_by('id').values_list(
+                'length_unit', 'length_value')),
+            [(u'km', 1500.0), (u'cm', 0.2)])
+        self.assertAlmostEqual(Measurement.objects.get(
+            temperature_unit=u'°F').temperature_value, 100.0)
+
+    def test_reconstructed_input(self):
+        """
+        without an input column the input is reconstructed from the value
+        """
+        CompactMeasurement.objects.bulk_create([CompactMeasurement(
+            length=UnitValue(2.5, u'km'), temperature_input=1)])
+        ArrowExporter(CompactMeasurement, ['length']).write_parquet(
+            CompactMeasurement.objects.all(), self.path)
+        CompactMeasurement.objects.all().delete()
+        list(ArrowImporter(CompactMeasurement, ['length'],
+            defaults={'temperature_input': 1}).run(self.path))
+        m = CompactMeasurement.objects.get()
+        self.assertEqual(m.length_unit, u'km')
+        self.assertAlmostEqual(m.length_value, 2500.0)
+
+@skipIf(unit_serializers is None, u'requires djangorestframework')
+class SerializerTest(TestCase):
+    def get_serializer_class(self):
+        class MeasurementSerializer(rest_serializers.ModelSerializer):
+            length = unit_serializers.UnitValueField()
+
+            class Meta:
+                model = Measurement
+                fields = ('id', 'length')
+        return MeasurementSerializer
+
+    def test_representation(self):
+        """
+        a UnitField is represented by input, unit and (converted) value
+        """
+        m = Measurement(length_input=1.5, length_unit=u'km')
+        data = self.get_serializer_class()(m,
+            context={'units': {'length': u'm'}}).data
+        self.assertEqual(dict(data['length']),
+            {'input': 1.5, 'unit': u'km', 'value': 1500.0})
+
+    def test_internal_value(self):
+        """
+        objects with input and unit as well as quantities are accepted
+        """
+        serializer_class = self.get_serializer_class()
+        serializer = serializer_class(data={'length': u'20 cm'})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        m = serializer.save()
+        self.assertEqual((m.length_input, m.length_unit), (20.0, u'cm'))
+        serializer = serializer_class(data={'length': {'input': 1,
+            'unit': u'foo'}})
+        self.assertFalse(serializer.is_valid())
+
+class UnitModelMixinTest(TestCase):
+    def test_attributes(self):
+        """
+        the attributes of every UnitField are installed on the model
+        """
+        m = Measurement(length_input=2.5, length_unit=u'km')
+        self.assertEqual(m.length_label_key, u'length')
+        self.assertEqual(m.length_label_value, u'2.5 km')
+        self.assertIn(u'<span class="readonly-label">length:</span>',
+            m.length_html)
+        self.assertIn(u'2.50 km', m.length_html)
+        self.assertFalse(hasattr(m, 'length_foo'))
+
+    def test_html_cache(self):
+        """
+        the html is cached until the input or the unit changes
+        """
+        m = Measurement(length_input=2.5, length_unit=u'km')
+        self.assertIs(m.length_html, m.length_html)
+        m.length_unit = u'm'
+        self.assertIn(u'2.50 m', m.length_html)
+        m.length_input = 3.0
+        self.assertIn(u'3.00 m', m.length_html)
+
+    def test_deferred(self):
+        """
+        deferred columns are loaded on access
+        """
+        pk = Measurement.objects.create(
+            length_input=2.5, length_unit=u'km').pk
+        m = Measurement.objects.only('pk').get(pk=pk)
+        self.assertEqual(m.length_label_value, u'2.5 km')
+        m = Measurement.objects.only('pk').get(pk=pk)
+        self.assertEqual(m.length.value, 2500.0)
+
+class CompactTest(TestCase):
+    def test_unit_code(self):
+        """
+        the unit is stored as small integer code but read as unit id
+        """
+        m = CompactMeasurement.objects.create(
+            length=UnitValue(2, u'km'), temperature=UnitValue(50, u'°F'))
+        m = CompactMeasurement.objects.get(pk=m.pk)
+        self.assertEqual(m.length_unit, u'km')
+        self.assertEqual(m.temperature_input, 50)
+        self.assertAlmostEqual(m.temperature_value, 10.0)
+        self.assertEqual(CompactMeasurement.objects.filter(
+            length_unit=u'km').count(), 1)
+        self.assertEqual(CompactMeasurement.objects.filter(
+            length_unit__in=[u'm', u'cm']).count(), 0)
+        self.assertEqual(CompactMeasurement.objects.values_list(
+            'length_unit', flat=True)[0], u'km')
+        self.assertEqual(CompactMeasurement._meta.get_field(
+            'length_unit').deconstruct()[1],
+            'django.db.models.SmallIntegerField')
+        self.assertRaises(ValueError, CompactMeasurement.objects.create,
+            length=UnitValue(2, u'foo'))
+
+    def test_migration_state(self):
+        """
+        the default of the code column survives cloning the field
+        """
+        field = dict(ModelState.from_model(CompactMeasurement).fields)[
+            'length_unit']
+        unit_field = CompactMeasurement._meta.get_field('length_unit')
+        default = unit_field.unit_codes[unit_field.default]
+        self.assertEqual(field.deconstruct()[3]['default'], default)
+        self.assertEqual(field.clone().deconstruct()[3]['default'], default)
+
+    def test_reconstructed_input(self):
+        """
+        without an input column the input is reconstructed
+        """
+        self.assertFalse(any(f.name == 'length_input'
+            for f in CompactMeasurement._meta.concrete_fields))
+        CompactMeasurement.objects.bulk_create_from_values('length',
+            [(2.5, u'km'), (30, u'cm')])
+        values = [(m.length_input, m.length_unit, m.length_value) for m in
+            CompactMeasurement.objects.order_by('pk')]
+        self.assertAlmostEqual(values[0][0], 2.5)
+        self.assertEqual(values[0][1:], (u'km', 2500.0))
+        self.assertAlmostEqual(values[1][0], 30)
+        self.assertAlmostEqual(values[1][2], 0.3)
+
+        m = CompactMeasurement.objects.order_by('pk')[0]
+        self.assertAlmostEqual(m.length.input, 2.5)
+        self.assertEqual(list(CompactMeasurement.objects.annotate(
+            length_m=ConvertTo('length', u'm')).order_by('pk').values_list(
+            'length_m', flat=True)), [2500.0, 0.3])
+
+    def test_convert_unit_codes(self):
+        """
+        the migration operation converts unit ids into codes and back
+        """
+        Measurement.objects.bulk_create_from_values('length',
+            [(1, u'km'), (2, u'mm'), (3, u'km')])
+        operation = ConvertUnitCodes('measurement', 'UNITS_LENGTH',
+            'length_unit', 'temperature_input', batch_size=2)
+        operation.app_label = 'unit_field'
+        operation.forwards(apps, None)
+        codes = get_registry(UNITS_LENGTH).codes
+        self.assertEqual(list(Measurement.objects.order_by('pk').values_list(
+            'temperature_input', flat=True)),
+            [codes[u'km'], codes[u'mm'], codes[u'km']])
+
+        Measurement.objects.update(length_unit=u'')
+        operation.backwards(apps, None)
+        self.assertEqual(list(Measurement.objects.order_by('pk').values_list(
+            'length_unit', flat=True)), [u'km', u'mm', u'km'])
+
+class IndexTest(TestCase):
+    def test_indexes(self):
+        """
+        the index options are emitted as Meta.indexes
+        """
+        indexes = IndexedMeasurement._meta.indexes
+        self.assertEqual([index.fields for index in indexes], [
+            ['length_unit', 'length_value', 'length_input'],
+            ['site', 'length_value', 'length_unit', 'length_input'],
+            ['length_value'],
+        ])
+        self.assertTrue(all(index.name for index in indexes))
+        self.assertEqual(indexes[2].condition, Q(length_unit=u'mm'))
+        self.assertEqual(Measurement._meta.indexes, [])
+
+    def test_migrations(self):
+        """
+        the indexes are part of the migration state
+        """
+        state = ModelState.from_model(IndexedMeasurement)
+        self.assertEqual(len(state.options['indexes']), 3)
+
+    def test_compact(self):
+        """
+        the partial indexes of a compact field are restricted by unit code
+        """
+        code = get_registry(UNITS_LENGTH).codes[u'mm']
+        index, = CompactIndexedMeasurement._meta.indexes
+        self.assertEqual(index.condition, Q(length_unit=code))
+
+        state = ProjectState()
+        state.add_model(ModelState.from_model(CompactIndexedMeasurement))
+        model = state.apps.get_model('unit_field', 'compactindexedmeasurement')
+        sql = str(index.create_sql(model, connection.schema_editor()))
+        self.assertIn(u'WHERE "length_unit" = %s' % (code, ), sql)
+
+    def test_index_usage(self):
+        """
+        the indexes exist in the database
+        """
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, IndexedMeasurement._meta.db_table)
+        names = set(name for name, constraint in constraints.items()
+            if constraint['index'])
+        self.assertTrue(set(index.name for index in
+            IndexedMeasurement._meta.indexes) <= names)
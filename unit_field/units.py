@@ -1,62 +1,589 @@
 # -*- coding: utf-8 -*-
-from django.utils import formats
-from django.utils.translation import ugettext_lazy as _
+from django.utils import formats, six
+from django.utils.encoding import force_text
+from django.utils.translation import get_language, ugettext_lazy as _
+from collections import OrderedDict
+from functools import partial
 import math
+import numbers
+import operator
+
+_numpy = None
+
+def get_numpy():
+    """
+    returns the numpy module or None, if NumPy is not installed.
+    NumPy is only imported on first use to keep the import time low.
+    """
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy as _numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
 
 def _label(_input, _unit):
     _input = formats.localize(_input, use_l10n=True)
     return u'%s %s' % (_input, _unit)
 
 def convert_unit(value, units, unit_id_in, unit_id_out):
-    # if units are identical
-    if unit_id_in == unit_id_out:
-        return value
-
-    #retrieve conversion factors
-    for unit in units:
-        if unit.id == unit_id_in:
-            f1 = unit.factor
-        if unit.id == unit_id_out:
-            f2 = unit.factor
+    """
+    converts a value given in unit_id_in into unit_id_out, e.g.:
+    convert_unit(1.5, UNITS_LENGTH, u'km', u'm') ---> 1500.0
+    """
+    return get_registry(units).convert(value, unit_id_in, unit_id_out)
 
-    return value * f1 / f2
+def convert_array(values, unit_ids, target_unit, units):
+    """
+    converts a whole column of values given in (possibly) different units
+    into target_unit, e.g.:
+    convert_array([1, 20], [u'km', u'cm'], u'm', UNITS_LENGTH) ---> [1000, 0.2]
+
+    unit_ids is either a sequence of unit ids (one per value) or a single
+    unit id. If target_unit is None, the values are normalized to the base
+    unit. With NumPy installed, the result is a float array and unknown
+    units result in nan, otherwise it is a list with None for unknown units.
+    """
+    registry = get_registry(units)
+    if target_unit is not None:
+        # raises a ValueError for units which cannot be converted into
+        registry.get_from_base(target_unit)
+
+    numpy = get_numpy()
+    if numpy is None:
+        if isinstance(unit_ids, six.string_types):
+            unit_ids = [unit_ids] * len(values)
+        return registry.convert_many(values, unit_ids, target_unit)
+
+    values = numpy.asarray(values, dtype=float)
+    if isinstance(unit_ids, six.string_types):
+        if unit_ids not in registry:
+            return numpy.full(values.shape, numpy.nan)
+        return registry.converter(unit_ids, target_unit)(values)
+
+    # missing units (None) cannot be sorted along with the unit ids, the
+    # empty string is no unit id either
+    unit_ids = numpy.asarray([unit_id if isinstance(unit_id, six.string_types)
+        else u'' for unit_id in unit_ids], dtype=object)
+    groups, inverse = numpy.unique(unit_ids, return_inverse=True)
+
+    # one (scale, offset) pair per distinct unit, units without an affine
+    # representation are nan here ...
+    scales = numpy.full(len(groups), numpy.nan)
+    offsets = numpy.zeros(len(groups))
+    functions = []
+    for index, unit_id in enumerate(groups):
+        affine = registry.get_affine(unit_id, target_unit)
+        if affine is not None:
+            scales[index], offsets[index] = affine
+        elif unit_id in registry:
+            functions.append(
+                (index, registry.converter(unit_id, target_unit)))
+    result = values * scales[inverse] + offsets[inverse]
+
+    # ... and are converted group by group
+    for index, function in functions:
+        mask = inverse == index
+        result[mask] = function(values[mask])
+    return result
+
+def _affine(scale, offset, value):
+    return value * scale + offset
+
+def _compose(to_base, from_base, value):
+    return from_base(to_base(value))
 
 class Unit(object):
-    def __init__(self, id, abbrev, label, factor=None, to_base_function=None):
+    """
+    a unit of a family. Values are normalized to the base unit by a factor
+    (base = factor * value), by a factor and an offset (base = factor *
+    value + offset, e.g. °F) or by a pair of functions for units which are
+    not affine. The affine representation (scale, offset) and its inverse
+    are compiled once, conversion functions are never inspected: declare
+    affine units by factor and offset.
+    """
+    def __init__(self, id, abbrev, label, factor=None, to_base_function=None,
+            from_base_function=None, offset=0.0):
         self.id  = id
         self.abbrev = abbrev
         self.label = label
         self.to_base_function = to_base_function
+        self.from_base_function = from_base_function
+        self.offset = offset
         if factor is None:
             self.factor = id
         else:
             self.factor = factor
 
-class UnitValue(object):
-    def __init__(self, input, unit):
-        self.input = input
-        self.unit = unit
+        # base = scale * value + offset and value = scale * base + offset
+        self.affine = self.compile()
+        self.inverse = None
+        if self.affine is not None:
+            scale, offset = self.affine
+            self.inverse = (1.0 / scale, -offset / scale)
+
+    def compile(self):
+        """
+        returns (scale, offset) converting into the base unit or None, if
+        the unit is not affine
+        """
+        if self.to_base_function is not None:
+            return None
+        if isinstance(self.factor, numbers.Number) and self.factor:
+            return (float(self.factor), float(self.offset))
+        return None
 
     @property
-    def value(self):
-        return self.input * self.unit
+    def is_linear(self):
+        return self.affine is not None and not self.affine[1]
+
+class UnitRegistry(object):
+    """
+    an index over a unit family (a list of units), built once per family.
+    All lookups by unit id are dict lookups instead of scans of the list.
+    """
+    def __init__(self, units):
+        self.units = units
+        self.by_id = {}
+        for unit in units:
+            # the first unit wins, just like the former linear scans
+            self.by_id.setdefault(unit.id, unit)
+
+        self.base_unit = None
+        for unit in units:
+            if unit.factor == 1.0 and not unit.offset and \
+                    not unit.to_base_function:
+                self.base_unit = unit
+                break
+
+        # unit id -> (scale, offset) with base = scale * value + offset,
+        # for all units that can be expressed this way (e.g. in SQL)
+        self.affine = dict((unit_id, unit.affine)
+            for unit_id, unit in self.by_id.items()
+            if unit.affine is not None)
+
+        # unit id -> factor, or the conversion function if the unit is
+        # not linear
+        self.factors = {}
+        for unit_id, unit in self.by_id.items():
+            if unit.is_linear:
+                self.factors[unit_id] = unit.factor
+            elif unit.affine is not None:
+                self.factors[unit_id] = partial(_affine, *unit.affine)
+            elif unit.to_base_function:
+                self.factors[unit_id] = unit.to_base_function
+            else:
+                self.factors[unit_id] = unit.factor
+
+        # the N x N conversion matrix: matrix[index[a]][index[b]] converts
+        # from unit a into unit b, None if one of them is not linear
+        self.ids = list(self.by_id)
+        self.index = dict((unit_id, i) for i, unit_id in enumerate(self.ids))
+        self.matrix = []
+        for unit_in in self.by_id.values():
+            row = []
+            for unit_out in self.by_id.values():
+                if unit_in.is_linear and unit_out.is_linear:
+                    row.append(unit_in.factor / float(unit_out.factor))
+                else:
+                    row.append(None)
+            self.matrix.append(row)
+
+        # (unit id in, unit id out) -> (scale, offset), for all pairs of
+        # affine units: every conversion is a single a * x + b
+        self.conversions = {}
+        for id_in, (scale_in, offset_in) in self.affine.items():
+            for id_out, (scale_out, offset_out) in self.affine.items():
+                self.conversions[(id_in, id_out)] = (scale_in / scale_out,
+                    (offset_in - offset_out) / scale_out)
+
+        # (unit id in, unit id out) -> factor, for all pairs of linear units
+        self.conversion_factors = dict((key, scale)
+            for key, (scale, offset) in self.conversions.items()
+            if not offset)
+
+        self._converters = {}
+
+        # small integer codes of the units for the compact storage mode,
+        # derived from the order of the family: append new units only
+        self.codes = dict((unit_id, i + 1) for i, unit_id in
+            enumerate(self.ids))
+
+        self._by_abbrev = {}
+
+    def __contains__(self, unit_id):
+        return unit_id in self.by_id
+
+    def __len__(self):
+        return len(self.by_id)
+
+    @property
+    def by_abbrev(self):
+        """
+        returns a dict of all units keyed by their (translated)
+        abbreviation in the currently active language
+        """
+        language = get_language()
+        by_abbrev = self._by_abbrev.get(language)
+        if by_abbrev is None:
+            by_abbrev = {}
+            for unit in self.units:
+                by_abbrev.setdefault(force_text(unit.abbrev), unit)
+            self._by_abbrev[language] = by_abbrev
+        return by_abbrev
+
+    @property
+    def base_unit_id(self):
+        if self.base_unit is None:
+            return None
+        return self.base_unit.id
+
+    def get(self, unit_id):
+        """
+        returns the unit with the given id or None
+        """
+        return self.by_id.get(unit_id)
+
+    def get_by_abbrev(self, abbrev):
+        """
+        returns the unit with the given abbreviation or None
+        """
+        return self.by_abbrev.get(abbrev)
+
+    def get_factor(self, unit_id):
+        """
+        returns the factor (or the conversion function) of a unit or None
+        """
+        return self.factors.get(unit_id)
+
+    def get_affine(self, unit_id_in, unit_id_out=None):
+        """
+        returns (scale, offset) converting from unit_id_in into unit_id_out
+        (or into the base unit) or None, if the conversion is not affine
+        """
+        if unit_id_out is None:
+            return self.affine.get(unit_id_in)
+        return self.conversions.get((unit_id_in, unit_id_out))
+
+    def get_to_base(self, unit_id):
+        """
+        returns a callable normalizing values of the unit
+        """
+        unit = self.by_id.get(unit_id)
+        if unit is None:
+            raise ValueError(u'unknown unit: %s' % (unit_id, ))
+        if unit.affine is not None:
+            scale, offset = unit.affine
+            if offset:
+                return partial(_affine, scale, offset)
+            return partial(operator.mul, scale)
+        if unit.to_base_function is None:
+            raise ValueError(u'cannot convert from %s' % (unit_id, ))
+        return unit.to_base_function
+
+    def get_from_base(self, unit_id):
+        """
+        returns a callable converting normalized values into the unit
+        """
+        unit = self.by_id.get(unit_id)
+        if unit is None:
+            raise ValueError(u'unknown unit: %s' % (unit_id, ))
+        if unit.inverse is not None:
+            return partial(_affine, *unit.inverse)
+        if unit.from_base_function is None:
+            raise ValueError(u'cannot convert into %s' % (unit_id, ))
+        return unit.from_base_function
+
+    def to_base(self, value, unit_id):
+        """
+        returns the value normalized to the base unit or None,
+        if the unit is unknown
+        """
+        affine = self.affine.get(unit_id)
+        if affine is not None:
+            scale, offset = affine
+            if offset:
+                return value * scale + offset
+            return value * scale
+        unit = self.by_id.get(unit_id)
+        if unit is None or unit.to_base_function is None:
+            return None
+        return unit.to_base_function(value)
+
+    def to_base_many(self, values, unit_ids):
+        """
+        normalizes a batch of values given in (possibly) different units.
+        The values are grouped by unit, so every unit is looked up once per
+        batch. Unknown units and missing values result in None.
+        """
+        return self.convert_many(values, unit_ids)
+
+    def convert_many(self, values, unit_ids, unit_id_out=None):
+        """
+        converts a batch of values given in (possibly) different units into
+        unit_id_out (or into the base unit). The values are grouped by unit,
+        so every unit is looked up once per batch. Unknown units and
+        missing values result in None.
+        """
+        groups = {}
+        for index, unit_id in enumerate(unit_ids):
+            try:
+                groups[unit_id].append(index)
+            except KeyError:
+                groups[unit_id] = [index]
+
+        result = [None] * len(values)
+        for unit_id, indexes in groups.items():
+            if unit_id not in self.by_id:
+                continue
+            function = self.converter(unit_id, unit_id_out)
+            for index in indexes:
+                value = values[index]
+                if value is not None:
+                    result[index] = function(value)
+        return result
+
+    def converter(self, unit_id_in, unit_id_out=None):
+        """
+        returns a memoized callable converting values from unit_id_in into
+        unit_id_out (or into the base unit, if unit_id_out is None).
+        For affine units the callable is a single a * x + b, e.g.:
+        get_registry(UNITS_LENGTH).converter(u'km', u'm')(1.5) ---> 1500.0
+        """
+        key = (unit_id_in, unit_id_out)
+        try:
+            return self._converters[key]
+        except KeyError:
+            pass
+
+        affine = self.get_affine(unit_id_in, unit_id_out)
+        if affine is not None:
+            scale, offset = affine
+            if offset:
+                function = partial(_affine, scale, offset)
+            else:
+                function = partial(operator.mul, scale)
+        elif unit_id_out is None:
+            function = self.get_to_base(unit_id_in)
+        else:
+            function = partial(_compose, self.get_to_base(unit_id_in),
+                self.get_from_base(unit_id_out))
+        return self._converters.setdefault(key, function)
+
+    def factors_to(self, unit_id):
+        """
+        returns a dict of the factors converting every (linear) unit of the
+        family into unit_id, i.e. one column of the conversion matrix
+        """
+        column = self.index[unit_id]
+        return dict((id_in, row[column])
+            for id_in, row in zip(self.ids, self.matrix)
+            if row[column] is not None)
+
+    def from_base(self, value, unit_id):
+        """
+        returns a normalized value converted into the unit or None,
+        if the unit is unknown or cannot be inverted
+        """
+        unit = self.by_id.get(unit_id)
+        if unit is None:
+            return None
+        if unit.inverse is not None:
+            scale, offset = unit.inverse
+            return value * scale + offset
+        if unit.from_base_function is None:
+            return None
+        return unit.from_base_function(value)
+
+    def convert(self, value, unit_id_in, unit_id_out):
+        """
+        converts a value from one unit of the family into another one
+        """
+        # if units are identical
+        if unit_id_in == unit_id_out:
+            return value
+
+        affine = self.conversions.get((unit_id_in, unit_id_out))
+        if affine is not None:
+            scale, offset = affine
+            if offset:
+                return value * scale + offset
+            return value * scale
+        return self.converter(unit_id_in, unit_id_out)(value)
+
+_registries = {}
+
+def get_converter(units, unit_id_in, unit_id_out=None):
+    """
+    returns the memoized converter of a unit family, e.g.:
+    get_converter(UNITS_LENGTH, u'km', u'm')(1.5) ---> 1500.0
+    """
+    return get_registry(units).converter(unit_id_in, unit_id_out)
+
+def get_registry(units):
+    """
+    returns the UnitRegistry of a unit family, the registry is built on
+    the first call and cached afterwards
+    """
+    try:
+        _units, registry = _registries[id(units)]
+        if _units is units:
+            return registry
+    except KeyError:
+        pass
+    registry = UnitRegistry(units)
+    _registries[id(units)] = (units, registry)
+    return registry
+
+class UnitValue(object):
+    """
+    an immutable value with a unit: the user entered data (input), the unit
+    id and the value normalized to the base unit, e.g.:
+    UnitValue(1.5, u'km', 1500.0)
+
+    If the unit is given as a plain conversion factor, the normalized value
+    is calculated: UnitValue(7.1, 0.1).value ---> 0.71
+    """
+    __slots__ = ('input', 'unit', 'value')
+
+    def __init__(self, input, unit, value=None):
+        if value is None and isinstance(unit, numbers.Number):
+            value = input * unit
+        _setattr = object.__setattr__
+        _setattr(self, 'input', input)
+        _setattr(self, 'unit', unit)
+        _setattr(self, 'value', value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(u'UnitValue is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError(u'UnitValue is immutable')
+
+    def __reduce__(self):
+        return (self.__class__, (self.input, self.unit, self.value))
+
+    def __eq__(self, other):
+        if not isinstance(other, UnitValue):
+            return NotImplemented
+        return (self.input, self.unit, self.value) == \
+            (other.input, other.unit, other.value)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def __hash__(self):
+        return hash((self.input, self.unit, self.value))
+
+    def __repr__(self):
+        return 'UnitValue(%r, %r, %r)' % (self.input, self.unit, self.value)
 
 class UnitValueCreator(object):
+    """
+    the descriptor of a UnitField: reading returns a UnitValue that is
+    cached per model instance until the input or the unit changes,
+    assigning a UnitValue sets all three columns
+    """
     def __init__(self, field):
         self.field = field
         self.input_field_name = "%s_input" % (self.field.name, )
         self.unit_field_name = "%s_unit" % (self.field.name, )
         self.value_field_name = "%s_value" % (self.field.name, )
+        self.cache_name = "_%s_cache" % (self.field.name, )
 
     def __get__(self, instance, type=None):
         if instance is None:
             return self.field
 
+        input = getattr(instance, self.input_field_name)
+        unit = getattr(instance, self.unit_field_name)
+        __dict__ = instance.__dict__
+        cached = __dict__.get(self.cache_name)
+        if cached is not None and cached.input is input and \
+                cached.unit is unit:
+            return cached
+
+        value = None
+        registry = self.field.registry
+        if registry is not None and input is not None:
+            try:
+                value = registry.to_base(float(input), unit)
+            except (TypeError, ValueError):
+                pass
+        cached = UnitValue(input, unit, value)
+        __dict__[self.cache_name] = cached
+        return cached
+
     def __set__(self, instance, value):
+        if value is instance.__dict__.get(self.cache_name):
+            # assigning the value just read, e.g. by Model.clean_fields()
+            return
         if isinstance(value, UnitValue):
-            setattr(instance, self.input_field_name, value.votes)
+            setattr(instance, self.input_field_name, value.input)
             setattr(instance, self.unit_field_name, value.unit)
-            setattr(instance, self.value_field_name, value.value)
+            normalized_value = value.value
+            if normalized_value is None:
+                normalized_value = self.field.get_normalized_value(value)
+            setattr(instance, self.value_field_name, normalized_value)
+            instance.__dict__[self.cache_name] = UnitValue(
+                value.input, value.unit, normalized_value)
+
+_families = OrderedDict()
+
+def family(name):
+    """
+    registers the function that builds the list of units of a family.
+    The list is built on first access, e.g. through
+    "from unit_field.units import UNITS_LENGTH" or get_units('UNITS_LENGTH')
+    """
+    def decorator(function):
+        _families[name] = function
+        return function
+    return decorator
+
+def get_family_names():
+    return list(_families)
+
+def get_units(name):
+    """
+    returns the list of units of a family, e.g.
+    get_units('UNITS_LENGTH'), the list is only built once
+    """
+    try:
+        return globals()[name]
+    except KeyError:
+        pass
+    try:
+        function = _families[name]
+    except KeyError:
+        raise AttributeError(u'unknown unit family: %s' % (name, ))
+    return globals().setdefault(name, function())
+
+def __getattr__(name):
+    # the unit families and their choices (e.g. UNITS_LENGTH and
+    # UNITS_LENGTH_CHOICES) are materialized on first access
+    if name.endswith('_CHOICES') and name[:-8] in _families:
+        return globals().setdefault(name, get_choices(get_units(name[:-8])))
+    if name in _families:
+        return get_units(name)
+    raise AttributeError(u'module %r has no attribute %r' % (__name__, name))
+
+class LazyUnits(object):
+    """
+    a class attribute resolving to a unit family on first access, e.g.:
+
+    class LengthField(UnitField):
+        units = LazyUnits('UNITS_LENGTH')
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, instance, type=None):
+        return get_units(self.name)
 
 def get_choices(units):
     """
@@ -68,325 +595,407 @@ def get_choices(units):
 
     return unit_choices
 
-UNITS_PERCENTAGE = [
-    Unit(u'%',      _(u'%'),    _(u'Percent'),      0.01),
-    Unit(u'1',      _(u'1'),    _(u'Whole'),        1.0),
-]
-
-UNITS_VISCOSITY = [
-    # Unit(u'kg/ms',   _(u'kg/ms'),   _(u'kg/ms' ),   1, ),
-    Unit(u'm²/s',   _(u'm²/s'),   _(u'm²/s' ),    1, ),
-    Unit(u'mm²/s',   _(u'mm²/s'),   _(u'mm²/s' ), 0.000001, ),
-]
-
-UNITS_LENGTH = [
-    Unit(u'μm',   _(u'μm'),   _(u'micrometre'),   0.000001, ),
-    Unit(u'mm',   _(u'mm'),   _(u'milimetre' ),   0.001, ),
-    Unit(u'cm',   _(u'cm'),   _(u'centimetre'),   0.01,  ),
-    Unit(u'dm',   _(u'dm'),   _(u'decimetre' ),   0.1,   ),
-    Unit(u'm',    _(u'm'),    _(u'metre'     ),   1,     ),
-    Unit(u'km',   _(u'km'),   _(u'kilometre' ),   1000,  ),
-]
-
-UNITS_LENGTH_SMALL = [
-    Unit(u'μm',   _(u'μm'),   _(u'micrometre'),  0.000001, ),
-    Unit(u'nm',   _(u'nm'),   _(u'nanometre'),   0.000000001,  ),
-    Unit(u'pm',   _(u'pm'),   _(u'pikometre'),   0.000000000001,   ),
-]
-
-UNITS_LENGTH_BRITISH = [
-    Unit(u'in',   _(u'"'),   _(u'inch' ),      0.0254, ),
-    Unit(u'ft',   _(u'ft'),  _(u'feet'),       0.3048, ),
-    Unit(u'sm',   _(u'sm'),  _(u'sm' ),     1852.0,    ),
-    Unit(u'mi',   _(u'mi'),  _(u'mi' ),     1609.344,  ),
-]
-
-UNITS_LENGTH_SCIENCE = [
-    Unit(u'AE',   _(u'AE'),   _(u'Astronomische Einheit' ), 149597870691, ),
-]
-
-UNITS_SQUARE_MEASURE = [
-    Unit(u'mm²',  _(u'mm²'),  _(u'square milimetre'),  0.000001, ),
-    Unit(u'cm²',  _(u'cm²'),  _(u'square centimetre'), 0.0001,   ),
-    Unit(u'dm²',  _(u'dm²'),  _(u'square decimetre'),  0.01,     ),
-    Unit(u'm²',   _(u'm²'),   _(u'square metre'),      1,        ),
-    Unit(u'a',    _(u'a'),    _(u'square decametre'),  100,      ),
-    Unit(u'ha',   _(u'ha'),   _(u'square hectometre'), 10000,    ),
-    Unit(u'km²',  _(u'km²'),  _(u'square kilometre'),  1000000,  ),
-]
-
-UNITS_SOLID_MEASURE = [
-    Unit(u'mm³',  _(u'mm³'),  _(u'cubic milimetre') ,  0.000000001, ),
-    Unit(u'cm³',  _(u'cm³'),  _(u'cubic centimetre'),  0.000001,    ),
-    Unit(u'dm³',  _(u'dm³'),  _(u'cubic decimetre'),   0.001,       ),
-    Unit(u'm³',   _(u'm³'),   _(u'cubic meter'),       1,           ),
-    Unit(u'dam³', _(u'dam³'), _(u'cubic decametre'),   1000,        ),
-    Unit(u'hm³',  _(u'hm³'),  _(u'cubic hectometre'),  1000000,     ),
-    Unit(u'km³',  _(u'km³'),  _(u'cubic kilometre'),   1000000000,  ),
-    Unit(u'l',    _(u'l'),    _(u'litre'),             0.001,       ),
-]
-
-UNITS_MASS = [
-    Unit(u'µg',   _(u'µg'),   _(u'microgram'),     0.000001,   ),
-    Unit(u'mg',   _(u'mg'),   _(u'milligram'),     0.001,      ),
-    Unit(u'g',    _(u'g'),    _(u'gram')     ,     1,          ),
-    Unit(u'dag',  _(u'dag'),  _(u'decagram') ,     100,        ),
-    Unit(u'kg',   _(u'kg'),   _(u'kilogram') ,     1000,       ),
-    Unit(u't',    _(u't'),    _(u'tonne')    ,     1000000,    ),
-]
-
-UNITS_TIME = [
-    Unit(u'µs',  _(u'µs'),  _(u'microseconds'), 0.000001, ),
-    Unit(u'ms',  _(u'ms'),  _(u'millisecond'),  0.001,    ),
-    Unit(u's',   _(u's'),   _(u'second'),       1,        ),
-    Unit(u'min', _(u'min'), _(u'minute'),       60,       ),
-    Unit(u'h',   _(u'h'),   _(u'hour'),         3600,     ),
-    Unit(u'd',   _(u'd'),   _(u'day'),          86400,    ),
-]
-
-UNITS_TIME2 = [
-    Unit(u'Hours',     _(u'Hours'),     _(u'Hours'),         1, ),
-    Unit(u'Days',      _(u'Days'),      _(u'Days'),         24, ),
-    Unit(u'Weeks',     _(u'Weeks'),     _(u'Weeks'),       168, ),
-    Unit(u'Months',    _(u'Months'),    _(u'Months'),      720, ),
-    Unit(u'Semesters', _(u'Semesters'), _(u'Semesters'),  4320, ),
-    Unit(u'Years',     _(u'Years'),     _(u'Years'),      8760, ),
-]
-
-UNITS_ELECTRIC_CURRENT = [
-    Unit(u'µA',  _(u'µA'),  _(u'microampere'),  0.000001, ),
-    Unit(u'mA',  _(u'mA'),  _(u'milliampere'),  0.001,    ),
-    Unit(u'A',   _(u'A'),   _(u'ampere')     ,  1,        ),
-    Unit(u'kA',  _(u'kA'),  _(u'kiloampere') ,  1000,     ),
-]
-
-UNITS_TEMPERATURE = [
-    #Unit(u'K',      _(u'K'),     _(u'kelvin'),   1 ),
-    Unit(u'°C',     _(u'°C'),    _(u'degree'),   1.0),
-    Unit(u'°F',     _(u'°F'),    _(u'fahrenheit'), 0.0,
-        to_base_function=lambda x: (x - 32.0) / 1.8),
-]
-
-UNITS_AMOUNT_OF_SUBSTANCE = [
-    Unit(u'mol',    _(u'mol'),  _(u'mole'),     1 ),
-]
-
-UNITS_LUMINOUS_INTENSITY = [
-    Unit(u'cd',     _(u'cd'),   _(u'candela'),  1 ),
-]
+@family('UNITS_PERCENTAGE')
+def _units_percentage():
+    return [
+        Unit(u'%',      _(u'%'),    _(u'Percent'),      0.01),
+        Unit(u'1',      _(u'1'),    _(u'Whole'),        1.0),
+    ]
+
+@family('UNITS_VISCOSITY')
+def _units_viscosity():
+    return [
+        # Unit(u'kg/ms',   _(u'kg/ms'),   _(u'kg/ms' ),   1, ),
+        Unit(u'm²/s',   _(u'm²/s'),   _(u'm²/s' ),    1, ),
+        Unit(u'mm²/s',   _(u'mm²/s'),   _(u'mm²/s' ), 0.000001, ),
+    ]
 
 # base units (SI system)
 
-UNITS_LENGTH_CHOICES = get_choices(UNITS_LENGTH)
-UNITS_SQUARE_MEASURE_CHOICES = get_choices(UNITS_SQUARE_MEASURE)
-UNITS_SOLID_MEASURE_CHOICES = get_choices(UNITS_SOLID_MEASURE)
-UNITS_MASS_CHOICES = get_choices(UNITS_MASS)
-UNITS_TIME_CHOICES = get_choices(UNITS_TIME)
-UNITS_TIME2_CHOICES = get_choices(UNITS_TIME2)
-UNITS_ELECTRIC_CURRENT_CHOICES = get_choices(UNITS_ELECTRIC_CURRENT)
-UNITS_TEMPERATURE_CHOICES = get_choices(UNITS_TEMPERATURE)
-UNITS_AMOUNT_OF_SUBSTANCE_CHOICES = get_choices(UNITS_AMOUNT_OF_SUBSTANCE)
-UNITS_LUMINOUS_INTENSITY_CHOICES = get_choices(UNITS_LUMINOUS_INTENSITY)
+@family('UNITS_LENGTH')
+def _units_length():
+    return [
+        Unit(u'μm',   _(u'μm'),   _(u'micrometre'),   0.000001, ),
+        Unit(u'mm',   _(u'mm'),   _(u'milimetre' ),   0.001, ),
+        Unit(u'cm',   _(u'cm'),   _(u'centimetre'),   0.01,  ),
+        Unit(u'dm',   _(u'dm'),   _(u'decimetre' ),   0.1,   ),
+        Unit(u'm',    _(u'm'),    _(u'metre'     ),   1,     ),
+        Unit(u'km',   _(u'km'),   _(u'kilometre' ),   1000,  ),
+    ]
+
+@family('UNITS_LENGTH_SMALL')
+def _units_length_small():
+    return [
+        Unit(u'μm',   _(u'μm'),   _(u'micrometre'),  0.000001, ),
+        Unit(u'nm',   _(u'nm'),   _(u'nanometre'),   0.000000001,  ),
+        Unit(u'pm',   _(u'pm'),   _(u'pikometre'),   0.000000000001,   ),
+    ]
+
+@family('UNITS_LENGTH_BRITISH')
+def _units_length_british():
+    return [
+        Unit(u'in',   _(u'"'),   _(u'inch' ),      0.0254, ),
+        Unit(u'ft',   _(u'ft'),  _(u'feet'),       0.3048, ),
+        Unit(u'sm',   _(u'sm'),  _(u'sm' ),     1852.0,    ),
+        Unit(u'mi',   _(u'mi'),  _(u'mi' ),     1609.344,  ),
+    ]
+
+@family('UNITS_LENGTH_SCIENCE')
+def _units_length_science():
+    return [
+        Unit(u'AE',   _(u'AE'),   _(u'Astronomische Einheit' ), 149597870691, ),
+    ]
+
+@family('UNITS_SQUARE_MEASURE')
+def _units_square_measure():
+    return [
+        Unit(u'mm²',  _(u'mm²'),  _(u'square milimetre'),  0.000001, ),
+        Unit(u'cm²',  _(u'cm²'),  _(u'square centimetre'), 0.0001,   ),
+        Unit(u'dm²',  _(u'dm²'),  _(u'square decimetre'),  0.01,     ),
+        Unit(u'm²',   _(u'm²'),   _(u'square metre'),      1,        ),
+        Unit(u'a',    _(u'a'),    _(u'square decametre'),  100,      ),
+        Unit(u'ha',   _(u'ha'),   _(u'square hectometre'), 10000,    ),
+        Unit(u'km²',  _(u'km²'),  _(u'square kilometre'),  1000000,  ),
+    ]
+
+@family('UNITS_SOLID_MEASURE')
+def _units_solid_measure():
+    return [
+        Unit(u'mm³',  _(u'mm³'),  _(u'cubic milimetre') ,  0.000000001, ),
+        Unit(u'cm³',  _(u'cm³'),  _(u'cubic centimetre'),  0.000001,    ),
+        Unit(u'dm³',  _(u'dm³'),  _(u'cubic decimetre'),   0.001,       ),
+        Unit(u'm³',   _(u'm³'),   _(u'cubic meter'),       1,           ),
+        Unit(u'dam³', _(u'dam³'), _(u'cubic decametre'),   1000,        ),
+        Unit(u'hm³',  _(u'hm³'),  _(u'cubic hectometre'),  1000000,     ),
+        Unit(u'km³',  _(u'km³'),  _(u'cubic kilometre'),   1000000000,  ),
+        Unit(u'l',    _(u'l'),    _(u'litre'),             0.001,       ),
+    ]
+
+@family('UNITS_MASS')
+def _units_mass():
+    return [
+        Unit(u'µg',   _(u'µg'),   _(u'microgram'),     0.000001,   ),
+        Unit(u'mg',   _(u'mg'),   _(u'milligram'),     0.001,      ),
+        Unit(u'g',    _(u'g'),    _(u'gram')     ,     1,          ),
+        Unit(u'dag',  _(u'dag'),  _(u'decagram') ,     100,        ),
+        Unit(u'kg',   _(u'kg'),   _(u'kilogram') ,     1000,       ),
+        Unit(u't',    _(u't'),    _(u'tonne')    ,     1000000,    ),
+    ]
+
+@family('UNITS_TIME')
+def _units_time():
+    return [
+        Unit(u'µs',  _(u'µs'),  _(u'microseconds'), 0.000001, ),
+        Unit(u'ms',  _(u'ms'),  _(u'millisecond'),  0.001,    ),
+        Unit(u's',   _(u's'),   _(u'second'),       1,        ),
+        Unit(u'min', _(u'min'), _(u'minute'),       60,       ),
+        Unit(u'h',   _(u'h'),   _(u'hour'),         3600,     ),
+        Unit(u'd',   _(u'd'),   _(u'day'),          86400,    ),
+    ]
+
+@family('UNITS_TIME2')
+def _units_time2():
+    return [
+        Unit(u'Hours',     _(u'Hours'),     _(u'Hours'),         1, ),
+        Unit(u'Days',      _(u'Days'),      _(u'Days'),         24, ),
+        Unit(u'Weeks',     _(u'Weeks'),     _(u'Weeks'),       168, ),
+        Unit(u'Months',    _(u'Months'),    _(u'Months'),      720, ),
+        Unit(u'Semesters', _(u'Semesters'), _(u'Semesters'),  4320, ),
+        Unit(u'Years',     _(u'Years'),     _(u'Years'),      8760, ),
+    ]
+
+@family('UNITS_ELECTRIC_CURRENT')
+def _units_electric_current():
+    return [
+        Unit(u'µA',  _(u'µA'),  _(u'microampere'),  0.000001, ),
+        Unit(u'mA',  _(u'mA'),  _(u'milliampere'),  0.001,    ),
+        Unit(u'A',   _(u'A'),   _(u'ampere')     ,  1,        ),
+        Unit(u'kA',  _(u'kA'),  _(u'kiloampere') ,  1000,     ),
+    ]
+
+@family('UNITS_TEMPERATURE')
+def _units_temperature():
+    return [
+        #Unit(u'K',      _(u'K'),     _(u'kelvin'),   1 ),
+        Unit(u'°C',     _(u'°C'),    _(u'degree'),   1.0),
+        Unit(u'°F',     _(u'°F'),    _(u'fahrenheit'), 1 / 1.8,
+            offset=-32.0 / 1.8),
+    ]
+
+@family('UNITS_AMOUNT_OF_SUBSTANCE')
+def _units_amount_of_substance():
+    return [
+        Unit(u'mol',    _(u'mol'),  _(u'mole'),     1 ),
+    ]
+
+@family('UNITS_LUMINOUS_INTENSITY')
+def _units_luminous_intensity():
+    return [
+        Unit(u'cd',     _(u'cd'),   _(u'candela'),  1 ),
+    ]
 
 # derived units
 
-UNITS_ANGLE = [
-    Unit(u'rad',    _(u'rad'),    _(u'Radians'),  1.0 ),
-    Unit(u'deg',    _(u'°'),      _(u'Degrees'),  math.pi / 180.0 ),
-    # Unit(u'grad',   _(u'grad'),   _(u'Grads'),    math.pi / 200 ),
-    Unit(u'arcmin', _(u'arcmin'), _(u'arcmin'),  math.pi / (180.0 * 60.0) ),
-    Unit(u'arcsec', _(u'arcsec'), _(u'arcsec'),  math.pi / (180.0 * 60.0 * 60.0) ),
-    Unit(u'rotation', _(u'rot.'), _(u'rot.'), 2.0 * math.pi),
-]
-
-UNITS_DENSITY = [
-    Unit(u'kg/m³',    _(u'kg/m³'),    _(u'kg/m³'),     1 ),
-    Unit(u'kg/dm³',   _(u'kg/dm³'),   _(u'kg/dm³'),    1000 ),
-]
-
-UNITS_FORCE = [
-    Unit(u'N',   _(u'N'),   _(u'Newton'),    1 ),
-    Unit(u'kN',   _(u'kN'),   _(u'Kilonewton'),    1000 ),
-]
-
-UNITS_SPEED = [
-    Unit(u'1/min',   _(u'1/min'),   _(u'rotation per minute'),    1 ),
-]
-
-UNITS_TORQUE = [
-    Unit(u'Nm',   _(u'Nm'),   _(u'Newtonmeter'),    1 ),
-]
-
-UNITS_VELOCITY = [
-    Unit(u'mm/s',   _(u'mm/s'),   _(u'milimetres per second'),  0.001 ),
-    Unit(u'm/s',    _(u'm/s'),    _(u'metres per second'),      1.0 ),
-    Unit(u'm/min',  _(u'm/min'),  _(u'metres per minute'),      1.0 / 60.0 ),
-    Unit(u'km/h',   _(u'km/h'),   _(u'kilometres per hour'),    1.0 / 3.6 ),
-]
-
-UNITS_ACCELERATION = [
-    Unit(u'm/s²',  _(u'm/s²'),  _(u'm/s²'),     1),
-]
-
-UNITS_CURRENT = [
-    Unit(u'mA',     _(u'mA'),  _(u'milli ampere'),  0.001),
-    Unit(u'A',      _(u'A'),    (u'ampere'),        1),
-]
-
-UNITS_POTENTIAL = [
-    Unit(u'V',      _(u'V'),  _(u'volt'),  1),
-]
-
-UNITS_JERK = [
-    Unit(u'm/s³',   _(u'm/s³'),     _(u'm/s³'),     1),
-]
-
-UNITS_SNAP = [
-    Unit(u'm/s⁴',   _(u'm/s⁴'),     _(u'm/s⁴'),     1),
-]
-
-UNITS_CRACKLE = [
-    Unit(u'm/s⁵',   _(u'm/s⁵'),     _(u'm/s⁵'),     1),
-]
-
-UNITS_INERTIA_TORQUE = [
-    Unit(u'kgm²',   _(u'kgm²'),     _(u'kgm²'),     1 ),
-    Unit(u'kgcm²',  _(u'kgcm²'),    _(u'kgcm²'),    0.0001 ),
-    Unit(u'kgmm²',  _(u'kgmm²'),    _(u'kgmm²'),    0.000001 ),
-]
-
-UNITS_TORSION = [
-    Unit(u'Nm/arcmin',  _(u'Nm/arcmin'),    _(u'Nm/arcmin'),    1),
-]
-
-UNITS_ANGLE_VELOCITY = [
-    Unit(u'rad/s',    _(u'rad/s'),    _(u'Radians/s'),  1 ),
-    Unit(u'deg/s',    _(u'°/s'),      _(u'Degrees/s'),  math.pi / 180 ),
-    Unit(u'rps',      _(u'rps'),      _(u'rps'), (math.pi * 2.0)),
-    Unit(u'rpm',      _(u'rpm'),      _(u'rpm'), (math.pi * 2.0) / 60.0),
-]
-
-UNITS_ANGLE_ACCELERATION = [
-    Unit(u'rad/s²',    _(u'rad/s²'),    _(u'Radians/s²'),  1 ),
-    Unit(u'deg/s²',    _(u'°/s²'),      _(u'Degrees/s²'),  math.pi / 180 ),
-    Unit(u'rps²',      _(u'rps²'),      _(u'rps²'), 1.0 / (math.pi * 2.0)),
-    Unit(u'rpm²',      _(u'rpm²'),      _(u'rps²'), (math.pi * 2.0) / 3600.0),
-]
-
-UNITS_ANGLE_JERK = [
-    Unit(u'rad/s³',    _(u'rad/s³'),    _(u'Radians/s³'),  1 ),
-    Unit(u'deg/s³',    _(u'°/s³'),      _(u'Degrees/s³'),  math.pi / 180 ),
-    Unit(u'rps³',      _(u'rps³'),      _(u'rps³'), 1.0 / (math.pi * 2.0)),
-    Unit(u'rpm³',      _(u'rpm³'),      _(u'rpm³'),
-        (math.pi * 2.0) / (60.0 * 60.0 * 60.0)),
-]
+@family('UNITS_ANGLE')
+def _units_angle():
+    return [
+        Unit(u'rad',    _(u'rad'),    _(u'Radians'),  1.0 ),
+        Unit(u'deg',    _(u'°'),      _(u'Degrees'),  math.pi / 180.0 ),
+        # Unit(u'grad',   _(u'grad'),   _(u'Grads'),    math.pi / 200 ),
+        Unit(u'arcmin', _(u'arcmin'), _(u'arcmin'),  math.pi / (180.0 * 60.0) ),
+        Unit(u'arcsec', _(u'arcsec'), _(u'arcsec'),  math.pi / (180.0 * 60.0 * 60.0) ),
+        Unit(u'rotation', _(u'rot.'), _(u'rot.'), 2.0 * math.pi),
+    ]
+
+@family('UNITS_DENSITY')
+def _units_density():
+    return [
+        Unit(u'kg/m³',    _(u'kg/m³'),    _(u'kg/m³'),     1 ),
+        Unit(u'kg/dm³',   _(u'kg/dm³'),   _(u'kg/dm³'),    1000 ),
+    ]
+
+@family('UNITS_FORCE')
+def _units_force():
+    from unit_field.dimensions import NEWTON, derive_family
+    return derive_family(NEWTON, prefixes=(u'', u'k', u'm', u'M'), labels={
+        u'N':  (_(u'N'),  _(u'Newton')),
+        u'kN': (_(u'kN'), _(u'Kilonewton')),
+        u'mN': (_(u'mN'), _(u'Millinewton')),
+        u'MN': (_(u'MN'), _(u'Meganewton')),
+    })
+
+@family('UNITS_SPEED')
+def _units_speed():
+    return [
+        Unit(u'1/min',   _(u'1/min'),   _(u'rotation per minute'),    1 ),
+    ]
+
+@family('UNITS_TORQUE')
+def _units_torque():
+    return [
+        Unit(u'Nm',   _(u'Nm'),   _(u'Newtonmeter'),    1 ),
+    ]
+
+@family('UNITS_VELOCITY')
+def _units_velocity():
+    return [
+        Unit(u'mm/s',   _(u'mm/s'),   _(u'milimetres per second'),  0.001 ),
+        Unit(u'm/s',    _(u'm/s'),    _(u'metres per second'),      1.0 ),
+        Unit(u'm/min',  _(u'm/min'),  _(u'metres per minute'),      1.0 / 60.0 ),
+        Unit(u'km/h',   _(u'km/h'),   _(u'kilometres per hour'),    1.0 / 3.6 ),
+    ]
+
+@family('UNITS_ACCELERATION')
+def _units_acceleration():
+    return [
+        Unit(u'm/s²',  _(u'm/s²'),  _(u'm/s²'),     1),
+    ]
+
+@family('UNITS_CURRENT')
+def _units_current():
+    return [
+        Unit(u'mA',     _(u'mA'),  _(u'milli ampere'),  0.001),
+        Unit(u'A',      _(u'A'),    (u'ampere'),        1),
+    ]
+
+@family('UNITS_POTENTIAL')
+def _units_potential():
+    return [
+        Unit(u'V',      _(u'V'),  _(u'volt'),  1),
+    ]
+
+@family('UNITS_JERK')
+def _units_jerk():
+    return [
+        Unit(u'm/s³',   _(u'm/s³'),     _(u'm/s³'),     1),
+    ]
+
+@family('UNITS_SNAP')
+def _units_snap():
+    return [
+        Unit(u'm/s⁴',   _(u'm/s⁴'),     _(u'm/s⁴'),     1),
+    ]
+
+@family('UNITS_CRACKLE')
+def _units_crackle():
+    return [
+        Unit(u'm/s⁵',   _(u'm/s⁵'),     _(u'm/s⁵'),     1),
+    ]
+
+@family('UNITS_INERTIA_TORQUE')
+def _units_inertia_torque():
+    return [
+        Unit(u'kgm²',   _(u'kgm²'),     _(u'kgm²'),     1 ),
+        Unit(u'kgcm²',  _(u'kgcm²'),    _(u'kgcm²'),    0.0001 ),
+        Unit(u'kgmm²',  _(u'kgmm²'),    _(u'kgmm²'),    0.000001 ),
+    ]
+
+@family('UNITS_TORSION')
+def _units_torsion():
+    return [
+        Unit(u'Nm/arcmin',  _(u'Nm/arcmin'),    _(u'Nm/arcmin'),    1),
+    ]
+
+@family('UNITS_ANGLE_VELOCITY')
+def _units_angle_velocity():
+    return [
+        Unit(u'rad/s',    _(u'rad/s'),    _(u'Radians/s'),  1 ),
+        Unit(u'deg/s',    _(u'°/s'),      _(u'Degrees/s'),  math.pi / 180 ),
+        Unit(u'rps',      _(u'rps'),      _(u'rps'), (math.pi * 2.0)),
+        Unit(u'rpm',      _(u'rpm'),      _(u'rpm'), (math.pi * 2.0) / 60.0),
+    ]
+
+@family('UNITS_ANGLE_ACCELERATION')
+def _units_angle_acceleration():
+    return [
+        Unit(u'rad/s²',    _(u'rad/s²'),    _(u'Radians/s²'),  1 ),
+        Unit(u'deg/s²',    _(u'°/s²'),      _(u'Degrees/s²'),  math.pi / 180 ),
+        Unit(u'rps²',      _(u'rps²'),      _(u'rps²'), 1.0 / (math.pi * 2.0)),
+        Unit(u'rpm²',      _(u'rpm²'),      _(u'rps²'), (math.pi * 2.0) / 3600.0),
+    ]
+
+@family('UNITS_ANGLE_JERK')
+def _units_angle_jerk():
+    return [
+        Unit(u'rad/s³',    _(u'rad/s³'),    _(u'Radians/s³'),  1 ),
+        Unit(u'deg/s³',    _(u'°/s³'),      _(u'Degrees/s³'),  math.pi / 180 ),
+        Unit(u'rps³',      _(u'rps³'),      _(u'rps³'), 1.0 / (math.pi * 2.0)),
+        Unit(u'rpm³',      _(u'rpm³'),      _(u'rpm³'),
+            (math.pi * 2.0) / (60.0 * 60.0 * 60.0)),
+    ]
     #Unit(u'grad/s³',   _(u'grad/s³'),   _(u'Grads/s³'),    math.pi / 200 ),
 
-UNITS_ANGLE_SNAP = [
-    Unit(u'rad/s⁴',    _(u'rad/s⁴'),    _(u'Radians/s⁴'),  1 ),
-    Unit(u'deg/s⁴',    _(u'°/s⁴'),      _(u'Degrees/s⁴'),  math.pi / 180 ),
-    #Unit(u'grad/s⁴',   _(u'grad/s⁴'),   _(u'Grads/s⁴'),    math.pi / 200 ),
-    Unit(u'rps⁴',      _(u'rps⁴'),      _(u'rps⁴'), 1.0 / (math.pi * 2.0)),
-    Unit(u'rpm⁴',      _(u'rpm⁴'),      _(u'rpm⁴'),
-        (math.pi * 2.0) / (60.0 * 60.0 * 60.0 * 60.0)),
-]
-
-UNITS_ANGLE_CRACKLE = [
-    Unit(u'rad/s⁵',    _(u'rad/s⁵'),    _(u'Radians/s⁵'),  1 ),
-    Unit(u'deg/s⁵',    _(u'°/s⁵'),      _(u'Degrees/s⁵'),  math.pi / 180 ),
-    #Unit(u'grad/s⁵',   _(u'grad/s⁵'),   _(u'Grads/s⁵'),    math.pi / 200 ),
-    Unit(u'rps⁵',      _(u'rps⁵'),      _(u'rps⁵'), 1.0 / (math.pi * 2.0)),
-    Unit(u'rpm⁵',      _(u'rpm⁵'),      _(u'rpm⁵'),
-        (math.pi * 2.0) / (60.0 * 60.0 * 60.0 * 60.0 * 60.0)),
-]
-
+@family('UNITS_ANGLE_SNAP')
+def _units_angle_snap():
+    return [
+        Unit(u'rad/s⁴',    _(u'rad/s⁴'),    _(u'Radians/s⁴'),  1 ),
+        Unit(u'deg/s⁴',    _(u'°/s⁴'),      _(u'Degrees/s⁴'),  math.pi / 180 ),
+        #Unit(u'grad/s⁴',   _(u'grad/s⁴'),   _(u'Grads/s⁴'),    math.pi / 200 ),
+        Unit(u'rps⁴',      _(u'rps⁴'),      _(u'rps⁴'), 1.0 / (math.pi * 2.0)),
+        Unit(u'rpm⁴',      _(u'rpm⁴'),      _(u'rpm⁴'),
+            (math.pi * 2.0) / (60.0 * 60.0 * 60.0 * 60.0)),
+    ]
+
+@family('UNITS_ANGLE_CRACKLE')
+def _units_angle_crackle():
+    return [
+        Unit(u'rad/s⁵',    _(u'rad/s⁵'),    _(u'Radians/s⁵'),  1 ),
+        Unit(u'deg/s⁵',    _(u'°/s⁵'),      _(u'Degrees/s⁵'),  math.pi / 180 ),
+        #Unit(u'grad/s⁵',   _(u'grad/s⁵'),   _(u'Grads/s⁵'),    math.pi / 200 ),
+        Unit(u'rps⁵',      _(u'rps⁵'),      _(u'rps⁵'), 1.0 / (math.pi * 2.0)),
+        Unit(u'rpm⁵',      _(u'rpm⁵'),      _(u'rpm⁵'),
+            (math.pi * 2.0) / (60.0 * 60.0 * 60.0 * 60.0 * 60.0)),
+    ]
 
 # Electric Units
 
-UNITS_POWER = [
-    Unit(u'W',   _(u'W'),     _(u'watt'),     1),
-]
+@family('UNITS_POWER')
+def _units_power():
+    from unit_field.dimensions import WATT, derive_family
+    return derive_family(WATT, prefixes=(u'', u'm', u'k', u'M'), labels={
+        u'W':  (_(u'W'),  _(u'watt')),
+        u'mW': (_(u'mW'), _(u'milliwatt')),
+        u'kW': (_(u'kW'), _(u'kilowatt')),
+        u'MW': (_(u'MW'), _(u'megawatt')),
+    })
+
+@family('UNITS_ENERGY')
+def _units_energy():
+    from unit_field.dimensions import JOULE, WATT_HOUR, derive_family
+    return derive_family(JOULE, prefixes=(u'', u'k', u'M'),
+        extra=(WATT_HOUR, WATT_HOUR.prefixed(u'k')), labels={
+            u'J':   (_(u'J'),   _(u'joule')),
+            u'kJ':  (_(u'kJ'),  _(u'kilojoule')),
+            u'MJ':  (_(u'MJ'),  _(u'megajoule')),
+            u'Wh':  (_(u'Wh'),  _(u'watt hour')),
+            u'kWh': (_(u'kWh'), _(u'kilowatt hour')),
+        })
+
+@family('UNITS_PRESSURE')
+def _units_pressure():
+    from unit_field.dimensions import BAR, PASCAL, derive_family
+    return derive_family(PASCAL, prefixes=(u'', u'h', u'k', u'M'),
+        extra=(BAR, ), labels={
+            u'Pa':  (_(u'Pa'),  _(u'pascal')),
+            u'hPa': (_(u'hPa'), _(u'hectopascal')),
+            u'kPa': (_(u'kPa'), _(u'kilopascal')),
+            u'MPa': (_(u'MPa'), _(u'megapascal')),
+            u'bar': (_(u'bar'), _(u'bar')),
+        })
 
 # Wärmewiderstand
-UNITS_THERMAL_RESISTANCE = [
-    Unit(u'K/W',   _(u'K/W'),     _(u'K/W'),     1),
-]
+@family('UNITS_THERMAL_RESISTANCE')
+def _units_thermal_resistance():
+    return [
+        Unit(u'K/W',   _(u'K/W'),     _(u'K/W'),     1),
+    ]
 
 # Wärmedurchgangswiderstand
-UNITS_HEAT_TRANSFER_RESISTANCE = [
-    Unit(u'w/(m²K)',   _(u'w/(m²K)'),     _(u'W/(m²K)'),     1),
-]
+@family('UNITS_HEAT_TRANSFER_RESISTANCE')
+def _units_heat_transfer_resistance():
+    return [
+        Unit(u'w/(m²K)',   _(u'w/(m²K)'),     _(u'W/(m²K)'),     1),
+    ]
 
 # Wärmeleitfähigkeit
-UNITS_HEAT_CONDUCTANCE = [
-    Unit(u'W/(mK)',   _(u'W/(mK)'),     _(u'W/(mK)'),     1),
-]
-
-UNITS_HEAT_CAPACITY = [
-    Unit(u'Ws/K',   _(u'Ws/K'),     _(u'Ws/K'),     1),
-]
-
-UNITS_SPECIFIC_HEAT_CAPACITY = [
-    Unit(u'Ws/(kgK)',   _(u'Ws/(kgK)'),     _(u'Ws/(kgK)'),     1),
-]
-
-UNITS_MOTOR_CONSTANT = [
-    Unit(u'Nm/W^(1/2)',   _(u'Nm/W^(1/2)'),     _(u'Nm/W^(1/2)'),     1),
-]
-
-UNITS_FORCE_CONSTANT = [
-    Unit(u'N/A',   _(u'N/A'),     _(u'N/A'),     1),
-]
-
-UNITS_POTENTIAL_CONSTANT = [
-    Unit(u'Vs/m',   _(u'Vs/m'),     _(u'Vs/m'),     1),
-]
-
-UNITS_ELECTRICAL_TIME_CONSTANT = [
-    Unit(u'ms',   _(u'ms'),     _(u'ms'),     1),
-]
-
-UNITS_ELECTRICAL_RESISTANCE = [
-    Unit(u'Ω',   _(u'Ω'),     _(u'ohm'),     1),
-]
-
-UNITS_INDUCTANCE = [
-    Unit(u'mH',   _(u'mH'),     _(u'mH'),     1),
-]
-
-UNITS_FLOW_RATE = [
-    Unit(u'm³/h',   _(u'm³/h'),     _(u'm³/h'),     1),
-]
-
-UNITS_FLOW_RATE_CHOICES = get_choices(UNITS_FLOW_RATE)
-UNITS_THERMAL_RESISTANCE_CHOICES = get_choices(UNITS_THERMAL_RESISTANCE)
-UNITS_MOTOR_CONSTANT_CHOICES = get_choices(UNITS_MOTOR_CONSTANT)
-UNITS_FORCE_CONSTANT_CHOICES = get_choices(UNITS_FORCE_CONSTANT)
-UNITS_POTENTIAL_CONSTANT_CHOICES = get_choices(UNITS_POTENTIAL_CONSTANT)
-UNITS_ELECTRICAL_TIME_CONSTANT_CHOICES = get_choices(
-    UNITS_ELECTRICAL_TIME_CONSTANT)
-UNITS_ELECTRICAL_RESISTANCE_CHOICES = get_choices(UNITS_ELECTRICAL_RESISTANCE)
-UNITS_INDUCTANCE_CHOICES = get_choices(UNITS_INDUCTANCE)
-
-UNITS_ACCELERATION_CHOICES = get_choices(UNITS_ACCELERATION)
-UNITS_ANGLE_CHOICES = get_choices(UNITS_ANGLE)
-UNITS_CRACKLE_CHOICES = get_choices(UNITS_CRACKLE)
-UNITS_CURRENT_CHOICES = get_choices(UNITS_CURRENT)
-UNITS_DENSITY_CHOICES = get_choices(UNITS_DENSITY)
-UNITS_FORCE_CHOICES = get_choices(UNITS_FORCE)
-UNITS_INERTIA_TORQUE_CHOICES = get_choices(
-    UNITS_INERTIA_TORQUE)
-UNITS_JERK_CHOICES = get_choices(UNITS_JERK)
-UNITS_POTENTIAL_CHOICES = get_choices(UNITS_POTENTIAL)
-UNITS_POWER_CHOICES = get_choices(UNITS_POWER)
-UNITS_SNAP_CHOICES = get_choices(UNITS_SNAP)
-UNITS_SPEED_CHOICES = get_choices(UNITS_SPEED)
-UNITS_TORQUE_CHOICES = get_choices(UNITS_TORQUE)
-UNITS_VELOCITY_CHOICES = get_choices(UNITS_VELOCITY)
-UNITS_TORSION_CHOICES = get_choices(UNITS_TORSION)
-
-UNITS_ANGLE_VELOCITY_CHOICES = get_choices(UNITS_ANGLE_VELOCITY)
-UNITS_ANGLE_ACCELERATION_CHOICES = get_choices(UNITS_ANGLE_ACCELERATION)
-UNITS_ANGLE_JERK_CHOICES = get_choices(UNITS_ANGLE_JERK)
-UNITS_ANGLE_SNAP_CHOICES = get_choices(UNITS_ANGLE_SNAP)
-UNITS_ANGLE_CRACKLE_CHOICES = get_choices(UNITS_ANGLE_CRACKLE)
+@family('UNITS_HEAT_CONDUCTANCE')
+def _units_heat_conductance():
+    from unit_field.dimensions import HEAT_CONDUCTANCE, derive_family
+    return derive_family(HEAT_CONDUCTANCE, labels={
+        u'W/(mK)': (_(u'W/(mK)'), _(u'W/(mK)')),
+    })
+
+@family('UNITS_HEAT_CAPACITY')
+def _units_heat_capacity():
+    return [
+        Unit(u'Ws/K',   _(u'Ws/K'),     _(u'Ws/K'),     1),
+    ]
+
+@family('UNITS_SPECIFIC_HEAT_CAPACITY')
+def _units_specific_heat_capacity():
+    return [
+        Unit(u'Ws/(kgK)',   _(u'Ws/(kgK)'),     _(u'Ws/(kgK)'),     1),
+    ]
+
+@family('UNITS_MOTOR_CONSTANT')
+def _units_motor_constant():
+    return [
+        Unit(u'Nm/W^(1/2)',   _(u'Nm/W^(1/2)'),     _(u'Nm/W^(1/2)'),     1),
+    ]
+
+@family('UNITS_FORCE_CONSTANT')
+def _units_force_constant():
+    return [
+        Unit(u'N/A',   _(u'N/A'),     _(u'N/A'),     1),
+    ]
+
+@family('UNITS_POTENTIAL_CONSTANT')
+def _units_potential_constant():
+    return [
+        Unit(u'Vs/m',   _(u'Vs/m'),     _(u'Vs/m'),     1),
+    ]
+
+@family('UNITS_ELECTRICAL_TIME_CONSTANT')
+def _units_electrical_time_constant():
+    return [
+        Unit(u'ms',   _(u'ms'),     _(u'ms'),     1),
+    ]
+
+@family('UNITS_ELECTRICAL_RESISTANCE')
+def _units_electrical_resistance():
+    return [
+        Unit(u'Ω',   _(u'Ω'),     _(u'ohm'),     1),
+    ]
+
+@family('UNITS_INDUCTANCE')
+def _units_inductance():
+    return [
+        Unit(u'mH',   _(u'mH'),     _(u'mH'),     1),
+    ]
+
+@family('UNITS_FLOW_RATE')
+def _units_flow_rate():
+    return [
+        Unit(u'm³/h',   _(u'm³/h'),     _(u'm³/h'),     1),
+    ]
+
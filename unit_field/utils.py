@@ -1,7 +1,9 @@
 # -*- coding: utf-8 -*-
 from django.conf import settings
+from django.core.signals import setting_changed
 from django.utils.formats import get_format
 from django.utils import six
+from django.utils.translation import get_language
 import unicodedata
 
 """
@@ -9,28 +11,71 @@ Use Django's django.utils.formats.sanitize_formats of Version 1.8
 to guarantee the same behaviour in older Django versions (<= 1.7)
 """
 
+_separators = {}
+
+def get_separators():
+    """
+    returns the decimal separator, the thousand separators to remove
+    (None if thousand separators are not used) and whether the thousand
+    separator is a dot for the active language.
+    The result is cached per language until a related setting changes.
+    """
+    key = (get_language(), settings.USE_THOUSAND_SEPARATOR)
+    try:
+        return _separators[key]
+    except KeyError:
+        pass
+
+    decimal_separator = get_format('DECIMAL_SEPARATOR')
+    thousand_separators = None
+    thousand_dot = False
+    if settings.USE_THOUSAND_SEPARATOR:
+        thousand_sep = get_format('THOUSAND_SEPARATOR')
+        thousand_separators = tuple(sep for sep in set([
+            thousand_sep, unicodedata.normalize('NFKD', thousand_sep)])
+            if sep)
+        thousand_dot = thousand_sep == '.'
+    return _separators.setdefault(key,
+        (decimal_separator, thousand_separators, thousand_dot))
+
+def clear_separators_cache(**kwargs):
+    _separators.clear()
+
+setting_changed.connect(clear_separators_cache)
+
+def _sanitize(value, decimal_separator, thousand_separators, thousand_dot):
+    decimals = None
+    if decimal_separator in value:
+        value, decimals = value.split(decimal_separator, 1)
+    if thousand_separators is not None:
+        if thousand_dot and value.count('.') == 1 and \
+            len(value.split('.')[-1]) != 3:
+            # Special case where we suspect a dot meant decimal separator
+            # (see #22171)
+            pass
+        else:
+            for replacement in thousand_separators:
+                value = value.replace(replacement, '')
+    if decimals is not None:
+        value = '%s.%s' % (value, decimals)
+    return value
+
 def sanitize_separators(value):
     """
     Sanitizes a value according to the current decimal and
     thousand separator setting. Used with form field input.
     """
     if settings.USE_L10N and isinstance(value, six.string_types):
-        parts = []
-        decimal_separator = get_format('DECIMAL_SEPARATOR')
-        if decimal_separator in value:
-            value, decimals = value.split(decimal_separator, 1)
-            parts.append(decimals)
-        if settings.USE_THOUSAND_SEPARATOR:
-            thousand_sep = get_format('THOUSAND_SEPARATOR')
-            if thousand_sep == '.' and value.count('.') == 1 and \
-                len(value.split('.')[-1]) != 3:
-                # Special case where we suspect a dot meant decimal separator
-                # (see #22171)
-                pass
-            else:
-                for replacement in set([
-                    thousand_sep, unicodedata.normalize('NFKD', thousand_sep)]):
-                    value = value.replace(replacement, '')
-        parts.append(value)
-        value = '.'.join(reversed(parts))
+        value = _sanitize(value, *get_separators())
     return value
+
+def sanitize_many(values):
+    """
+    sanitizes many values at once, the separators are only looked up once
+    """
+    if not settings.USE_L10N:
+        return list(values)
+    separators = get_separators()
+    return [_sanitize(value, *separators)
+        if isinstance(value, six.string_types) else value
+        for value in values]
@@ -1,13 +1,17 @@
 # -*- coding: utf-8 -*-
-from unit_field.fields import get_factor
+from unit_field.units import UnitValue, convert_array, get_numpy, get_registry
 from django.core.exceptions import ValidationError
 from django.utils.translation import ugettext_lazy as _
+import operator
 
 def get_normalized_value(value, unit, units):
-    factor = get_factor(units, unit)
-    if factor is None:
+    if not units:
         raise ValidationError(_(u'The selected unit could not be found'))
-    return value * factor
+    try:
+        converter = get_registry(units).converter(unit)
+    except ValueError:
+        raise ValidationError(_(u'The selected unit could not be found'))
+    return converter(value)
 
 def validate_lte(input_value, input_unit, limit_value, limit_unit, units):
     normalized_value = get_normalized_value(input_value, input_unit, units)
@@ -64,3 +68,72 @@ def validate_gt(input_value, input_unit, limit_value, limit_unit, units):
                     'limit_value': limit_value,
                     'limit_unit': limit_unit,
                 })
+
+def _get_violations(compare, values, unit_ids, limit_value, limit_unit, units,
+        keys=None):
+    """
+    returns the keys (the indices if keys is None) of all values violating
+    the limit, values with an unknown unit are always reported
+    """
+    normalized_limit = get_normalized_value(limit_value, limit_unit, units)
+    normalized = convert_array(values, unit_ids, None, units)
+
+    numpy = get_numpy()
+    if numpy is None:
+        violations = [index for index, value in enumerate(normalized)
+            if value is None or not compare(value, normalized_limit)]
+    else:
+        # nan never compares, so unknown units end up in the violations
+        violations = numpy.flatnonzero(
+            ~compare(normalized, normalized_limit)).tolist()
+
+    if keys is None:
+        return violations
+    keys = list(keys)
+    return [keys[index] for index in violations]
+
+def validate_lte_many(values, unit_ids, limit_value, limit_unit, units,
+        keys=None):
+    return _get_violations(operator.le, values, unit_ids, limit_value,
+        limit_unit, units, keys)
+
+def validate_lt_many(values, unit_ids, limit_value, limit_unit, units,
+        keys=None):
+    return _get_violations(operator.lt, values, unit_ids, limit_value,
+        limit_unit, units, keys)
+
+def validate_gte_many(values, unit_ids, limit_value, limit_unit, units,
+        keys=None):
+    return _get_violations(operator.ge, values, unit_ids, limit_value,
+        limit_unit, units, keys)
+
+def validate_gt_many(values, unit_ids, limit_value, limit_unit, units,
+        keys=None):
+    return _get_violations(operator.gt, values, unit_ids, limit_value,
+        limit_unit, units, keys)
+
+def _get_queryset_violations(lookup, queryset, field_name, limit_value,
+        limit_unit):
+    """
+    returns the pks of all rows violating the limit, the comparison runs in
+    the database against the normalized column
+    """
+    condition = {'%s__%s' % (field_name, lookup): UnitValue(
+        limit_value, limit_unit)}
+    return list(queryset.filter(**condition).values_list('pk', flat=True))
+
+def validate_lte_queryset(queryset, field_name, limit_value, limit_unit):
+    return _get_queryset_violations('gt', queryset, field_name, limit_value,
+        limit_unit)
+
+def validate_lt_queryset(queryset, field_name, limit_value, limit_unit):
+    return _get_queryset_violations('gte', queryset, field_name, limit_value,
+        limit_unit)
+
+def validate_gte_queryset(queryset, field_name, limit_value, limit_unit):
+    return _get_queryset_violations('lt', queryset, field_name, limit_value,
+        limit_unit)
+
+def validate_gt_queryset(queryset, field_name, limit_value, limit_unit):
+    return _get_queryset_violations('lte', queryset, field_name, limit_value,
+        limit_unit)